@@ -2,40 +2,86 @@
 Alert engine: calculates % gain/loss vs Issue/Listing price,
 applies hierarchical rules (company > sector > base), triggers Discord alerts.
 """
+import os
 import logging
 from typing import Optional
 
+import numpy as np
+
 log = logging.getLogger(__name__)
 
+# check_alerts switches to the NumPy path at this many IPOs
+VECTORIZE_MIN_ROWS = int(os.environ.get("ALERT_VECTORIZE_MIN_ROWS", "1000"))
 
-def get_rule_for_company(company_doc: dict, all_rules: list) -> dict:
+
+DEFAULT_RULE = {"gain_pct": 15.0, "loss_pct": -15.0}
+
+_UNPARSED = object()
+
+# Resolution order within one owner; the user's own chain is tried before the
+# chain of owner-less (global) rules such as the cron's synthetic base rule.
+_PRECEDENCE = ("company", "sector", "base")
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower()
+
+
+def build_rule_index(all_rules: list) -> dict:
     """
-    Return the applicable alert rule for a company.
-    Priority: company-specific > sector-specific > base (global).
-    Returns dict with keys: gain_pct, loss_pct
+    Precompile alert rules into {(user_id, type, normalized key): thresholds}.
+    Build once per run; lookups are then O(1) per IPO. When two rules collide
+    on the same key the first one wins, as with the old linear scan.
     """
-    company_name = (company_doc.get("company_name") or "").lower()
-    sector_name = (company_doc.get("sector_name") or "").lower()
-
-    # 1. Company-specific rule
+    index = {}
     for rule in all_rules:
-        if rule.get("type") == "company":
-            if (rule.get("company_name") or "").lower() == company_name:
-                return {"gain_pct": rule["gain_pct"], "loss_pct": rule["loss_pct"]}
+        rule_type = rule.get("type")
+        if rule_type == "company":
+            key = _norm(rule.get("company_name"))
+        elif rule_type == "sector":
+            key = _norm(rule.get("sector_name"))
+        elif rule_type == "base":
+            key = ""
+        else:
+            continue
+        index.setdefault(
+            (rule.get("user_id"), rule_type, key),
+            {"gain_pct": rule["gain_pct"], "loss_pct": rule["loss_pct"]},
+        )
+    return index
 
-    # 2. Sector-specific rule
-    for rule in all_rules:
-        if rule.get("type") == "sector":
-            if (rule.get("sector_name") or "").lower() == sector_name:
-                return {"gain_pct": rule["gain_pct"], "loss_pct": rule["loss_pct"]}
 
-    # 3. Base rule
-    for rule in all_rules:
-        if rule.get("type") == "base":
-            return {"gain_pct": rule["gain_pct"], "loss_pct": rule["loss_pct"]}
+def resolve_rule(rule_index: dict, company_doc: dict) -> dict:
+    """
+    Return the applicable thresholds for an IPO from a prebuilt rule index.
+    Priority: company-specific > sector-specific > base, and only rules owned
+    by the IPO's user (or owner-less global rules) are considered.
+    """
+    keys = {
+        "company": _norm(company_doc.get("company_name")),
+        "sector": _norm(company_doc.get("sector_name")),
+        "base": "",
+    }
+    user_id = company_doc.get("user_id")
+    owners = (user_id, None) if user_id is not None else (None,)
+    for owner in owners:
+        for rule_type in _PRECEDENCE:
+            rule = rule_index.get((owner, rule_type, keys[rule_type]))
+            if rule is not None:
+                return rule
+    return dict(DEFAULT_RULE)
 
-    # 4. Absolute default
-    return {"gain_pct": 15.0, "loss_pct": -15.0}
+
+def get_rule_for_company(company_doc: dict, all_rules: list) -> dict:
+    """
+    Return the applicable alert rule for a company.
+    Priority: company-specific > sector-specific > base (global).
+    Returns dict with keys: gain_pct, loss_pct
+
+    Convenience wrapper for one-off lookups; batch callers should build the
+    index once with build_rule_index() and call resolve_rule().
+    """
+    return resolve_rule(build_rule_index(all_rules), company_doc)
 
 
 def calculate_pct(cmp: float, reference_price: float) -> Optional[float]:
@@ -45,7 +91,7 @@ def calculate_pct(cmp: float, reference_price: float) -> Optional[float]:
     return round((cmp - reference_price) * 100 / reference_price, 2)
 
 
-def check_alerts(ipos: list, rules: list, cmp_map: dict) -> list:
+def check_alerts(ipos: list, rules: list, cmp_map: dict, alert_state=None) -> list:
     """
     For each IPO, check if alerts should be triggered.
 
@@ -53,11 +99,28 @@ def check_alerts(ipos: list, rules: list, cmp_map: dict) -> list:
         ipos: list of IPO dicts from Firestore
         rules: list of alert_rule dicts from Firestore
         cmp_map: {company_name: cmp_price} — pre-fetched CMP values
+        alert_state: optional AlertStateStore; when given, only alerts that
+                     crossed into a new band since the last run are returned
 
     Returns:
         list of alert dicts to send
+
+    Large batches (VECTORIZE_MIN_ROWS or more) are routed to
+    check_alerts_vectorized(), which returns the same alerts.
     """
+    if len(ipos) >= VECTORIZE_MIN_ROWS:
+        alerts_to_send = check_alerts_vectorized(ipos, rules, cmp_map)
+    else:
+        alerts_to_send = _check_alerts_scalar(ipos, rules, cmp_map)
+
+    if alert_state is not None:
+        alerts_to_send = alert_state.filter_transitions(ipos, cmp_map, alerts_to_send)
+    return alerts_to_send
+
+
+def _check_alerts_scalar(ipos: list, rules: list, cmp_map: dict) -> list:
     alerts_to_send = []
+    rule_index = build_rule_index(rules)
 
     for ipo in ipos:
         company_name = ipo.get("company_name")
@@ -66,62 +129,148 @@ def check_alerts(ipos: list, rules: list, cmp_map: dict) -> list:
             log.warning(f"No CMP found for {company_name}, skipping alert check")
             continue
 
-        rule = get_rule_for_company(ipo, rules)
-        gain_threshold = rule["gain_pct"]
-        loss_threshold = rule["loss_pct"]
-
+        rule = resolve_rule(rule_index, ipo)
         issue_price = _to_float(ipo.get("issue_price"))
         listing_price = _to_float(ipo.get("listing_price"))
 
-        pct_vs_issue = calculate_pct(cmp, issue_price) if issue_price else None
-        pct_vs_listing = calculate_pct(cmp, listing_price) if listing_price else None
-
-        triggered = False
-        alert_reasons = []
-
-        # Check issue price thresholds
-        if pct_vs_issue is not None:
-            if pct_vs_issue >= gain_threshold:
-                triggered = True
-                alert_reasons.append(
-                    f"🟢 +{pct_vs_issue:.2f}% vs Issue Price (₹{issue_price}) — above gain threshold of +{gain_threshold}%"
-                )
-            elif pct_vs_issue <= loss_threshold:
-                triggered = True
-                alert_reasons.append(
-                    f"🔴 {pct_vs_issue:.2f}% vs Issue Price (₹{issue_price}) — below loss threshold of {loss_threshold}%"
-                )
-
-        # Check listing price thresholds
-        if pct_vs_listing is not None:
-            if pct_vs_listing >= gain_threshold:
-                triggered = True
-                alert_reasons.append(
-                    f"🟢 +{pct_vs_listing:.2f}% vs Listing Price (₹{listing_price}) — above gain threshold of +{gain_threshold}%"
-                )
-            elif pct_vs_listing <= loss_threshold:
-                triggered = True
-                alert_reasons.append(
-                    f"🔴 {pct_vs_listing:.2f}% vs Listing Price (₹{listing_price}) — below loss threshold of {loss_threshold}%"
-                )
-
-        if triggered:
-            alerts_to_send.append({
-                "company_name": company_name,
-                "sector": ipo.get("sector_name", "—"),
-                "cmp": cmp,
-                "issue_price": issue_price,
-                "listing_price": listing_price,
-                "pct_vs_issue": pct_vs_issue,
-                "pct_vs_listing": pct_vs_listing,
-                "gain_threshold": gain_threshold,
-                "loss_threshold": loss_threshold,
-                "reasons": alert_reasons,
-            })
+        alert = _evaluate_ipo(ipo, cmp, rule, issue_price, listing_price)
+        if alert is not None:
+            alerts_to_send.append(alert)
 
     return alerts_to_send
 
 
+def check_alerts_vectorized(ipos: list, rules: list, cmp_map: dict) -> list:
+    """
+    Batched equivalent of check_alerts().
+
+    Prices are parsed once (memoized per distinct string) into columnar NumPy
+    arrays, and % moves vs issue/listing price are screened against every
+    row's thresholds in one step. Only rows that may have triggered go
+    through the exact per-row evaluation that rounds and formats the
+    reasons, so the output is identical to the scalar path.
+    """
+    rule_index = build_rule_index(rules)
+    parsed: dict = {}       # raw price value -> float (the same IPO recurs across users)
+    rule_memo: dict = {}    # (user_id, sector_name) -> thresholds
+    # Owners with company-level rules need the full lookup; everyone else's
+    # thresholds depend only on (user, sector) and can be memoized.
+    company_rule_owners = {owner for owner, rule_type, _ in rule_index if rule_type == "company"}
+    rows, issues, listings = [], [], []
+
+    for ipo in ipos:
+        company_name = ipo.get("company_name")
+        cmp = cmp_map.get(company_name)
+        if cmp is None:
+            log.warning(f"No CMP found for {company_name}, skipping alert check")
+            continue
+
+        user_id = ipo.get("user_id")
+        if user_id in company_rule_owners or None in company_rule_owners:
+            rule = resolve_rule(rule_index, ipo)
+        else:
+            rule_key = (user_id, ipo.get("sector_name"))
+            rule = rule_memo.get(rule_key)
+            if rule is None:
+                rule = rule_memo[rule_key] = resolve_rule(rule_index, ipo)
+
+        raw_issue, raw_listing = ipo.get("issue_price"), ipo.get("listing_price")
+        issue = parsed.get(raw_issue, _UNPARSED)
+        if issue is _UNPARSED:
+            issue = parsed[raw_issue] = _to_float(raw_issue)
+        listing = parsed.get(raw_listing, _UNPARSED)
+        if listing is _UNPARSED:
+            listing = parsed[raw_listing] = _to_float(raw_listing)
+
+        rows.append((ipo, cmp, rule, issue, listing))
+        issues.append(issue or np.nan)
+        listings.append(listing or np.nan)
+
+    if not rows:
+        return []
+
+    cmp_arr = np.fromiter((r[1] for r in rows), dtype=float, count=len(rows))
+    gain_arr = np.fromiter((r[2]["gain_pct"] for r in rows), dtype=float, count=len(rows))
+    loss_arr = np.fromiter((r[2]["loss_pct"] for r in rows), dtype=float, count=len(rows))
+    issue_arr = np.asarray(issues, dtype=float)
+    listing_arr = np.asarray(listings, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_issue = (cmp_arr - issue_arr) * 100 / issue_arr
+        pct_listing = (cmp_arr - listing_arr) * 100 / listing_arr
+
+    # The scalar path compares values rounded to 2 dp, so screen with a margin
+    # wider than the rounding error and let _evaluate_ipo make the final call.
+    margin = 0.01
+    maybe = (
+        (pct_issue >= gain_arr - margin) | (pct_issue <= loss_arr + margin)
+        | (pct_listing >= gain_arr - margin) | (pct_listing <= loss_arr + margin)
+    )
+
+    alerts_to_send = []
+    for idx in np.flatnonzero(maybe):
+        alert = _evaluate_ipo(*rows[idx])
+        if alert is not None:
+            alerts_to_send.append(alert)
+    return alerts_to_send
+
+
+def _evaluate_ipo(ipo: dict, cmp: float, rule: dict,
+                  issue_price: Optional[float], listing_price: Optional[float]) -> Optional[dict]:
+    """Apply one rule to one IPO; returns the alert dict, or None if nothing triggered."""
+    gain_threshold = rule["gain_pct"]
+    loss_threshold = rule["loss_pct"]
+
+    pct_vs_issue = calculate_pct(cmp, issue_price) if issue_price else None
+    pct_vs_listing = calculate_pct(cmp, listing_price) if listing_price else None
+
+    triggered = False
+    alert_reasons = []
+
+    # Check issue price thresholds
+    if pct_vs_issue is not None:
+        if pct_vs_issue >= gain_threshold:
+            triggered = True
+            alert_reasons.append(
+                f"🟢 +{pct_vs_issue:.2f}% vs Issue Price (₹{issue_price}) — above gain threshold of +{gain_threshold}%"
+            )
+        elif pct_vs_issue <= loss_threshold:
+            triggered = True
+            alert_reasons.append(
+                f"🔴 {pct_vs_issue:.2f}% vs Issue Price (₹{issue_price}) — below loss threshold of {loss_threshold}%"
+            )
+
+    # Check listing price thresholds
+    if pct_vs_listing is not None:
+        if pct_vs_listing >= gain_threshold:
+            triggered = True
+            alert_reasons.append(
+                f"🟢 +{pct_vs_listing:.2f}% vs Listing Price (₹{listing_price}) — above gain threshold of +{gain_threshold}%"
+            )
+        elif pct_vs_listing <= loss_threshold:
+            triggered = True
+            alert_reasons.append(
+                f"🔴 {pct_vs_listing:.2f}% vs Listing Price (₹{listing_price}) — below loss threshold of {loss_threshold}%"
+            )
+
+    if not triggered:
+        return None
+
+    return {
+        "ipo_id": ipo.get("id"),
+        "user_id": ipo.get("user_id"),
+        "company_name": ipo.get("company_name"),
+        "sector": ipo.get("sector_name", "—"),
+        "cmp": cmp,
+        "issue_price": issue_price,
+        "listing_price": listing_price,
+        "pct_vs_issue": pct_vs_issue,
+        "pct_vs_listing": pct_vs_listing,
+        "gain_threshold": gain_threshold,
+        "loss_threshold": loss_threshold,
+        "reasons": alert_reasons,
+    }
+
+
 def _to_float(val) -> Optional[float]:
     if val is None:
         return None
@@ -0,0 +1,259 @@
+"""
+One alert-check pass, shared by the /api/cron/check-alerts endpoint and
+cron_job.py: load IPOs and rules, fetch CMPs, evaluate, dispatch, persist.
+"""
+import os
+import time
+import uuid
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import company_prices
+from alert_engine import check_alerts
+from alert_state import AlertStateStore
+from company_state import CompanyStateTracker
+from discord_notifier import dispatch_alerts, send_cron_summary
+from scrapers import circuit_breaker
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+# Only the columns check_alerts and the incremental tracker read
+IPO_COLUMNS = "id, user_id, company_name, sector_name, issue_price, listing_price, created_at, updated_at"
+RULE_COLUMNS = "user_id, type, company_name, sector_name, gain_pct, loss_pct, created_at, updated_at"
+
+CHECKPOINT_TABLE = "cron_checkpoints"
+
+
+def incremental_default() -> bool:
+    return os.environ.get("CRON_INCREMENTAL", "true").lower() in ("1", "true", "yes")
+
+
+def _load_ipos(db, portfolio_only: bool) -> list:
+    query = db.table("ipos").select(IPO_COLUMNS)
+    if portfolio_only:
+        query = query.eq("portfolio", True)
+    return query.execute().data
+
+
+def _load_rules(db) -> list:
+    rules = db.table("alert_rules").select(RULE_COLUMNS).execute().data
+    if not any(r.get("type") == "base" for r in rules):
+        rules.append({"type": "base", "gain_pct": 15.0, "loss_pct": -15.0})
+    return rules
+
+
+def _evaluate_batch(db, ipos: list, rules: list, fetch_cmps: Callable[[list], dict], incremental: bool) -> dict:
+    """Fetch CMPs, evaluate, dispatch and persist one batch of IPOs; returns counters."""
+    unique_companies = list(dict.fromkeys(ipo["company_name"] for ipo in ipos))
+    log.info(f"Gathering CMP for {len(unique_companies)} companies...")
+    cmp_results = fetch_cmps(unique_companies)
+    company_prices.store(db, cmp_results, source="cron")
+    cmp_map = {}
+    for name, result in cmp_results.items():
+        if result.get("price"):
+            cmp_map[name] = result["price"]
+        else:
+            log.warning(f"Could not fetch CMP for {name}: {result.get('error')}")
+
+    to_evaluate = ipos
+    tracker = None
+    if incremental:
+        tracker = CompanyStateTracker(db)
+        tracker.load(unique_companies)
+        to_evaluate = tracker.select(ipos, rules, cmp_map)
+        log.info(f"Incremental: {len(to_evaluate)}/{len(ipos)} IPOs need evaluation")
+
+    alert_state = AlertStateStore(db)
+    alert_state.load(to_evaluate)
+    alerts = check_alerts(to_evaluate, rules, cmp_map, alert_state=alert_state)
+    deliveries = dispatch_alerts(alerts)
+    alert_state.save(deliveries)
+    if tracker is not None:
+        tracker.save(deliveries)
+
+    counters = {
+        "companies_checked": len(unique_companies),
+        "ipos_checked": len(ipos),
+        "ipos_evaluated": len(to_evaluate),
+        "cmp_fetched": len(cmp_map),
+        "alerts_triggered": len(alerts),
+        "alerts_suppressed": alert_state.suppressed,
+        "alerts_sent": sum(1 for d in deliveries if d["sent"]),
+        "alerts_failed": [d for d in deliveries if not d["sent"]],
+    }
+    if tracker is not None:
+        counters.update(tracker.summary())
+    return counters
+
+
+def _merge_counters(total: dict, batch: dict) -> dict:
+    merged = dict(total)
+    for key, value in batch.items():
+        merged[key] = merged.get(key, [] if isinstance(value, list) else 0) + value
+    return merged
+
+
+def run_alert_pass(
+    db,
+    fetch_cmps: Callable[[list], dict],
+    portfolio_only: bool = True,
+    incremental: Optional[bool] = None,
+) -> dict:
+    """
+    Check every IPO in a single pass.
+
+    Args:
+        db: Supabase client
+        fetch_cmps: names -> {name: cmp result dict}
+        portfolio_only: restrict to IPOs flagged as portfolio holdings
+        incremental: skip IPOs whose price and rules haven't changed since
+                     their last evaluation (defaults to CRON_INCREMENTAL)
+
+    Returns:
+        run summary dict
+    """
+    if incremental is None:
+        incremental = incremental_default()
+
+    ipos = _load_ipos(db, portfolio_only)
+    if not ipos:
+        return {"message": "No portfolio IPOs found", "alerts_sent": 0}
+
+    counters = _evaluate_batch(db, ipos, _load_rules(db), fetch_cmps, incremental)
+    circuits = circuit_breaker.states()
+    send_cron_summary(counters["companies_checked"], counters["alerts_sent"], circuits=circuits)
+    log.info(f"Cron: {counters['ipos_checked']} IPOs checked, {counters['alerts_sent']} alerts sent")
+    return {"message": "Alert check complete", "incremental": incremental, **counters, "circuits": circuits}
+
+
+# ═══════════════════════════════════════════════════════════
+# Sharded / resumable runs
+# ═══════════════════════════════════════════════════════════
+
+def shard_of(company_key: str, shard_count: int) -> int:
+    """Stable shard assignment (crc32 is identical across processes and hosts)."""
+    return zlib.crc32(company_key.encode()) % shard_count
+
+
+def default_run_id() -> str:
+    """A fresh run id; pass it back explicitly to resume that run."""
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def run_alert_shard(
+    db,
+    fetch_cmps: Callable[[list], dict],
+    shard: int = 0,
+    shard_count: int = 1,
+    cursor: Optional[str] = None,
+    run_id: Optional[str] = None,
+    portfolio_only: bool = True,
+    incremental: Optional[bool] = None,
+    batch_size: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> dict:
+    """
+    Check one shard of the unique companies, resumably.
+
+    Companies are assigned to shards by a stable hash of their normalized
+    name and walked in key order, `batch_size` companies at a time. After
+    every batch the position is saved to `cron_checkpoints`; processing stops
+    once `time_budget` seconds are spent, returning `next_cursor` for the
+    follow-up call. Without an explicit cursor the stored checkpoint for
+    (run_id, shard) is resumed, so a timed-out invocation loses at most one
+    batch of work. Resuming needs the caller's run_id: without one every
+    call starts a fresh run (the id is in the result).
+    """
+    if not 0 <= shard < shard_count:
+        raise ValueError(f"shard must be in [0, {shard_count})")
+    if incremental is None:
+        incremental = incremental_default()
+    resuming = run_id is not None
+    run_id = run_id or default_run_id()
+    batch_size = batch_size or int(os.environ.get("CRON_BATCH_SIZE", "50"))
+    time_budget = time_budget if time_budget is not None else float(os.environ.get("CRON_TIME_BUDGET", "45"))
+    started = time.monotonic()
+
+    checkpoint = _load_checkpoint(db, run_id, shard) if resuming else None
+    if checkpoint and checkpoint["shard_count"] != shard_count:
+        raise ValueError(
+            f"Run {run_id} was started with {checkpoint['shard_count']} shards; pass a new run_id to reshard"
+        )
+    if cursor is None and checkpoint:
+        if checkpoint["done"]:
+            return {"message": "Shard already complete", "run_id": run_id, "shard": shard,
+                    "done": True, "next_cursor": None, **checkpoint["stats"]}
+        cursor = checkpoint["cursor"]
+    counters = checkpoint["stats"] if checkpoint else {}
+
+    ipos_by_key: dict = {}
+    for ipo in _load_ipos(db, portfolio_only):
+        key = normalize_company_name(ipo["company_name"])
+        if shard_of(key, shard_count) == shard:
+            ipos_by_key.setdefault(key, []).append(ipo)
+    keys = sorted(k for k in ipos_by_key if cursor is None or k > cursor)
+
+    rules = _load_rules(db) if keys else []
+    done = not keys
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start:start + batch_size]
+        batch = [ipo for k in batch_keys for ipo in ipos_by_key[k]]
+        counters = _merge_counters(counters, _evaluate_batch(db, batch, rules, fetch_cmps, incremental))
+        cursor = batch_keys[-1]
+        done = start + batch_size >= len(keys)
+        _save_checkpoint(db, run_id, shard, shard_count, cursor, done, counters)
+        if not done and time.monotonic() - started >= time_budget:
+            log.info(f"Shard {shard}/{shard_count}: time budget spent, pausing at {cursor!r}")
+            break
+
+    # Circuit state is per process, so it is reported rather than checkpointed
+    circuits = circuit_breaker.states()
+    if done and keys:
+        send_cron_summary(
+            counters.get("companies_checked", 0),
+            counters.get("alerts_sent", 0),
+            title=f"Alert Check Complete — shard {shard + 1}/{shard_count}" if shard_count > 1 else None,
+            circuits=circuits,
+        )
+    if not keys:
+        _save_checkpoint(db, run_id, shard, shard_count, cursor, True, counters)
+
+    return {
+        "message": "Alert check complete" if done else "Alert check paused",
+        "run_id": run_id,
+        "shard": shard,
+        "shard_count": shard_count,
+        "done": done,
+        "next_cursor": None if done else cursor,
+        "incremental": incremental,
+        **counters,
+        "circuits": circuits,
+    }
+
+
+def _load_checkpoint(db, run_id: str, shard: int) -> Optional[dict]:
+    rows = (
+        db.table(CHECKPOINT_TABLE)
+        .select("shard_count, cursor, done, stats")
+        .eq("run_id", run_id)
+        .eq("shard", shard)
+        .execute()
+        .data
+    )
+    return rows[0] if rows else None
+
+
+def _save_checkpoint(db, run_id: str, shard: int, shard_count: int,
+                     cursor: Optional[str], done: bool, stats: dict) -> None:
+    db.table(CHECKPOINT_TABLE).upsert({
+        "run_id": run_id,
+        "shard": shard,
+        "shard_count": shard_count,
+        "cursor": cursor,
+        "done": done,
+        "stats": stats,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }, on_conflict="run_id,shard").execute()
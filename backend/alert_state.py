@@ -0,0 +1,138 @@
+"""
+Alert state store — suppresses repeat notifications between cron runs.
+
+For every (user, IPO, reference) the `alert_states` table keeps the last
+alerted *band*: 0 means "within thresholds / armed", +1 means the gain
+threshold was crossed, +2 means crossed by one more ALERT_STEP_PCT, and so
+on (negative bands mirror this for losses). An alert is sent only when a
+reference moves into a higher band or flips side; falling back inside the
+thresholds re-arms it. Changing the reference price (e.g. editing the
+issue price) resets its state.
+"""
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+TABLE = "alert_states"
+REFERENCES = (("issue", "issue_price", "pct_vs_issue"), ("listing", "listing_price", "pct_vs_listing"))
+_IN_CHUNK = 200
+COLUMNS = ("user_id", "ipo_id", "reference", "reference_price", "last_band", "last_pct", "last_alerted_at", "updated_at")
+
+
+def band_for(pct: Optional[float], gain_pct: float, loss_pct: float, step_pct: float) -> int:
+    """Map a % move to its alert band (0 = inside thresholds)."""
+    if pct is None:
+        return 0
+    if pct >= gain_pct:
+        return 1 + (int((pct - gain_pct) // step_pct) if step_pct > 0 else 0)
+    if pct <= loss_pct:
+        return -(1 + (int((loss_pct - pct) // step_pct) if step_pct > 0 else 0))
+    return 0
+
+
+def is_transition(previous: int, current: int) -> bool:
+    """True when moving from `previous` to `current` band deserves an alert."""
+    if current == 0:
+        return False
+    if previous == 0 or (previous > 0) != (current > 0):
+        return True
+    return abs(current) > abs(previous)
+
+
+def _row(base: dict, **changes) -> dict:
+    """Full-width state row, so bulk upserts always send the same columns."""
+    merged = dict(base, **changes)
+    row = {col: merged.get(col) for col in COLUMNS}
+    row["last_band"] = row["last_band"] or 0
+    return row
+
+
+class AlertStateStore:
+    def __init__(self, db, step_pct: Optional[float] = None):
+        self.db = db
+        self.step_pct = step_pct if step_pct is not None else float(os.environ.get("ALERT_STEP_PCT", "10"))
+        self._states: dict = {}        # (user_id, ipo_id, reference) -> row
+        self._rearm: list = []         # rows to write regardless of delivery
+        self._on_delivery: list = []   # rows to write per returned alert, same order
+        self.suppressed = 0
+
+    def load(self, ipos: list) -> None:
+        """Fetch stored states for the given IPOs."""
+        ids = [ipo["id"] for ipo in ipos if ipo.get("id")]
+        for i in range(0, len(ids), _IN_CHUNK):
+            rows = self.db.table(TABLE).select("*").in_("ipo_id", ids[i:i + _IN_CHUNK]).execute().data
+            for row in rows:
+                self._states[(row["user_id"], row["ipo_id"], row["reference"])] = row
+
+    def _previous_band(self, key: tuple, reference_price: float) -> int:
+        row = self._states.get(key)
+        if row is None or float(row["reference_price"]) != float(reference_price):
+            return 0
+        return row["last_band"]
+
+    def filter_transitions(self, ipos: list, cmp_map: dict, alerts: list) -> list:
+        """
+        Keep only alerts where at least one reference changed band, and queue
+        re-arms for references that came back inside their thresholds.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        alerted_ids = {a.get("ipo_id") for a in alerts}
+
+        # Re-arm: priced IPOs that did not trigger at all are inside thresholds
+        for ipo in ipos:
+            if ipo.get("id") in alerted_ids or cmp_map.get(ipo.get("company_name")) is None:
+                continue
+            for reference, _, _ in REFERENCES:
+                key = (ipo.get("user_id"), ipo["id"], reference)
+                row = self._states.get(key)
+                if row is not None and row["last_band"] != 0:
+                    self._rearm.append(_row(row, last_band=0, updated_at=now))
+
+        to_send = []
+        for alert in alerts:
+            updates, transitioned = [], False
+            for reference, price_key, pct_key in REFERENCES:
+                reference_price = alert.get(price_key)
+                if not reference_price:
+                    continue
+                key = (alert.get("user_id"), alert.get("ipo_id"), reference)
+                previous = self._previous_band(key, reference_price)
+                current = band_for(alert.get(pct_key), alert["gain_threshold"], alert["loss_threshold"], self.step_pct)
+                row = _row(
+                    self._states.get(key, {}),
+                    user_id=key[0],
+                    ipo_id=key[1],
+                    reference=reference,
+                    reference_price=reference_price,
+                    last_pct=alert.get(pct_key),
+                    updated_at=now,
+                )
+                if is_transition(previous, current):
+                    transitioned = True
+                    updates.append(dict(row, last_band=current, last_alerted_at=now))
+                elif current == 0 and previous != 0:
+                    self._rearm.append(dict(row, last_band=0))
+
+            if transitioned:
+                to_send.append(alert)
+                self._on_delivery.append(updates)
+            else:
+                self.suppressed += 1
+
+        return to_send
+
+    def save(self, deliveries: Optional[list] = None) -> None:
+        """
+        Persist state changes. Band bumps are only recorded for alerts that
+        were actually delivered, so a failed webhook post is retried next run.
+        """
+        rows = list(self._rearm)
+        for i, updates in enumerate(self._on_delivery):
+            if deliveries is None or (i < len(deliveries) and deliveries[i]["sent"]):
+                rows.extend(updates)
+        if rows:
+            self.db.table(TABLE).upsert(rows, on_conflict="user_id,ipo_id,reference").execute()
+        self._rearm, self._on_delivery = [], []
@@ -0,0 +1,59 @@
+"""
+Auto-fetch: stage the closed Groww IPOs a user hasn't seen yet in
+`pending_ipo_additions`.
+
+Listing and detail data come from the shared `ipo_catalog` table, which the
+scheduled catalog refresh keeps current (see ipo_catalog.py). The set
+difference against the user's ipos, pending and thrown-out IPOs runs in
+Postgres: the `stage_catalog_ipos` RPC anti-joins and inserts in one
+statement (ON CONFLICT DO NOTHING on the per-user unique keys, so double
+clicks are harmless) and returns only the rows it inserted. Nothing is
+scraped. Each call stages at most CHUNK_SIZE rows, and progress is written
+to the job row after each one.
+"""
+import os
+import logging
+
+import ipo_catalog
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.environ.get("AUTO_FETCH_CHUNK", "500"))
+
+
+def stage_new_ipos(db, user_id: str, on_progress=None) -> list:
+    """
+    Stage every unseen catalog IPO for `user_id`; returns the inserted rows.
+    `on_progress(added)` is called after every chunk.
+    """
+    inserted = []
+    while True:
+        rows = db.rpc("stage_catalog_ipos", {"p_user_id": user_id, "p_limit": CHUNK_SIZE}).execute().data
+        if not rows:
+            return inserted
+        inserted.extend(rows)
+        if on_progress:
+            on_progress(len(inserted))
+
+
+def run_auto_fetch(db, user_id: str, on_progress=None) -> dict:
+    """
+    Body of the "auto_fetch" job. `on_progress(**fields)` receives
+    total (before staging starts) / completed / added updates for the job row.
+    """
+    report = on_progress or (lambda **_: None)
+
+    total = db.rpc("count_new_catalog_ipos", {"p_user_id": user_id}).execute().data or 0
+    report(total=total)
+    inserted = stage_new_ipos(db, user_id, on_progress=lambda added: report(completed=added, added=added))
+    if not inserted and not db.table(ipo_catalog.TABLE).select("search_id").limit(1).execute().data:
+        return {"message": "IPO catalog is empty; it fills on the next scheduled refresh", "added": 0}
+
+    if len(inserted) != total:
+        # Same-name catalog entries collapse into one pending row
+        report(total=len(inserted))
+    return {
+        "message": f"Successfully fetched {len(inserted)} new IPOs",
+        "added": len(inserted),
+        "search_ids": [row["search_id"] for row in inserted],
+    }
@@ -0,0 +1,202 @@
+"""
+Alert rule backtest: replay stored daily closes through the alert thresholds.
+
+For one user's IPOs, every day in `company_price_history` is checked the way
+alert_engine._evaluate_ipo() checks a live CMP: % vs issue and vs listing
+price (rounded to 2 dp) against gain_pct / loss_pct, with thresholds
+resolved company > sector > base. Besides the rules the user has today,
+any number of candidate gain/loss thresholds can be tried at once.
+
+Prices are laid out as an (IPOs x market days) matrix (NaN where a day has
+no close), so each candidate costs a handful of NumPy operations over the
+whole matrix rather than a Python loop per IPO and day.
+
+Per IPO and candidate the result has:
+  trigger_days   days on which at least one reference was out of bounds
+  entries        times it moved from inside to outside the thresholds,
+                 which is roughly what AlertStateStore would have sent
+  first_trigger  the first such day
+
+CLI:
+    python backtest.py --user <user_id> [--gain 10 15 20] [--loss -10 -20]
+                       [--start 2024-01-01] [--end 2024-12-31]
+"""
+import logging
+from datetime import date
+from itertools import product
+from typing import List, Optional
+
+import numpy as np
+
+import price_history
+from alert_engine import _to_float, build_rule_index, resolve_rule
+from pagination import fetch_all
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+MAX_CANDIDATES = 64
+IPO_COLUMNS = "id, user_id, company_name, sector_name, issue_price, listing_price"
+RULE_COLUMNS = "user_id, type, company_name, sector_name, gain_pct, loss_pct"
+
+
+def candidate_grid(gains: List[float], losses: List[float]) -> list:
+    """
+    [(gain, loss)] pairs to evaluate; None means "the IPO's current rule".
+    The first pair is always (None, None); a grid given on one side only is
+    paired with the current threshold on the other.
+    """
+    pairs = [(None, None)]
+    for pair in product(gains or [None], losses or [None]):
+        if pair not in pairs:
+            pairs.append(pair)
+    if len(pairs) > MAX_CANDIDATES:
+        raise ValueError(f"At most {MAX_CANDIDATES} threshold combinations per backtest")
+    return pairs
+
+
+def price_matrix(ipos: list, closes: list):
+    """
+    (days, P) where days are every market day present in `closes` (as
+    days since 1970-01-01) and P[i, d] is IPO i's close on days[d], NaN if
+    there is none.
+    """
+    if not closes:
+        return np.empty(0, dtype=np.int64), np.full((len(ipos), 0), np.nan)
+    position: dict = {}
+    key_idx = np.fromiter((position.setdefault(k, len(position)) for k, _, _ in closes),
+                          dtype=np.int64, count=len(closes))
+    stamps = np.array([d for _, d, _ in closes], dtype="datetime64[D]").astype(np.int64)
+    values = np.fromiter((c for _, _, c in closes), dtype=float, count=len(closes))
+
+    days, day_idx = np.unique(stamps, return_inverse=True)
+    by_company = np.full((len(position) + 1, len(days)), np.nan)
+    by_company[key_idx, day_idx] = values
+
+    # IPOs with no history at all point at the extra all-NaN last row
+    rows = np.fromiter(
+        (position.get(normalize_company_name(ipo["company_name"]), len(position)) for ipo in ipos),
+        dtype=np.int64, count=len(ipos),
+    )
+    return days, by_company[rows]
+
+
+def _pct(prices: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round((prices - reference[:, None]) * 100 / reference[:, None], 2)
+
+
+def evaluate(ipos: list, rules: list, days: np.ndarray, prices: np.ndarray, candidates: list) -> dict:
+    """Trigger counts and first-trigger days for every IPO x candidate; see the module docstring."""
+    rule_index = build_rule_index(rules)
+    current = [resolve_rule(rule_index, ipo) for ipo in ipos]
+    gain_now = np.array([r["gain_pct"] for r in current], dtype=float)
+    loss_now = np.array([r["loss_pct"] for r in current], dtype=float)
+    issue = np.array([_to_float(ipo.get("issue_price")) or np.nan for ipo in ipos], dtype=float)
+    listing = np.array([_to_float(ipo.get("listing_price")) or np.nan for ipo in ipos], dtype=float)
+
+    # Best and worst move of the day across both references; a threshold is
+    # crossed when either reference crosses it, as in _evaluate_ipo().
+    pct_issue, pct_listing = _pct(prices, issue), _pct(prices, listing)
+    observed = ~(np.isnan(pct_issue) & np.isnan(pct_listing))
+    up = np.where(observed, np.fmax(pct_issue, pct_listing), -np.inf)
+    down = np.where(observed, np.fmin(pct_issue, pct_listing), np.inf)
+
+    # Carry the last observed move over gaps so a missing day neither ends
+    # nor starts an excursion when counting entries
+    n, d = prices.shape
+    last = np.maximum.accumulate(np.where(observed, np.arange(d), -1), axis=1)
+    filled = np.clip(last, 0, None)
+    seen = last >= 0
+    up_f = np.where(seen, np.take_along_axis(up, filled, axis=1), -np.inf)
+    down_f = np.where(seen, np.take_along_axis(down, filled, axis=1), np.inf)
+
+    k = len(candidates)
+    trigger_days = np.zeros((n, k), dtype=np.int64)
+    entries = np.zeros((n, k), dtype=np.int64)
+    first = np.full((n, k), -1, dtype=np.int64)
+    for c, (gain, loss) in enumerate(candidates):
+        g = (gain_now if gain is None else np.full(n, float(gain)))[:, None]
+        lo = (loss_now if loss is None else np.full(n, float(loss)))[:, None]
+        hit = (up >= g) | (down <= lo)
+        out = (up_f >= g) | (down_f <= lo)
+        trigger_days[:, c] = hit.sum(axis=1)
+        if d:
+            entries[:, c] = out[:, 0] + (out[:, 1:] & ~out[:, :-1]).sum(axis=1)
+            first[:, c] = np.where(hit.any(axis=1), hit.argmax(axis=1), -1)
+
+    return {
+        "gain_now": gain_now, "loss_now": loss_now, "history_days": observed.sum(axis=1),
+        "trigger_days": trigger_days, "entries": entries, "first": first,
+    }
+
+
+def _day(days: np.ndarray, index: int) -> Optional[str]:
+    return str(np.datetime64(int(days[index]), "D")) if index >= 0 else None
+
+
+def run_backtest(db, user_id: str, start: Optional[date] = None, end: Optional[date] = None,
+                 gains: List[float] = (), losses: List[float] = ()) -> dict:
+    """Backtest `user_id`'s IPOs over [start, end]; reads the database only."""
+    candidates = candidate_grid(list(gains), list(losses))
+    ipos = fetch_all(lambda: (
+        db.table("ipos").select(IPO_COLUMNS).eq("user_id", user_id).order("id")
+    ))
+    rules = db.table("alert_rules").select(RULE_COLUMNS).eq("user_id", user_id).execute().data
+    closes = price_history.company_closes(db, [ipo["company_name"] for ipo in ipos], start, end)
+
+    days, prices = price_matrix(ipos, closes)
+    r = evaluate(ipos, rules, days, prices, candidates)
+
+    summary = []
+    for c, (gain, loss) in enumerate(candidates):
+        hits = r["first"][:, c]
+        summary.append({
+            "gain_pct": gain, "loss_pct": loss, "current": gain is None and loss is None,
+            "ipos_triggered": int((hits >= 0).sum()),
+            "trigger_days": int(r["trigger_days"][:, c].sum()),
+            "entries": int(r["entries"][:, c].sum()),
+            "first_trigger": _day(days, int(hits[hits >= 0].min())) if (hits >= 0).any() else None,
+        })
+
+    results = [
+        {
+            "ipo_id": ipo["id"], "company_name": ipo["company_name"],
+            "gain_pct": float(r["gain_now"][i]), "loss_pct": float(r["loss_now"][i]),
+            "history_days": int(r["history_days"][i]),
+            "trigger_days": r["trigger_days"][i].tolist(),
+            "entries": r["entries"][i].tolist(),
+            "first_trigger": [_day(days, f) for f in r["first"][i].tolist()],
+        }
+        for i, ipo in enumerate(ipos)
+    ]
+    return {
+        "start": _day(days, 0) if len(days) else None,
+        "end": _day(days, len(days) - 1) if len(days) else None,
+        "days": len(days),
+        "candidates": summary,
+        "ipos": results,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Replay stored daily prices through alert thresholds.")
+    parser.add_argument("--user", required=True, help="user id whose IPOs and rules to backtest")
+    parser.add_argument("--gain", type=float, nargs="*", default=[], help="candidate gain_pct values")
+    parser.add_argument("--loss", type=float, nargs="*", default=[], help="candidate loss_pct values")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    report = run_backtest(get_db(), args.user, args.start, args.end, args.gain, args.loss)
+    print(f"{len(report['ipos'])} IPOs, {report['days']} market days ({report['start']} .. {report['end']})")
+    print(f"{'gain':>8} {'loss':>8} {'IPOs':>6} {'days':>7} {'entries':>8}  first trigger")
+    for row in report["candidates"]:
+        gain = "current" if row["gain_pct"] is None else f"{row['gain_pct']:+g}"
+        loss = "current" if row["loss_pct"] is None else f"{row['loss_pct']:+g}"
+        print(f"{gain:>8} {loss:>8} {row['ipos_triggered']:>6} {row['trigger_days']:>7} "
+              f"{row['entries']:>8}  {row['first_trigger'] or '-'}")
@@ -0,0 +1,76 @@
+"""
+Benchmark: scalar vs vectorized alert evaluation.
+
+    python bench_alerts.py [rows ...]    (default: 10000 100000)
+
+Builds a synthetic portfolio, checks both paths return identical alerts,
+and prints the timings.
+"""
+import sys
+import time
+import random
+import logging
+
+from alert_engine import check_alerts_vectorized, _check_alerts_scalar
+
+logging.basicConfig(level=logging.ERROR)
+
+
+def make_portfolio(n_rows: int, n_users: int = 2000, seed: int = 7):
+    """Portfolio rows spread over users; popular IPOs are held by many users."""
+    rng = random.Random(seed)
+    sectors = ["IT", "Pharma", "Banking", "Energy", "FMCG", "Auto"]
+    n_companies = max(1, n_rows // 20)
+
+    companies, cmp_map = [], {}
+    for c in range(n_companies):
+        name = f"Company {c} Ltd"
+        issue = rng.uniform(50, 1500)
+        companies.append({
+            "company_name": name,
+            "sector_name": rng.choice(sectors),
+            "issue_price": f"₹{issue * 0.95:,.0f}-{issue:,.0f}" if c % 3 == 0 else f"{issue:.2f}",
+            "listing_price": f"{issue * rng.uniform(0.95, 1.1):.2f}" if c % 5 else None,
+        })
+        cmp_map[name] = round(issue * rng.uniform(0.9, 1.18), 2)
+
+    ipos = [
+        dict(companies[rng.randrange(n_companies)], user_id=f"user-{i % n_users}")
+        for i in range(n_rows)
+    ]
+
+    rules = []
+    for u in range(n_users):
+        rules.append({"user_id": f"user-{u}", "type": "base", "gain_pct": 20.0, "loss_pct": -20.0})
+        rules.append({"user_id": f"user-{u}", "type": "sector", "sector_name": sectors[u % len(sectors)],
+                      "gain_pct": 15.0, "loss_pct": -15.0})
+    for c in range(0, n_companies, 37):
+        rules.append({"user_id": f"user-{c % n_users}", "type": "company",
+                      "company_name": f"Company {c} Ltd", "gain_pct": 5.0, "loss_pct": -5.0})
+    return ipos, rules, cmp_map
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def run(n_rows: int):
+    ipos, rules, cmp_map = make_portfolio(n_rows)
+
+    scalar, t_scalar = _time(_check_alerts_scalar, ipos, rules, cmp_map)
+    vector, t_vector = _time(check_alerts_vectorized, ipos, rules, cmp_map)
+
+    assert scalar == vector, "vectorized path diverged from scalar path"
+    print(
+        f"{n_rows:>8} rows | {len(scalar):>7} alerts | "
+        f"scalar {t_scalar * 1000:8.1f} ms | vectorized {t_vector * 1000:8.1f} ms | "
+        f"x{t_scalar / t_vector:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,104 @@
+"""
+Benchmark: BeautifulSoup/html.parser vs lxml extraction on saved pages.
+
+    python bench_parsers.py save <screener company URL> <groww IPO URL>
+    python bench_parsers.py [iterations]    (default: 50)
+
+The benchmark parses backend/fixtures/screener_company.html and
+groww_ipo.html with both extractors, checks they produce identical results,
+and prints per-page timings; test_fast_html.py runs the same identity check
+under pytest. The committed pages reproduce the live markup the extractors
+read (same ids, class names and nesting, realistic size); `save` replaces
+them with fresh captures, scrubbing per-session tokens so they can be
+committed.
+"""
+import os
+import re
+import sys
+import time
+import logging
+
+from scrapers import fast_html
+from scrapers.groww_scraper import _empty_ipo_result, _ipo_sections_soup, _map_ipo_sections
+from scrapers.screener_scraper import StockScraper
+
+logging.getLogger().setLevel(logging.ERROR)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SCREENER_PAGE = "screener_company.html"
+GROWW_PAGE = "groww_ipo.html"
+
+# Per-session values that must not be committed
+_SCRUB = [
+    (re.compile(rb'(name="csrfmiddlewaretoken"\s+value=")[^"]*'), rb"\1scrubbed"),
+    (re.compile(rb'(<meta name="csrf-token" content=")[^"]*'), rb"\1scrubbed"),
+]
+
+
+def save(screener_url: str, groww_url: str):
+    from scrapers.groww_scraper import get_session
+
+    os.makedirs(FIXTURES, exist_ok=True)
+    for name, get, url in (
+        (SCREENER_PAGE, StockScraper().session.get, screener_url),
+        (GROWW_PAGE, get_session().get, groww_url),
+    ):
+        resp = get(url, timeout=30)
+        resp.raise_for_status()
+        content = resp.content
+        for pattern, replacement in _SCRUB:
+            content = pattern.sub(replacement, content)
+        with open(os.path.join(FIXTURES, name), "wb") as f:
+            f.write(content)
+        print(f"Saved {url} -> fixtures/{name} ({len(content) / 1024:.1f} KiB)")
+
+
+def _load(name: str) -> bytes:
+    path = os.path.join(FIXTURES, name)
+    if not os.path.exists(path):
+        sys.exit(f"Missing fixtures/{name}; save real pages first: python bench_parsers.py save <url> <url>")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _per_call_ms(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def run(iterations: int):
+    scraper = StockScraper.__new__(StockScraper)  # parsing only, no session
+    cases = [
+        (SCREENER_PAGE,
+         lambda page: scraper._parse_page_soup(page),
+         lambda page: fast_html.screener_page(page)),
+        (GROWW_PAGE,
+         lambda page: _ipo_sections_soup(page),
+         lambda page: fast_html.groww_sections(page)),
+    ]
+    for name, soup_path, lxml_path in cases:
+        page = _load(name)
+        expected, actual = soup_path(page), lxml_path(page)
+        assert expected == actual, f"{name}: lxml extractor diverged\n{expected}\n{actual}"
+        if name == GROWW_PAGE:
+            mapped = [_map_ipo_sections(_empty_ipo_result(), *sections) for sections in (expected, actual)]
+            assert mapped[0] == mapped[1], f"{name}: mapped fields diverged"
+
+        t_soup = _per_call_ms(lambda: soup_path(page), iterations)
+        t_lxml = _per_call_ms(lambda: lxml_path(page), iterations)
+        print(
+            f"{name:<24} {len(page) / 1024:6.1f} KiB | html.parser {t_soup:7.2f} ms | "
+            f"lxml {t_lxml:6.2f} ms | x{t_soup / t_lxml:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["save"]:
+        if len(sys.argv) != 4:
+            sys.exit("usage: python bench_parsers.py save <screener company URL> <groww IPO URL>")
+        save(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    run(iterations)
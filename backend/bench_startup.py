@@ -0,0 +1,104 @@
+"""
+Benchmark: serverless cold start of the API.
+
+    python bench_startup.py [--runs N] [--path /api/health] [--baseline REF]
+
+Every run starts a fresh interpreter (as a Vercel cold start does), times
+`import main`, then times the first request to `--path` sent straight
+through the ASGI app. Also reports which heavy libraries the cold start
+pulled in. Medians are printed. With --baseline, the git ref (e.g. the
+commit before the lazy-import change) is checked out into a temporary
+worktree and measured the same way, for a before/after comparison.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import sys, time, json, asyncio
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def first_request(path):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1),
+             "server": ("bench", 80)}
+    status = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+    try:
+        await main.app(scope, receive, send)
+    except Exception:
+        pass  # e.g. no database configured; the 500 is still the first request
+    return status[0] if status else 500
+
+status = asyncio.run(first_request(sys.argv[1]))
+t2 = time.perf_counter()
+heavy = ["bs4", "numpy", "supabase", "requests", "httpx", "lxml"]
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t2 - t1) * 1000,
+    "status": status,
+    "loaded": [m for m in heavy if m in sys.modules],
+}))
+"""
+
+
+def run_once(path: str, backend_dir: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, path], capture_output=True, text=True, check=True, cwd=backend_dir,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(label: str, backend_dir: str, path: str, runs: int) -> float:
+    """Print the medians over `runs` cold starts of `backend_dir`; returns the total in ms."""
+    results = [run_once(path, backend_dir) for _ in range(runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    request_ms = statistics.median(r["first_request_ms"] for r in results)
+    print(
+        f"{label:<12} {path} (HTTP {results[0]['status']}) over {runs} cold starts | "
+        f"import main {import_ms:7.1f} ms | first request {request_ms:7.1f} ms | "
+        f"total {import_ms + request_ms:7.1f} ms"
+    )
+    print(f"{'':<12} heavy modules loaded: {', '.join(results[0]['loaded']) or 'none'}")
+    return import_ms + request_ms
+
+
+def measure_ref(ref: str, path: str, runs: int) -> float:
+    """Check `ref` out into a throwaway worktree and measure its backend."""
+    repo = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True, check=True, cwd=BACKEND,
+    ).stdout.strip()
+    backend = os.path.relpath(BACKEND, repo)
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = os.path.join(tmp, "tree")
+        subprocess.run(["git", "worktree", "add", "--detach", "--quiet", tree, ref], check=True, cwd=repo)
+        try:
+            return measure(ref, os.path.join(tree, backend), path, runs)
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", tree], check=True, cwd=repo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/health")
+    parser.add_argument("--baseline", help="git ref to measure for comparison (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    before = measure_ref(args.baseline, args.path, args.runs) if args.baseline else None
+    after = measure("current", BACKEND, args.path, args.runs)
+    if before is not None:
+        print(f"{'':<12} total {before:.1f} ms -> {after:.1f} ms ({(after - before) / before:+.0%})")
@@ -0,0 +1,56 @@
+"""
+Process-wide CMP access: the screener.in scraper and the price cache in
+front of it, shared by the API handlers and the job worker.
+
+Both are built on first use, so a cold start that never quotes a price
+doesn't import BeautifulSoup or build a scraper session.
+"""
+import threading
+
+_scraper = None
+_price_cache = None
+_lock = threading.Lock()
+
+
+def get_scraper():
+    """The shared StockScraper, constructed on first call."""
+    global _scraper
+    if _scraper is None:
+        with _lock:
+            if _scraper is None:
+                from scrapers.screener_scraper import StockScraper
+                _scraper = StockScraper()
+    return _scraper
+
+
+def get_price_cache():
+    """The shared PriceCache in front of get_scraper()."""
+    global _price_cache
+    if _price_cache is None:
+        scraper = get_scraper()
+        with _lock:
+            if _price_cache is None:
+                from price_cache import PriceCache
+                _price_cache = PriceCache(
+                    scraper.scrape_multiple_stocks, fetch_many_async=scraper.scrape_multiple_stocks_async
+                )
+    return _price_cache
+
+
+def fetch_cmp_map(company_names: list) -> dict:
+    """
+    Fetch CMPs keyed by the *stored* company name.
+
+    Duplicate names (several lots of one company) are scraped once, and the
+    price cache collapses names that normalize to the same key. Results are
+    matched back positionally, never by the name screener.in returns, so a
+    renamed listing can't silently drop its price.
+    """
+    unique_names = list(dict.fromkeys(company_names))
+    return dict(zip(unique_names, get_price_cache().get_many(unique_names)))
+
+
+async def fetch_cmp_map_async(company_names: list) -> dict:
+    """Async fetch_cmp_map() for the request path."""
+    unique_names = list(dict.fromkeys(company_names))
+    return dict(zip(unique_names, await get_price_cache().get_many_async(unique_names)))
@@ -0,0 +1,129 @@
+"""
+Shared CMP store: one `company_prices` row per normalized company name.
+
+The cron job (every alert batch) and the refresher (`cron_job.py
+--refresh-prices`) write it with one bulk upsert per batch. Read endpoints
+serve prices from it and only scrape screener.in live for companies whose
+row is older than PRICE_STALE_SECONDS (or missing). If that live scrape
+fails, the stale row is served rather than nothing. Unlike the in-process
+PriceCache, the table is shared by every serverless instance.
+
+Results have the same shape as PriceCache results (company_name, price,
+success, error, cached_at, age), plus high / low and `source`.
+"""
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+TABLE = "company_prices"
+STALE_AFTER = float(os.environ.get("PRICE_STALE_SECONDS", "900"))
+
+
+def _as_result(name: str, row: dict) -> dict:
+    fetched_at = datetime.fromisoformat(row["fetched_at"])
+    return {
+        "company_name": name,
+        "price": float(row["price"]),
+        "high": row.get("high"),
+        "low": row.get("low"),
+        "success": True,
+        "error": None,
+        "cached_at": fetched_at.isoformat(),
+        "age": round(time.time() - fetched_at.timestamp(), 1),
+        "source": row.get("source"),
+    }
+
+
+def load(db, company_names: List[str]) -> Dict[str, dict]:
+    """name -> stored result for every name that has a row (one query)."""
+    keys = {name: normalize_company_name(name) for name in company_names}
+    if not keys:
+        return {}
+    rows = (
+        db.table(TABLE)
+        .select("name_key, price, high, low, fetched_at, source")
+        .in_("name_key", list(set(keys.values())))
+        .execute()
+        .data
+    )
+    by_key = {row["name_key"]: row for row in rows}
+    return {name: _as_result(name, by_key[key]) for name, key in keys.items() if key in by_key}
+
+
+def store(db, results: Dict[str, dict], source: str) -> int:
+    """Bulk-upsert the successful results in `results` (name -> result); returns rows written."""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = {}
+    for name, result in results.items():
+        if result.get("success") and result.get("price"):
+            key = normalize_company_name(name)
+            rows[key] = {
+                "name_key": key,
+                "company_name": result.get("company_name") or name,
+                "price": result["price"],
+                "high": result.get("high"),
+                "low": result.get("low"),
+                "fetched_at": result.get("cached_at") or now,
+                "source": source,
+            }
+    if rows:
+        try:
+            db.table(TABLE).upsert(list(rows.values()), on_conflict="name_key").execute()
+        except Exception as e:
+            log.warning(f"Could not store {len(rows)} prices: {e}")
+            return 0
+    return len(rows)
+
+
+def read(db, company_names: List[str], stale_after: float = None) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Stored prices for `company_names`, split into (results, stale): results
+    holds every stored row (fresh or not); `stale` lists the names that need
+    a live fetch.
+    """
+    stale_after = STALE_AFTER if stale_after is None else stale_after
+    unique = list(dict.fromkeys(company_names))
+    stored = load(db, unique)
+    stale = [n for n in unique if n not in stored or stored[n]["age"] >= stale_after]
+    return stored, stale
+
+
+def merge_live(db, stored: Dict[str, dict], live: Dict[str, dict]) -> Dict[str, dict]:
+    """Store fresh live results and lay them over `stored`; failed ones keep the stored row."""
+    store(db, live, source="live")
+    merged = dict(stored)
+    for name, result in live.items():
+        if result.get("success") or name not in merged:
+            merged[name] = dict(result, source="live")
+        else:
+            log.warning(f"Live CMP fetch failed for {name}, serving stored price: {result.get('error')}")
+    return merged
+
+
+def fetch_cmp_map(db, company_names: List[str], fetch_live: Callable[[list], dict]) -> Dict[str, dict]:
+    """
+    Read-through fetch_cmp_map(): stored rows, live-fetching (and storing)
+    only the stale ones via `fetch_live` (names -> {name: result}).
+    """
+    stored, stale = read(db, company_names)
+    if not stale:
+        return stored
+    return merge_live(db, stored, fetch_live(stale))
+
+
+async def fetch_cmp_map_async(db, company_names: List[str],
+                              fetch_live: Callable[[list], Awaitable[dict]]) -> Dict[str, dict]:
+    """Async fetch_cmp_map(); database calls run in worker threads."""
+    import asyncio
+
+    stored, stale = await asyncio.to_thread(read, db, company_names)
+    if not stale:
+        return stored
+    live = await fetch_live(stale)
+    return await asyncio.to_thread(merge_live, db, stored, live)
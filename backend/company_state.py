@@ -0,0 +1,164 @@
+"""
+Per-company evaluation state for incremental cron runs.
+
+The `cron_company_state` table remembers, for each company, the CMP that was
+last run through the alert rules and when. On the next run an IPO is
+re-evaluated only if:
+  - its company's CMP moved by at least CRON_NOOP_PCT since that evaluation, or
+  - the IPO row, or any alert rule of its owner (or a global rule), was
+    created/updated after the last evaluation, or
+  - the rule set that applies to the company's IPOs differs from the one it
+    was last evaluated with (`rules_hash`; this catches deleted rules), or
+  - the company has never been evaluated.
+
+The stored CMP is only advanced when a company is re-evaluated because of a
+price move, so small moves accumulate across runs instead of being lost;
+a threshold crossing is delayed by at most the no-op window.
+
+save() takes the dispatch results: a company with an alert that failed to
+post is saved with no baseline CMP, so the next run re-evaluates it and the
+alert is retried (as AlertStateStore does for its bands).
+"""
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+TABLE = "cron_company_state"
+_IN_CHUNK = 200
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _rule_fingerprints(rules: list) -> dict:
+    """owner -> canonical JSON of that owner's rules (None for global rules)."""
+    by_owner: dict = {}
+    for rule in rules:
+        by_owner.setdefault(rule.get("user_id"), []).append([
+            rule.get("type"),
+            (rule.get("company_name") or "").strip().lower(),
+            (rule.get("sector_name") or "").strip().lower(),
+            float(rule["gain_pct"]), float(rule["loss_pct"]),
+        ])
+    return {owner: json.dumps(sorted(r)) for owner, r in by_owner.items()}
+
+
+def _ts(value) -> datetime:
+    if not value:
+        return _EPOCH
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+class CompanyStateTracker:
+    def __init__(self, db, noop_pct: Optional[float] = None):
+        self.db = db
+        self.noop_pct = noop_pct if noop_pct is not None else float(os.environ.get("CRON_NOOP_PCT", "0.5"))
+        self._states: dict = {}   # company_key -> row
+        self._updates: dict = {}  # company_key -> row to upsert
+        self.companies_unchanged = 0
+        self.ipos_skipped = 0
+
+    def load(self, company_names: list) -> None:
+        keys = list({normalize_company_name(n) for n in company_names})
+        for i in range(0, len(keys), _IN_CHUNK):
+            rows = (
+                self.db.table(TABLE)
+                .select("company_key, last_cmp, last_evaluated_at, rules_hash")
+                .in_("company_key", keys[i:i + _IN_CHUNK])
+                .execute()
+                .data
+            )
+            for row in rows:
+                self._states[row["company_key"]] = row
+
+    def _price_moved(self, key: str, cmp: float) -> bool:
+        state = self._states.get(key)
+        if state is None or state.get("last_cmp") is None:
+            return True
+        last = float(state["last_cmp"])
+        if last == 0:
+            return True
+        return abs(cmp - last) * 100 / last >= self.noop_pct
+
+    def select(self, ipos: list, rules: list, cmp_map: dict) -> list:
+        """Return the subset of `ipos` that needs rule evaluation this run."""
+        rules_changed_at: dict = {}
+        for rule in rules:
+            owner = rule.get("user_id")
+            changed = max(_ts(rule.get("updated_at")), _ts(rule.get("created_at")))
+            if changed > rules_changed_at.get(owner, _EPOCH):
+                rules_changed_at[owner] = changed
+
+        # Hash of the rules that can apply to each company's IPOs: the global
+        # rules plus those of every owner holding it
+        fingerprints = _rule_fingerprints(rules)
+        owners_by_key: dict = {}
+        for ipo in ipos:
+            owners_by_key.setdefault(normalize_company_name(ipo.get("company_name")), set()).add(ipo.get("user_id"))
+        rules_hash = {
+            key: hashlib.sha1(json.dumps(
+                [fingerprints.get(None)] + [[o, fingerprints.get(o)] for o in sorted(owners, key=str)]
+            ).encode()).hexdigest()
+            for key, owners in owners_by_key.items()
+        }
+
+        now = datetime.now(timezone.utc).isoformat()
+        moved_keys, unchanged_keys = set(), set()
+        selected = []
+        for ipo in ipos:
+            name = ipo.get("company_name")
+            cmp = cmp_map.get(name)
+            if cmp is None:
+                # Nothing to compare against; check_alerts logs and skips it
+                selected.append(ipo)
+                continue
+
+            key = normalize_company_name(name)
+            if self._price_moved(key, cmp):
+                moved_keys.add(key)
+                self._updates[key] = {
+                    "company_key": key, "last_cmp": cmp, "last_evaluated_at": now, "rules_hash": rules_hash[key],
+                }
+                selected.append(ipo)
+                continue
+
+            unchanged_keys.add(key)
+            last_evaluated = _ts(self._states[key].get("last_evaluated_at"))
+            changed_at = max(
+                _ts(ipo.get("updated_at")),
+                _ts(ipo.get("created_at")),
+                rules_changed_at.get(ipo.get("user_id"), _EPOCH),
+                rules_changed_at.get(None, _EPOCH),
+            )
+            if changed_at > last_evaluated or self._states[key].get("rules_hash") != rules_hash[key]:
+                # Keep the old baseline CMP so sub-window drift still accumulates
+                self._updates.setdefault(
+                    key, dict(self._states[key], last_evaluated_at=now, rules_hash=rules_hash[key])
+                )
+                selected.append(ipo)
+            else:
+                self.ipos_skipped += 1
+
+        self.companies_unchanged = len(unchanged_keys - moved_keys)
+        return selected
+
+    def save(self, deliveries: Optional[list] = None) -> None:
+        """
+        Persist this run's evaluations. Companies with an undelivered alert in
+        `deliveries` (dispatch_alerts() output) lose their baseline CMP so the
+        next run evaluates them again.
+        """
+        failed = {normalize_company_name(d["company_name"]) for d in deliveries or [] if not d["sent"]}
+        for key in failed & set(self._updates):
+            self._updates[key] = dict(self._updates[key], last_cmp=None, rules_hash=None)
+        if self._updates:
+            self.db.table(TABLE).upsert(list(self._updates.values()), on_conflict="company_key").execute()
+        self._updates = {}
+
+    def summary(self) -> dict:
+        return {"companies_unchanged": self.companies_unchanged, "ipos_skipped": self.ipos_skipped}
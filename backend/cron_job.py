@@ -1,64 +1,122 @@
 import os
 import logging
+import argparse
+from multiprocessing import Pool
+import company_prices
+import ipo_catalog
+import price_history
 from database import get_db
 from scrapers.screener_scraper import StockScraper
-from alert_engine import check_alerts
-from discord_notifier import send_discord_alert, send_cron_summary
+from scrapers import http_cache
+from alert_runner import run_alert_pass, run_alert_shard, default_run_id
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _cmp_fetcher(scraper: StockScraper):
+    def fetch_cmps(names: list) -> dict:
+        return dict(zip(names, scraper.scrape_multiple_stocks(names)))
+    return fetch_cmps
+
+
 def run_cron():
     """Main cron job entry point."""
     logger.info("Starting automated IPO alert check...")
     
     try:
         db = get_db()
-        
-        # 1. Fetch all IPOs from Supabase
-        logger.info("Fetching IPOs...")
-        ipo_resp = db.table("ipos").select("*").execute()
-        ipos = ipo_resp.data
-        if not ipos:
-            logger.info("No IPOs found in database. Exiting.")
-            return
-
-        # 2. Fetch all alert rules
-        logger.info("Fetching alert rules...")
-        rule_resp = db.table("alert_rules").select("*").execute()
-        rules = rule_resp.data
-
-        # 3. Fetch CMP for all companies using StockScraper (BeautifulSoup)
         scraper = StockScraper()
-        cmp_map = {}
-        unique_companies = list(set([ipo['company_name'] for ipo in ipos]))
-        
-        logger.info(f"Gathering CMP for {len(unique_companies)} companies...")
-        for name in unique_companies:
-            result = scraper.scrape_stock_price(name)
-            if result['success'] and result['price'] is not None:
-                cmp_map[name] = result['price']
-            else:
-                logger.warning(f"Could not fetch CMP for {name}: {result['error']}")
-
-        # 4. Check for triggered alerts
-        logger.info("Checking alert rules...")
-        triggered_alerts = check_alerts(ipos, rules, cmp_map)
-        
-        # 5. Send alerts to Discord
-        alerts_sent = 0
-        for alert in triggered_alerts:
-            success = send_discord_alert(alert)
-            if success:
-                alerts_sent += 1
-
-        # 6. Send summary
-        send_cron_summary(len(unique_companies), alerts_sent)
-        logger.info(f"Cron check complete. Checked {len(unique_companies)} stocks, sent {alerts_sent} alerts.")
 
+        # Checks every IPO (watchlist included), not just portfolio holdings
+        summary = run_alert_pass(db, _cmp_fetcher(scraper), portfolio_only=False)
+        logger.info(f"Resolution cache: {scraper.resolutions.stats()}")
+        logger.info(f"HTTP cache: {http_cache.stats()}")
+        logger.info(f"Cron check complete: {summary}")
+        price_history.snapshot_day(db)
+
+    except Exception as e:
+        logger.error(f"FATAL ERROR in cron job: {e}")
+
+
+def _run_shard(args) -> dict:
+    shard, shard_count, run_id = args
+    # Each process has its own token bucket; split the host budget between them
+    scraper = StockScraper(
+        rate_per_sec=StockScraper.RATE_PER_SEC / shard_count,
+        rate_burst=max(1.0, StockScraper.RATE_BURST / shard_count),
+    )
+    summary = run_alert_shard(
+        get_db(), _cmp_fetcher(scraper),
+        shard=shard, shard_count=shard_count, run_id=run_id,
+        portfolio_only=False, time_budget=float("inf"),
+    )
+    logger.info(f"Shard {shard + 1}/{shard_count} done: {summary}")
+    return summary
+
+
+def run_cron_sharded(processes: int, run_id: str = None):
+    """Run the check as `processes` resumable shards in a local process pool."""
+    run_id = run_id or f"local-{default_run_id()}"
+    logger.info(f"Starting sharded IPO alert check ({processes} processes, run {run_id})...")
+    try:
+        with Pool(processes) as pool:
+            summaries = pool.map(_run_shard, [(i, processes, run_id) for i in range(processes)])
+        sent = sum(s.get("alerts_sent", 0) for s in summaries)
+        logger.info(f"Cron check complete across {processes} shards, sent {sent} alerts.")
+        price_history.snapshot_day(get_db())
     except Exception as e:
         logger.error(f"FATAL ERROR in cron job: {e}")
 
+
+def refresh_prices(batch_size: int = None):
+    """
+    Re-scrape every tracked company whose stored price is stale, one bulk
+    upsert per batch, then update today's history snapshot.
+    """
+    batch_size = batch_size or int(os.environ.get("CRON_BATCH_SIZE", "50"))
+    logger.info("Refreshing company_prices...")
+    try:
+        db = get_db()
+        scraper = StockScraper()
+        names = list(dict.fromkeys(row["company_name"] for row in db.table("ipos").select("company_name").execute().data))
+        _, stale = company_prices.read(db, names)
+        written = 0
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            written += company_prices.store(db, _cmp_fetcher(scraper)(batch), source="refresher")
+        logger.info(f"Price refresh complete: {written}/{len(stale)} stale of {len(names)} companies updated")
+        price_history.snapshot_day(db)
+    except Exception as e:
+        logger.error(f"FATAL ERROR in price refresh: {e}")
+
+
+def refresh_catalog():
+    """Refresh the shared ipo_catalog that user auto-fetches read from."""
+    logger.info("Refreshing ipo_catalog...")
+    try:
+        ipo_catalog.refresh_catalog(get_db())
+    except Exception as e:
+        logger.error(f"FATAL ERROR in catalog refresh: {e}")
+
+
 if __name__ == "__main__":
-    run_cron()
+    parser = argparse.ArgumentParser(description="Check IPO alert rules and notify Discord.")
+    parser.add_argument("--processes", type=int, default=int(os.environ.get("CRON_PROCESSES", "1")),
+                        help="split the run into this many resumable shards, one per process")
+    parser.add_argument("--run-id", help="checkpoint id to resume (sharded mode only)")
+    parser.add_argument("--refresh-prices", action="store_true",
+                        help="only refresh stale rows in company_prices; no alert check")
+    parser.add_argument("--refresh-catalog", action="store_true",
+                        help="only refresh the shared closed-IPO catalog; no alert check")
+    args = parser.parse_args()
+
+    if args.refresh_prices:
+        refresh_prices()
+    elif args.refresh_catalog:
+        refresh_catalog()
+    elif args.processes > 1:
+        run_cron_sharded(args.processes, args.run_id)
+    else:
+        run_cron()
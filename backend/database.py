@@ -2,22 +2,39 @@
 Supabase client initialization.
 Uses SUPABASE_URL and SUPABASE_SERVICE_KEY env vars.
 Service key bypasses Row Level Security — safe for server-side use only.
+
+supabase-py is imported on first use: it is the single heaviest import in
+the app, and routes that never touch the database shouldn't pay for it.
 """
 import os
+import threading
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Load variables from backend/.env into os.environ
 load_dotenv()
 
-_client: Client | None = None
+_client: "Client | None" = None
+_lock = threading.Lock()
 
 
-def get_db() -> Client:
+def get_db() -> "Client":
     """Return the Supabase client, initializing once."""
     global _client
     if _client is not None:
         return _client
+    with _lock:
+        if _client is None:
+            _client = _create()
+    return _client
+
+
+def _create() -> "Client":
+    from supabase import create_client
 
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_KEY")
@@ -28,5 +45,4 @@ def get_db() -> Client:
             "Find them in your Supabase project: Settings → API."
         )
 
-    _client = create_client(url, key)
-    return _client
+    return create_client(url, key)
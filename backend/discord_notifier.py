@@ -2,29 +2,35 @@
 Discord webhook notifier — sends rich embed alert messages.
 """
 import os
-import requests
+import time
+import random
+import asyncio
 import logging
 from typing import Optional
 
+import httpx
+import requests
+
 log = logging.getLogger(__name__)
 
+BOT_USERNAME = "IPO Tracker Bot"
+BOT_AVATAR_URL = "https://cdn-icons-png.flaticon.com/512/2830/2830284.png"
 
-def send_discord_alert(alert: dict) -> bool:
+# Discord limits: 10 embeds and 6000 embed characters per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_ATTEMPTS = 5
+DISPATCH_CONCURRENCY = int(os.environ.get("DISCORD_CONCURRENCY", "2"))
+
+
+def build_alert_embed(alert: dict) -> dict:
     """
-    Send a Discord embed message for a triggered alert.
+    Build the Discord embed for a triggered alert.
 
     Args:
         alert: dict with keys: company_name, sector, cmp, issue_price,
                listing_price, pct_vs_issue, pct_vs_listing, reasons
-
-    Returns:
-        True if sent successfully, False otherwise.
     """
-    webhook_url = os.environ.get("DISCORD_WEBHOOK_URL")
-    if not webhook_url:
-        log.error("DISCORD_WEBHOOK_URL not set — cannot send alert")
-        return False
-
     company = alert["company_name"]
     cmp = alert["cmp"]
     pct_issue = alert.get("pct_vs_issue")
@@ -62,17 +68,35 @@ def send_discord_alert(alert: dict) -> bool:
     if reason_text:
         fields.append({"name": "⚠️ Alert Reasons", "value": reason_text, "inline": False})
 
+    return {
+        "title": f"🚨 IPO Alert — {company}",
+        "color": color,
+        "fields": fields,
+        "footer": {"text": "IPO Tracker | Powered by Screener.in"},
+    }
+
+
+def send_discord_alert(alert: dict) -> bool:
+    """
+    Send a Discord embed message for a triggered alert.
+
+    Args:
+        alert: dict with keys: company_name, sector, cmp, issue_price,
+               listing_price, pct_vs_issue, pct_vs_listing, reasons
+
+    Returns:
+        True if sent successfully, False otherwise.
+    """
+    webhook_url = os.environ.get("DISCORD_WEBHOOK_URL")
+    if not webhook_url:
+        log.error("DISCORD_WEBHOOK_URL not set — cannot send alert")
+        return False
+
+    company = alert["company_name"]
     payload = {
-        "username": "IPO Tracker Bot",
-        "avatar_url": "https://cdn-icons-png.flaticon.com/512/2830/2830284.png",
-        "embeds": [
-            {
-                "title": f"🚨 IPO Alert — {company}",
-                "color": color,
-                "fields": fields,
-                "footer": {"text": "IPO Tracker | Powered by Screener.in"},
-            }
-        ],
+        "username": BOT_USERNAME,
+        "avatar_url": BOT_AVATAR_URL,
+        "embeds": [build_alert_embed(alert)],
     }
 
     try:
@@ -85,18 +109,199 @@ def send_discord_alert(alert: dict) -> bool:
         return False
 
 
-def send_cron_summary(total_checked: int, alerts_sent: int) -> None:
-    """Send a summary message after cron job runs."""
+# ═══════════════════════════════════════════════════════════
+# Batched async dispatch
+# ═══════════════════════════════════════════════════════════
+
+def _embed_chars(embed: dict) -> int:
+    """Characters Discord counts towards the 6000-per-message embed limit."""
+    total = len(embed.get("title", "")) + len(embed.get("footer", {}).get("text", ""))
+    for field in embed.get("fields", []):
+        total += len(field["name"]) + len(field["value"])
+    return total
+
+
+def _batches(embeds: list) -> list:
+    """Group embed indices into messages of at most 10 embeds / 6000 chars."""
+    batches, current, chars = [], [], 0
+    for i, embed in enumerate(embeds):
+        size = _embed_chars(embed)
+        if current and (len(current) == MAX_EMBEDS_PER_MESSAGE or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(i)
+        chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _WebhookBucket:
+    """Pauses all senders while Discord says the webhook's bucket is empty."""
+
+    def __init__(self):
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def block_for(self, seconds: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def update(self, headers) -> None:
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if reset_after:
+                self.block_for(float(reset_after))
+
+
+def _retry_after(resp: httpx.Response) -> float:
+    try:
+        return float(resp.json().get("retry_after"))
+    except Exception:
+        return float(resp.headers.get("Retry-After", 1))
+
+
+def _backoff(attempt: int) -> float:
+    return min(30.0, 0.5 * 2 ** attempt) + random.uniform(0, 0.25)
+
+
+async def _post_batch(client: httpx.AsyncClient, webhook_url: str, payload: dict, bucket: _WebhookBucket):
+    """POST one message with retries. Returns (sent, http_status, error)."""
+    status, error = None, None
+    for attempt in range(MAX_ATTEMPTS):
+        await bucket.wait()
+        try:
+            resp = await client.post(webhook_url, json=payload)
+        except httpx.TransportError as e:
+            error = f"Transport error: {e}"
+            await asyncio.sleep(_backoff(attempt))
+            continue
+
+        status = resp.status_code
+        bucket.update(resp.headers)
+        if status == 429:
+            wait = _retry_after(resp)
+            log.warning(f"Discord rate limited, retrying in {wait:.2f}s")
+            bucket.block_for(wait)
+            error = "Rate limited by Discord"
+            continue
+        if status >= 500:
+            error = f"HTTP {status} from Discord"
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        if resp.is_success:
+            return True, status, None
+        # Other 4xx (bad payload, deleted webhook) will not succeed on retry
+        return False, status, f"HTTP {status}: {resp.text[:200]}"
+    return False, status, error
+
+
+async def dispatch_alerts_async(alerts: list, webhook_url: Optional[str] = None,
+                                client: Optional[httpx.AsyncClient] = None) -> list:
+    """
+    Deliver alerts as batched embeds over a pooled HTTP client.
+
+    Up to 10 embeds are packed per webhook message, messages go out
+    concurrently (DISCORD_CONCURRENCY at a time), 429s honour retry_after and
+    the X-RateLimit-* bucket headers, and 5xx/transport errors back off
+    exponentially.
+
+    Returns:
+        one status dict per alert, in input order:
+        {company_name, sent, status, error}
+    """
+    webhook_url = webhook_url or os.environ.get("DISCORD_WEBHOOK_URL")
+    if not webhook_url:
+        log.error("DISCORD_WEBHOOK_URL not set — cannot send alerts")
+        return [
+            {"company_name": a["company_name"], "sent": False, "status": None, "error": "Webhook not configured"}
+            for a in alerts
+        ]
+    if not alerts:
+        return []
+
+    embeds = [build_alert_embed(a) for a in alerts]
+    bucket = _WebhookBucket()
+    semaphore = asyncio.Semaphore(DISPATCH_CONCURRENCY)
+    statuses = [None] * len(alerts)
+
+    async def send(client: httpx.AsyncClient, indices: list) -> None:
+        payload = {
+            "username": BOT_USERNAME,
+            "avatar_url": BOT_AVATAR_URL,
+            "embeds": [embeds[i] for i in indices],
+        }
+        async with semaphore:
+            sent, status, error = await _post_batch(client, webhook_url, payload, bucket)
+        for i in indices:
+            statuses[i] = {"company_name": alerts[i]["company_name"], "sent": sent, "status": status, "error": error}
+
+    async def run(client: httpx.AsyncClient) -> None:
+        await asyncio.gather(*(send(client, batch) for batch in _batches(embeds)))
+
+    if client is not None:
+        await run(client)
+    else:
+        async with httpx.AsyncClient(timeout=10) as own_client:
+            await run(own_client)
+
+    failed = [s for s in statuses if not s["sent"]]
+    log.info(f"Discord dispatch: {len(alerts) - len(failed)} sent, {len(failed)} failed")
+    for s in failed:
+        log.error(f"Failed to send Discord alert for {s['company_name']}: {s['error']}")
+    return statuses
+
+
+async def send_discord_alert_async(alert: dict, client: Optional[httpx.AsyncClient] = None) -> bool:
+    """
+    Async send_discord_alert(), with the same 429/5xx handling as batched
+    dispatch. Defaults to the app's shared client (http_client.py).
+    """
+    if client is None:
+        from http_client import get_client
+        client = get_client()
+    statuses = await dispatch_alerts_async([alert], client=client)
+    return bool(statuses) and statuses[0]["sent"]
+
+
+def dispatch_alerts(alerts: list, webhook_url: Optional[str] = None) -> list:
+    """Blocking wrapper around dispatch_alerts_async() for sync callers."""
+    return asyncio.run(dispatch_alerts_async(alerts, webhook_url))
+
+
+def _circuit_lines(circuits: Optional[dict]) -> str:
+    """One line per scraped host that tripped its circuit breaker or got throttled."""
+    lines = []
+    for host, state in (circuits or {}).items():
+        if state.get("trips") or state.get("penalties") or state.get("state") != "closed":
+            lines.append(
+                f"\n• ⚠️ {host}: circuit **{state['state']}**, tripped {state.get('trips', 0)}x, "
+                f"{state.get('rejected', 0)} requests skipped, "
+                f"rate {state.get('rate', '?')}/{state.get('base_rate', '?')} req/s"
+            )
+    return "".join(lines)
+
+
+def send_cron_summary(total_checked: int, alerts_sent: int, title: Optional[str] = None,
+                      circuits: Optional[dict] = None) -> None:
+    """
+    Send a summary message after cron job runs (or after one shard of it).
+    `circuits` is circuit_breaker.states(); unhealthy hosts get a line each.
+    """
     webhook_url = os.environ.get("DISCORD_WEBHOOK_URL")
     if not webhook_url:
         return
 
     payload = {
-        "username": "IPO Tracker Bot",
+        "username": BOT_USERNAME,
         "content": (
-            f"✅ **Daily Alert Check Complete**\n"
+            f"✅ **{title or 'Daily Alert Check Complete'}**\n"
             f"• Stocks checked: **{total_checked}**\n"
             f"• Alerts triggered: **{alerts_sent}**"
+            + _circuit_lines(circuits)
         ),
     }
     try:
@@ -0,0 +1,51 @@
+"""
+Server-side downsampling for the /api/history time series.
+
+- lttb(): Largest-Triangle-Three-Buckets — keeps the points that preserve
+  the visual shape of a line chart (peaks, troughs, trend changes).
+- ohlc(): equal-width day buckets summarised as open / high / low / close.
+
+Both take x as epoch days (ints) and y as floats, and return at most the
+requested number of points, so a chart over years of daily rows stays a
+few KB regardless of range.
+"""
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points LTTB keeps (always first and last)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the interior points 1..n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        nlo, nhi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def ohlc(x: np.ndarray, y: np.ndarray, buckets: int) -> list:
+    """[(first_x, open, high, low, close)] over `buckets` equal-width ranges of x."""
+    if len(x) == 0:
+        return []
+    span = max(1, int(x[-1] - x[0]) + 1)
+    width = max(1, -(-span // buckets))  # ceil
+    ids = ((x - x[0]) // width).astype(int)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(x)]
+    highs = np.maximum.reduceat(y, starts)
+    lows = np.minimum.reduceat(y, starts)
+    return [
+        (int(x[s]), float(y[s]), float(h), float(lo), float(y[e - 1]))
+        for s, e, h, lo in zip(starts, ends, highs, lows)
+    ]
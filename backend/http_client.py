@@ -0,0 +1,73 @@
+"""
+Process-wide async HTTP client for the request path.
+
+One httpx.AsyncClient (HTTP/2 where the server negotiates it, bounded
+connection pool) is shared by the async scraper and notifier variants and
+closed by the FastAPI lifespan, so concurrent scrapes multiplex over a few
+pooled connections instead of each holding a worker thread and socket.
+
+The client is bound to the event loop that opened it. Code running under
+its own `asyncio.run()` (cron_job, the job worker) should keep passing its
+own client rather than borrowing this one.
+
+Nothing is opened at startup: the first async fetch opens the client, so
+cold starts serving plain database routes skip httpx entirely.
+"""
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+log = logging.getLogger(__name__)
+
+HTTP2 = os.environ.get("HTTP_CLIENT_HTTP2", "true").lower() in ("1", "true", "yes")
+MAX_CONNECTIONS = int(os.environ.get("HTTP_CLIENT_MAX_CONNECTIONS", "50"))
+MAX_KEEPALIVE = int(os.environ.get("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+TIMEOUT = float(os.environ.get("HTTP_CLIENT_TIMEOUT", "20"))
+
+_client: Optional["httpx.AsyncClient"] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def build_client() -> "httpx.AsyncClient":
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+        timeout=httpx.Timeout(TIMEOUT, connect=10),
+        follow_redirects=True,
+    )
+
+
+def get_client() -> "httpx.AsyncClient":
+    """Return the shared client, opening it on first use."""
+    global _client, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None:
+        _client, _loop = build_client(), loop
+        log.info(f"Opened shared HTTP client (http2={HTTP2}, max_connections={MAX_CONNECTIONS})")
+    elif _loop is not loop:
+        raise RuntimeError("The shared HTTP client belongs to another event loop; pass a client explicitly")
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _loop
+    if _client is not None:
+        await _client.aclose()
+        log.info("Closed shared HTTP client")
+    _client, _loop = None, None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """FastAPI lifespan: close the shared client (if one was opened) at shutdown."""
+    try:
+        yield
+    finally:
+        await close_client()
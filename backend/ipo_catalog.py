@@ -0,0 +1,97 @@
+"""
+Global closed-IPO catalog: one `ipo_catalog` row per Groww search_id.
+
+`refresh_catalog()` runs on a schedule (cron_job.py --refresh-catalog). It
+scrapes groww.in/ipo/closed once for everybody, then re-scrapes only the
+detail pages whose list entry is new or changed since its details were last
+fetched. Each row keeps a hash of its list entry (`list_hash`) and the hash
+its details were scraped for (`detail_hash`); a failed detail scrape leaves
+detail_hash unset so the next refresh retries it.
+
+User auto-fetches stage rows from the catalog with the stage_catalog_ipos
+RPC (see auto_fetch.py) and never scrape.
+"""
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from pagination import fetch_all
+from scrapers.groww_scraper import scrape_groww_ipo, scrape_closed_ipos
+
+log = logging.getLogger(__name__)
+
+TABLE = "ipo_catalog"
+MAX_WORKERS = int(os.environ.get("GROWW_MAX_WORKERS", "8"))
+ITEM_TIMEOUT = float(os.environ.get("GROWW_ITEM_TIMEOUT", "15"))
+UPSERT_CHUNK = 200
+
+ENRICH_FIELDS = [
+    "listed_on", "issue_price", "listing_price", "issue_size",
+    "qib_subscription", "nii_subscription", "rii_subscription", "total_subscription",
+]
+
+# Columns shared with pending_ipo_additions
+ENTRY_COLUMNS = ["company_name", "search_id", "groww_link", *ENRICH_FIELDS]
+
+
+def list_hash(item: dict) -> str:
+    """Fingerprint of a closed-IPO list entry; a change means its details may have too."""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _enrich(item: dict) -> tuple:
+    """(item with detail-page fields merged in, success); on failure keep the list data."""
+    details = scrape_groww_ipo(item["groww_link"], timeout=ITEM_TIMEOUT)
+    # scrape_groww_ipo reports success even when it failed (the manual
+    # correction UI relies on that); the error field is what tells them apart
+    ok = bool(details.get("success") and not details.get("error"))
+    if ok:
+        for field in ENRICH_FIELDS:
+            if details.get(field):
+                item[field] = details[field]
+    return item, ok
+
+
+def refresh_catalog(db) -> dict:
+    """Scrape the closed-IPO list, re-scrape changed detail pages, upsert; returns counters."""
+    listing = scrape_closed_ipos()
+    if not listing:
+        return {"listed": 0, "changed": 0, "enriched": 0, "failed": 0}
+
+    known = {
+        row["search_id"]: row["detail_hash"]
+        for row in fetch_all(lambda: db.table(TABLE).select("search_id, detail_hash").order("search_id"))
+    }
+    by_id = {item["search_id"]: item for item in listing if item.get("search_id")}
+    changed = [
+        (item, digest) for item, digest in ((item, list_hash(item)) for item in by_id.values())
+        if known.get(item["search_id"]) != digest
+    ]
+    log.info(f"IPO catalog: {len(by_id)} listed, {len(changed)} new or changed")
+
+    now = datetime.now(timezone.utc).isoformat()
+    rows, failed = [], 0
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(changed)))) as pool:
+        futures = {pool.submit(_enrich, dict(item)): digest for item, digest in changed}
+        for future in as_completed(futures):
+            item, ok = future.result()
+            failed += not ok
+            rows.append({
+                **{column: item.get(column) for column in ENTRY_COLUMNS},
+                "is_sme": bool(item.get("is_sme")),
+                "overall_subscription": item.get("overall_subscription"),
+                "list_hash": futures[future],
+                "detail_hash": futures[future] if ok else None,
+                "enriched_at": now if ok else None,
+                "updated_at": now,
+            })
+
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        db.table(TABLE).upsert(rows[start:start + UPSERT_CHUNK], on_conflict="search_id").execute()
+    summary = {"listed": len(by_id), "changed": len(changed), "enriched": len(rows) - failed, "failed": failed}
+    log.info(f"IPO catalog refresh: {summary}")
+    return summary
+
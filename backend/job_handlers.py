@@ -0,0 +1,48 @@
+"""
+Job kinds understood by the queue (see jobs.py). Importing this module
+registers them; both main.py and worker.py do so.
+"""
+from jobs import handler, update_job
+
+
+@handler("auto_fetch")
+def auto_fetch(db, job: dict) -> dict:
+    from auto_fetch import run_auto_fetch
+
+    return run_auto_fetch(
+        db, job["user_id"],
+        on_progress=lambda **progress: update_job(db, job["id"], **progress),
+    )
+
+
+@handler("groww_scrape")
+def groww_scrape(db, job: dict) -> dict:
+    from scrapers.groww_scraper import scrape_groww_ipo
+
+    return scrape_groww_ipo(job["params"]["url"])
+
+
+@handler("cmp")
+def cmp(db, job: dict) -> dict:
+    from cmp_service import get_price_cache
+
+    names = job["params"]["company_names"]
+    update_job(db, job["id"], total=len(names))
+    return {"results": get_price_cache().get_many(names)}
+
+
+@handler("alert_check")
+def alert_check(db, job: dict) -> dict:
+    from alert_runner import run_alert_shard
+    from cmp_service import fetch_cmp_map
+
+    params = job["params"]
+    return run_alert_shard(
+        db, fetch_cmp_map,
+        shard=params.get("shard", 0),
+        shard_count=params.get("shards", 1),
+        cursor=params.get("cursor"),
+        run_id=params.get("run_id"),
+        portfolio_only=True,
+        incremental=params.get("incremental"),
+    )
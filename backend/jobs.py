@@ -0,0 +1,171 @@
+"""
+Background job queue for long-running scrapes.
+
+Jobs live in the `scrape_jobs` table. Submitting one returns immediately
+with a job id; the work is done either
+
+  - inline:   as a FastAPI background task in the same process
+              (JOB_WORKER_MODE=inline, the default — works on serverless), or
+  - external: by `python worker.py`, which claims queued jobs through the
+              claim_scrape_job() SQL function (FOR UPDATE SKIP LOCKED).
+
+Identical in-flight jobs (same kind, params and user) are deduplicated:
+submitting again returns the job that is already queued or running.
+
+Stale jobs are failed, never re-run. A job is stale when its updated_at
+(set on insert, on claim and on every progress update) is older than
+JOB_STALE_AFTER seconds: its process was killed mid-job, or, in inline
+mode, the background task that should have claimed it was lost. Running
+jobs are checked by claim_scrape_job() on every worker poll and by
+enqueue() before deduplicating onto them; queued jobs only in inline mode,
+since in external mode they may simply be waiting for a free worker.
+Clients poll GET /api/jobs/{job_id} and fetch GET /api/jobs/{job_id}/result.
+"""
+import os
+import json
+import socket
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+TABLE = "scrape_jobs"
+IN_FLIGHT = ("queued", "running")
+STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", "900"))
+
+# kind -> handler(db, job) -> result dict
+HANDLERS: dict = {}
+
+
+def handler(kind: str) -> Callable:
+    """Register the function that executes jobs of `kind`."""
+    def register(fn: Callable) -> Callable:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def worker_mode() -> str:
+    return os.environ.get("JOB_WORKER_MODE", "inline")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def dedup_key(kind: str, params: dict, user_id: Optional[str]) -> str:
+    blob = json.dumps({"kind": kind, "params": params, "user": user_id}, sort_keys=True, default=str)
+    return f"{kind}:{hashlib.sha1(blob.encode()).hexdigest()}"
+
+
+def _fail_if_stale(db, job: dict) -> bool:
+    """Mark an in-flight job failed if it is stale (see module docstring); True if it was."""
+    if job["status"] == "queued" and worker_mode() != "inline":
+        return False
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=STALE_AFTER)).isoformat()
+    resp = (
+        db.table(TABLE)
+        .update({"status": "failed", "error": "Job abandoned (no progress)", "updated_at": _now()})
+        .eq("id", job["id"])
+        .eq("status", job["status"])
+        .lt("updated_at", cutoff)
+        .execute()
+    )
+    if resp.data:
+        log.warning(f"Job {job['id']} ({job['kind']}) went stale, marked failed")
+    return bool(resp.data)
+
+
+def _find_in_flight(db, key: str) -> Optional[dict]:
+    resp = db.table(TABLE).select("*").eq("dedup_key", key).in_("status", list(IN_FLIGHT)).limit(1).execute()
+    if not resp.data or _fail_if_stale(db, resp.data[0]):
+        return None
+    return resp.data[0]
+
+
+def enqueue(db, kind: str, params: Optional[dict] = None, user_id: Optional[str] = None) -> tuple:
+    """
+    Queue a job, or return the identical one already in flight.
+    Returns (job_row, created).
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    params = params or {}
+    key = dedup_key(kind, params, user_id)
+
+    existing = _find_in_flight(db, key)
+    if existing:
+        return existing, False
+    try:
+        resp = db.table(TABLE).insert({
+            "user_id": user_id,
+            "kind": kind,
+            "params": params,
+            "dedup_key": key,
+            "status": "queued",
+            "created_at": _now(),
+            "updated_at": _now(),
+        }).execute()
+        return resp.data[0], True
+    except Exception:
+        # Lost a race against an identical submit (unique in-flight index)
+        existing = _find_in_flight(db, key)
+        if existing:
+            return existing, False
+        raise
+
+
+def update_job(db, job_id: str, **fields) -> None:
+    fields["updated_at"] = _now()
+    db.table(TABLE).update(fields).eq("id", job_id).execute()
+
+
+def get_job(db, job_id: str, user_id: Optional[str]) -> Optional[dict]:
+    query = db.table(TABLE).select("*").eq("id", job_id)
+    query = query.eq("user_id", user_id) if user_id else query.is_("user_id", "null")
+    resp = query.execute()
+    return resp.data[0] if resp.data else None
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(db, job_id: str) -> Optional[dict]:
+    """Take a specific queued job (inline mode). None if someone else has it."""
+    resp = (
+        db.table(TABLE)
+        .update({"status": "running", "locked_by": _worker_id(), "locked_at": _now(), "updated_at": _now()})
+        .eq("id", job_id)
+        .eq("status", "queued")
+        .execute()
+    )
+    return resp.data[0] if resp.data else None
+
+
+def claim_next(db) -> Optional[dict]:
+    """Take the oldest queued job (external worker); fails stale running jobs first."""
+    resp = db.rpc("claim_scrape_job", {"p_worker": _worker_id(), "p_stale_seconds": STALE_AFTER}).execute()
+    return resp.data[0] if resp.data else None
+
+
+def run_job(db, job: dict) -> None:
+    """Execute a claimed job and record its outcome."""
+    try:
+        result = HANDLERS[job["kind"]](db, job)
+        update_job(db, job["id"], status="done", result=result)
+    except Exception as e:
+        log.error(f"Job {job['id']} ({job['kind']}) failed: {e}", exc_info=True)
+        update_job(db, job["id"], status="failed", error=str(e))
+
+
+def run_inline(job_id: str) -> None:
+    """Background-task entry point for inline mode."""
+    from database import get_db
+
+    db = get_db()
+    job = claim(db, job_id)
+    if job is not None:
+        run_job(db, job)
@@ -5,24 +5,30 @@ All IPO and alert_rule endpoints require an x-user-id header and scope
 data to that user. Sectors are shared / global.
 """
 import os
+import sys
 import logging
-from typing import Optional
-from datetime import datetime, timezone
+from typing import List, Literal, Optional
+from datetime import date, datetime, timezone
 
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, BackgroundTasks, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from database import get_db
-from scrapers.groww_scraper import scrape_groww_ipo, scrape_closed_ipos
-from scrapers.screener_scraper import StockScraper
-from alert_engine import check_alerts, calculate_pct
-from discord_notifier import send_discord_alert, send_cron_summary
+from http_client import lifespan
+from jobs import enqueue, get_job, run_inline, worker_mode
+from pagination import MAX_LIMIT, NEXT_CURSOR_HEADER, keyset_page, select_columns, split_page
+import job_handlers  # noqa: F401 — registers job kinds
+
+# Scrapers, numpy and the alert engine are imported inside the routes that
+# use them, so a serverless cold start only loads what its route needs
+# (see bench_startup.py).
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
-app = FastAPI(title="IPO Tracker API", version="1.0.0")
+app = FastAPI(title="IPO Tracker API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,10 +36,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-scraper = StockScraper()
-
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -46,6 +51,44 @@ def require_user(x_user_id: Optional[str]) -> str:
     return x_user_id
 
 
+# Columns a client may request through `fields=` on each list endpoint
+IPO_FIELDS = frozenset({
+    "id", "user_id", "company_name", "sector_id", "sector_name", "portfolio", "no_of_shares", "buy_price",
+    "groww_link", "listed_on", "issue_price", "listing_price", "issue_size", "qib_subscription",
+    "nii_subscription", "rii_subscription", "total_subscription", "created_at", "updated_at",
+})
+PENDING_IPO_FIELDS = frozenset({
+    "id", "user_id", "company_name", "search_id", "groww_link", "listed_on", "issue_price", "listing_price",
+    "issue_size", "qib_subscription", "nii_subscription", "rii_subscription", "total_subscription", "created_at",
+})
+THROWOUT_IPO_FIELDS = frozenset({"id", "user_id", "company_name", "search_id", "created_at"})
+ALERT_RULE_FIELDS = frozenset({
+    "id", "user_id", "type", "sector_id", "sector_name", "company_name", "gain_pct", "loss_pct",
+    "created_at", "updated_at",
+})
+
+
+def list_page(response: Response, table: str, user_id: str, allowed: frozenset,
+              fields: Optional[str], cursor: Optional[str], limit: Optional[int],
+              descending: bool = True, **filters) -> list:
+    """
+    One keyset page of a user's rows (see pagination.py). The cursor for the
+    next page, if any, is returned in the X-Next-Cursor header.
+    """
+    try:
+        columns = select_columns(fields, allowed)
+        query = get_db().table(table).select(columns).eq("user_id", user_id)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        rows = keyset_page(query, cursor, limit, descending).execute().data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page, next_cursor = split_page(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return page
+
+
 # ═══════════════════════════════════════════════════════════
 # Pydantic Models
 # ═══════════════════════════════════════════════════════════
@@ -133,7 +176,15 @@ class ThrowoutIpoCreate(BaseModel):
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok", "timestamp": now_iso()}
+    # Reported only once a scraper has loaded them, so the check stays cheap
+    http_cache = sys.modules.get("scrapers.http_cache")
+    circuit_breaker = sys.modules.get("scrapers.circuit_breaker")
+    return {
+        "status": "ok",
+        "timestamp": now_iso(),
+        "http_cache": http_cache.stats() if http_cache else None,
+        "circuits": circuit_breaker.states() if circuit_breaker else None,
+    }
 
 
 # ═══════════════════════════════════════════════════════════
@@ -170,14 +221,12 @@ def delete_sector(sector_id: str):
 # ═══════════════════════════════════════════════════════════
 
 @app.get("/api/ipos")
-def list_ipos(portfolio_only: bool = False, x_user_id: Optional[str] = Header(None)):
+def list_ipos(response: Response, portfolio_only: bool = False, fields: Optional[str] = None,
+              cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+              x_user_id: Optional[str] = Header(None)):
     user_id = require_user(x_user_id)
-    db = get_db()
-    query = db.table("ipos").select("*").eq("user_id", user_id).order("created_at", desc=True)
-    if portfolio_only:
-        query = query.eq("portfolio", True)
-    resp = query.execute()
-    return resp.data
+    filters = {"portfolio": True} if portfolio_only else {}
+    return list_page(response, "ipos", user_id, IPO_FIELDS, fields, cursor, limit, **filters)
 
 
 @app.post("/api/ipos", status_code=201)
@@ -221,13 +270,89 @@ def delete_ipo(ipo_id: str, x_user_id: Optional[str] = Header(None)):
     return {"message": "IPO deleted"}
 
 
+# ═══════════════════════════════════════════════════════════
+# Background Jobs
+# ═══════════════════════════════════════════════════════════
+
+# Kinds a user may submit through POST /api/jobs
+USER_JOB_KINDS = {"groww_scrape", "cmp", "auto_fetch"}
+
+
+def submit_job(background_tasks: BackgroundTasks, response: Response,
+               kind: str, params: dict, user_id: Optional[str]) -> dict:
+    """Queue a job (or join the identical in-flight one) and answer 202."""
+    try:
+        job, created = enqueue(get_db(), kind, params, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if created and worker_mode() == "inline":
+        background_tasks.add_task(run_inline, job["id"])
+    response.status_code = 202
+    return {"job_id": job["id"], "kind": kind, "status": job["status"], "deduplicated": not created}
+
+
+def job_owner(x_user_id: Optional[str], x_cron_secret: Optional[str]) -> Optional[str]:
+    """System jobs (no owner) are visible with the cron secret; the rest per user."""
+    expected_secret = os.environ.get("CRON_SECRET", "")
+    if x_cron_secret and expected_secret and x_cron_secret == expected_secret:
+        return None
+    return require_user(x_user_id)
+
+
+class JobSubmit(BaseModel):
+    kind: str
+    params: dict = {}
+
+
+@app.post("/api/jobs", status_code=202)
+def create_job(body: JobSubmit, background_tasks: BackgroundTasks, response: Response,
+               x_user_id: Optional[str] = Header(None)):
+    user_id = require_user(x_user_id)
+    if body.kind not in USER_JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported job kind: {body.kind}")
+    return submit_job(background_tasks, response, body.kind, body.params, user_id)
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str, x_user_id: Optional[str] = Header(None),
+                   x_cron_secret: Optional[str] = Header(None)):
+    job = get_job(get_db(), job_id, job_owner(x_user_id, x_cron_secret))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/result")
+def get_job_result(job_id: str, x_user_id: Optional[str] = Header(None),
+                   x_cron_secret: Optional[str] = Header(None)):
+    job = get_job(get_db(), job_id, job_owner(x_user_id, x_cron_secret))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job.get("error") or "Job failed")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}")
+    return job["result"]
+
+
 # ═══════════════════════════════════════════════════════════
 # Scraping
 # ═══════════════════════════════════════════════════════════
+# Each endpoint answers inline by default; pass ?background=true to get a
+# job id back instead of holding the request open for the remote fetch.
+# Inline fetches are async over the shared HTTP client, so they wait on the
+# event loop rather than tying up a threadpool worker each.
 
 @app.post("/api/scrape/groww")
-def scrape_groww(body: ScrapeGrowwRequest):
-    result = scrape_groww_ipo(body.url)
+async def scrape_groww(body: ScrapeGrowwRequest, background_tasks: BackgroundTasks, response: Response,
+                       background: bool = False, x_user_id: Optional[str] = Header(None)):
+    if background:
+        return await run_in_threadpool(
+            submit_job, background_tasks, response, "groww_scrape", {"url": body.url}, require_user(x_user_id)
+        )
+    from scrapers.groww_scraper import scrape_groww_ipo_async
+
+    result = await scrape_groww_ipo_async(body.url)
     if not result["success"]:
         result["warning"] = result.get("error", "Some fields could not be scraped automatically")
         result["error"] = None
@@ -235,86 +360,55 @@ def scrape_groww(body: ScrapeGrowwRequest):
 
 
 @app.get("/api/scrape/cmp/{company_name}")
-def get_cmp(company_name: str):
-    result = scraper.scrape_stock_price(company_name)
+async def get_cmp(company_name: str, background_tasks: BackgroundTasks, response: Response,
+                  background: bool = False, x_user_id: Optional[str] = Header(None)):
+    if background:
+        return await run_in_threadpool(
+            submit_job, background_tasks, response, "cmp", {"company_names": [company_name]}, require_user(x_user_id)
+        )
+    from cmp_service import get_price_cache
+
+    result = await get_price_cache().get_async(company_name)
     if not result["success"]:
         log.warning(f"CMP scrape failed for {company_name}: {result.get('error')}")
     return result
 
 
 @app.post("/api/scrape/cmp/bulk")
-def get_cmp_bulk(body: dict):
+async def get_cmp_bulk(body: dict, background_tasks: BackgroundTasks, response: Response,
+                       background: bool = False, x_user_id: Optional[str] = Header(None)):
     names = body.get("company_names", [])
     if not names:
         return []
-    return scraper.scrape_multiple_stocks(names)
+    if background:
+        return await run_in_threadpool(
+            submit_job, background_tasks, response, "cmp", {"company_names": names}, require_user(x_user_id)
+        )
+    from cmp_service import get_price_cache
+
+    return await get_price_cache().get_many_async(names)
 
 
 # ═══════════════════════════════════════════════════════════
 # Automated IPO Scraping  (scoped to user)
 # ═══════════════════════════════════════════════════════════
 
-@app.post("/api/scrape/auto-fetch")
-def auto_fetch_ipos(x_user_id: Optional[str] = Header(None)):
+@app.post("/api/scrape/auto-fetch", status_code=202)
+def auto_fetch_ipos(background_tasks: BackgroundTasks, response: Response,
+                    x_user_id: Optional[str] = Header(None)):
+    """Start an auto-fetch job; poll GET /api/jobs/{job_id} for progress."""
     user_id = require_user(x_user_id)
-    db = get_db()
-    
-    # 1. Scrape the list from Groww
-    groww_list = scrape_closed_ipos()
-    if not groww_list:
-        return {"message": "No new IPOs found or scraping failed", "added": 0}
-        
-    # 2. Get existing data to prevent duplicates
-    existing_ipos = db.table("ipos").select("company_name").eq("user_id", user_id).execute().data
-    existing_pending = db.table("pending_ipo_additions").select("search_id").eq("user_id", user_id).execute().data
-    existing_throwouts = db.table("throwout_ipo_companies").select("search_id").eq("user_id", user_id).execute().data
-    
-    ipo_names = {i["company_name"].lower() for i in existing_ipos}
-    pending_ids = {p["search_id"] for p in existing_pending}
-    throwout_ids = {t["search_id"] for t in existing_throwouts}
-    
-    # 3. Filter and enrich
-    to_add = []
-    for item in groww_list:
-        if item["search_id"] in pending_ids or item["search_id"] in throwout_ids:
-            continue
-        if item["company_name"].lower() in ipo_names:
-            continue
-            
-        # Enrich with more details from the specific page
-        details = scrape_groww_ipo(item["groww_link"])
-        if details.get("success"):
-            # Update fields if scraped successfully
-            for field in ["listed_on", "issue_price", "listing_price", "issue_size", 
-                         "qib_subscription", "nii_subscription", "rii_subscription", "total_subscription"]:
-                if details.get(field):
-                    item[field] = details[field]
-        
-        item["user_id"] = user_id
-        to_add.append(item)
-        
-    if to_add:
-        # Filter keys to match DB schema
-        allowed_keys = {
-            "user_id", "company_name", "search_id", "groww_link", 
-            "listed_on", "issue_price", "listing_price", "issue_size",
-            "qib_subscription", "nii_subscription", "rii_subscription", "total_subscription"
-        }
-        cleaned_to_add = []
-        for item in to_add:
-            cleaned_to_add.append({k: v for k, v in item.items() if k in allowed_keys})
-            
-        db.table("pending_ipo_additions").insert(cleaned_to_add).execute()
-        
-    return {"message": f"Successfully fetched {len(to_add)} new IPOs", "added": len(to_add)}
+    job = submit_job(background_tasks, response, "auto_fetch", {}, user_id)
+    job["message"] = "Fetching new IPOs in the background"
+    return job
 
 
 @app.get("/api/pending-ipos")
-def list_pending_ipos(x_user_id: Optional[str] = Header(None)):
+def list_pending_ipos(response: Response, fields: Optional[str] = None, cursor: Optional[str] = None,
+                      limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+                      x_user_id: Optional[str] = Header(None)):
     user_id = require_user(x_user_id)
-    db = get_db()
-    resp = db.table("pending_ipo_additions").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-    return resp.data
+    return list_page(response, "pending_ipo_additions", user_id, PENDING_IPO_FIELDS, fields, cursor, limit)
 
 
 @app.post("/api/pending-ipos/{pending_id}/submit")
@@ -371,11 +465,11 @@ def delete_pending_ipo(pending_id: str, x_user_id: Optional[str] = Header(None))
 # ═══════════════════════════════════════════════════════════
 
 @app.get("/api/throwout-ipos")
-def list_throwout_ipos(x_user_id: Optional[str] = Header(None)):
+def list_throwout_ipos(response: Response, fields: Optional[str] = None, cursor: Optional[str] = None,
+                       limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+                       x_user_id: Optional[str] = Header(None)):
     user_id = require_user(x_user_id)
-    db = get_db()
-    resp = db.table("throwout_ipo_companies").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-    return resp.data
+    return list_page(response, "throwout_ipo_companies", user_id, THROWOUT_IPO_FIELDS, fields, cursor, limit)
 
 
 @app.post("/api/throwout-ipos")
@@ -385,7 +479,8 @@ def create_throwout_ipo(body: ThrowoutIpoCreate, x_user_id: Optional[str] = Head
     data = body.model_dump()
     data["user_id"] = user_id
     data["created_at"] = now_iso()
-    resp = db.table("throwout_ipo_companies").insert(data).execute()
+    # Unique per (user_id, search_id): throwing out the same IPO twice is a no-op
+    resp = db.table("throwout_ipo_companies").upsert(data, on_conflict="user_id,search_id").execute()
     
     # If it was in pending, remove it
     db.table("pending_ipo_additions").delete().eq("search_id", body.search_id).eq("user_id", user_id).execute()
@@ -406,11 +501,11 @@ def restore_throwout_ipo(throwout_id: str, x_user_id: Optional[str] = Header(Non
 # ═══════════════════════════════════════════════════════════
 
 @app.get("/api/alert-rules")
-def list_alert_rules(x_user_id: Optional[str] = Header(None)):
+def list_alert_rules(response: Response, fields: Optional[str] = None, cursor: Optional[str] = None,
+                     limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+                     x_user_id: Optional[str] = Header(None)):
     user_id = require_user(x_user_id)
-    db = get_db()
-    resp = db.table("alert_rules").select("*").eq("user_id", user_id).order("created_at").execute()
-    return resp.data
+    return list_page(response, "alert_rules", user_id, ALERT_RULE_FIELDS, fields, cursor, limit, descending=False)
 
 
 @app.post("/api/alert-rules", status_code=201)
@@ -480,51 +575,73 @@ def delete_alert_rule(rule_id: str, x_user_id: Optional[str] = Header(None)):
 # ═══════════════════════════════════════════════════════════
 
 @app.post("/api/cron/check-alerts")
-def run_alert_check(x_cron_secret: Optional[str] = Header(None)):
+def run_alert_check(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    shard: int = 0,
+    shards: int = 1,
+    cursor: Optional[str] = None,
+    run_id: Optional[str] = None,
+    incremental: Optional[bool] = None,
+    background: bool = False,
+    x_cron_secret: Optional[str] = Header(None),
+):
+    """
+    Check one shard of all users' portfolio IPOs. Stops early when the time
+    budget runs out; call again with the returned run_id (or `cursor=next_cursor`)
+    until `done` is true. With ?background=true the shard runs as a job.
+    """
     expected_secret = os.environ.get("CRON_SECRET", "")
     if expected_secret and x_cron_secret != expected_secret:
         raise HTTPException(status_code=401, detail="Invalid cron secret")
 
-    db = get_db()
-
-    # Fetch all portfolio IPOs across all users
-    ipos = db.table("ipos").select("*").eq("portfolio", True).execute().data
-    if not ipos:
-        return {"message": "No portfolio IPOs found", "alerts_sent": 0}
-
-    company_names = [ipo["company_name"] for ipo in ipos]
-    cmp_results = scraper.scrape_multiple_stocks(company_names)
-    cmp_map = {r["company_name"]: r["price"] for r in cmp_results if r.get("price")}
+    if background:
+        params = {"shard": shard, "shards": shards, "cursor": cursor, "run_id": run_id, "incremental": incremental}
+        return submit_job(background_tasks, response, "alert_check", params, None)
 
-    rules = db.table("alert_rules").select("*").execute().data
-    if not any(r.get("type") == "base" for r in rules):
-        rules.append({"type": "base", "gain_pct": 15.0, "loss_pct": -15.0})
+    from alert_runner import run_alert_shard
+    from cmp_service import fetch_cmp_map
 
-    alerts = check_alerts(ipos, rules, cmp_map)
-    sent_count = sum(1 for alert in alerts if send_discord_alert(alert))
-    send_cron_summary(len(ipos), sent_count)
-
-    log.info(f"Cron: {len(ipos)} IPOs checked, {sent_count} alerts sent")
-    return {
-        "message": "Alert check complete",
-        "ipos_checked": len(ipos),
-        "cmp_fetched": len(cmp_map),
-        "alerts_triggered": len(alerts),
-        "alerts_sent": sent_count,
-    }
+    try:
+        return run_alert_shard(
+            get_db(), fetch_cmp_map,
+            shard=shard, shard_count=shards, cursor=cursor, run_id=run_id,
+            portfolio_only=True, incremental=incremental,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ═══════════════════════════════════════════════════════════
 # Portfolio Summary  (scoped to user)
 # ═══════════════════════════════════════════════════════════
 
+def _load_portfolio(user_id: str) -> list:
+    db = get_db()
+    return db.table("ipos").select("*").eq("user_id", user_id).eq("portfolio", True).execute().data
+
+
 @app.get("/api/portfolio/summary")
-def portfolio_summary(x_user_id: Optional[str] = Header(None)):
+async def portfolio_summary(x_user_id: Optional[str] = Header(None)):
+    import company_prices
+    from cmp_service import fetch_cmp_map_async
+
     user_id = require_user(x_user_id)
-    db = get_db()
-    portfolio_ipos = (
-        db.table("ipos").select("*").eq("user_id", user_id).eq("portfolio", True).execute().data
+    portfolio_ipos = await run_in_threadpool(_load_portfolio, user_id)
+    if not portfolio_ipos:
+        return _summarize_portfolio([], {})
+
+    # Stored prices; only rows older than PRICE_STALE_SECONDS are scraped live
+    cmp_by_name = await company_prices.fetch_cmp_map_async(
+        get_db(), [ipo["company_name"] for ipo in portfolio_ipos], fetch_cmp_map_async
     )
+    return _summarize_portfolio(portfolio_ipos, cmp_by_name)
+
+
+def _summarize_portfolio(portfolio_ipos: list, cmp_by_name: dict) -> dict:
+    """Per-company and total P&L for `portfolio_ipos` given fetch_cmp_map() results."""
+    import numpy as np
+    from alert_engine import calculate_pct
 
     if not portfolio_ipos:
         return {
@@ -534,53 +651,220 @@ def portfolio_summary(x_user_id: Optional[str] = Header(None)):
             "total_pct_change": 0,
         }
 
-    company_names = [ipo["company_name"] for ipo in portfolio_ipos]
-    cmp_results = scraper.scrape_multiple_stocks(company_names)
-    cmp_map = {r["company_name"]: r["price"] for r in cmp_results if r.get("price")}
-
-    companies = []
-    invested_vals = []
-    current_vals = []
+    cmps = [cmp_by_name[ipo["company_name"]] for ipo in portfolio_ipos]
 
-    for ipo in portfolio_ipos:
-        name = ipo["company_name"]
-        raw_shares = ipo.get("no_of_shares")
-        raw_buy = ipo.get("buy_price")
-        shares = float(raw_shares) if raw_shares else 0.0
-        buy_price = float(raw_buy) if raw_buy else 0.0
-        cmp = cmp_map.get(name)
+    # One vectorized pass over the whole portfolio; NaN marks a missing CMP
+    shares = np.array([float(ipo.get("no_of_shares") or 0.0) for ipo in portfolio_ipos])
+    buy_prices = np.array([float(ipo.get("buy_price") or 0.0) for ipo in portfolio_ipos])
+    cmp_arr = np.array([r["price"] if r.get("price") else np.nan for r in cmps])
 
-        invested = shares * buy_price
-        current_val = (shares * cmp) if cmp is not None else None
-        pct_change = calculate_pct(cmp, buy_price) if (cmp is not None and buy_price > 0) else None
+    has_cmp = ~np.isnan(cmp_arr)
+    invested = shares * buy_prices
+    current_vals = shares * cmp_arr
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_changes = np.round((cmp_arr - buy_prices) * 100 / buy_prices, 2)
+    pct_changes[~(has_cmp & (buy_prices > 0))] = np.nan
 
-        invested_vals.append(invested)
-        if current_val is not None:
-            current_vals.append(current_val)
+    total_invested = float(invested.sum())
+    total_current_value = float(current_vals[has_cmp].sum())
+    total_pct = calculate_pct(total_current_value, total_invested) if total_invested > 0 else 0
 
+    companies = []
+    for i, ipo in enumerate(portfolio_ipos):
+        priced = bool(has_cmp[i])
         companies.append({
             "id": ipo["id"],
-            "company_name": name,
+            "company_name": ipo["company_name"],
             "sector": ipo.get("sector_name") or "—",
             "sector_id": ipo.get("sector_id"),
-            "shares": shares,
-            "buy_price": buy_price,
-            "cmp": cmp,
-            "invested": invested,
-            "current_value": current_val,
-            "pct_change": pct_change,
+            "shares": float(shares[i]),
+            "buy_price": float(buy_prices[i]),
+            "cmp": float(cmp_arr[i]) if priced else None,
+            "cmp_cached_at": cmps[i]["cached_at"] if priced else None,
+            "cmp_age": cmps[i]["age"] if priced else None,
+            "invested": float(invested[i]),
+            "current_value": float(current_vals[i]) if priced else None,
+            "pct_change": None if np.isnan(pct_changes[i]) else float(pct_changes[i]),
             "issue_price": ipo.get("issue_price"),
             "listing_price": ipo.get("listing_price"),
             "listed_on": ipo.get("listed_on"),
         })
 
-    total_invested = sum(invested_vals)
-    total_current_value = sum(current_vals)
-    total_pct = calculate_pct(total_current_value, total_invested) if total_invested > 0 else 0
-
     return {
         "companies": companies,
         "total_invested": round(total_invested, 2),
         "total_current_value": round(total_current_value, 2),
         "total_pct_change": round(total_pct, 2)
     }
+
+
+# ═══════════════════════════════════════════════════════════
+# Dashboard  (scoped to user)
+# ═══════════════════════════════════════════════════════════
+
+# The columns the dashboard list, the IPO edit modal and the summary read
+DASHBOARD_IPO_COLUMNS = (
+    "id, company_name, sector_id, sector_name, portfolio, no_of_shares, buy_price, groww_link, "
+    "listed_on, issue_price, listing_price, issue_size, qib_subscription, nii_subscription, "
+    "rii_subscription, total_subscription, created_at, updated_at"
+)
+
+
+def _load_dashboard(user_id: str) -> tuple:
+    db = get_db()
+    ipos = (
+        db.table("ipos").select(DASHBOARD_IPO_COLUMNS)
+        .eq("user_id", user_id).order("created_at", desc=True).execute().data
+    )
+    sectors = db.table("sectors").select("id, name, created_at").order("name").execute().data
+    return ipos, sectors
+
+
+def _dashboard_etag(user_id: str, ipos: list, sectors: list, price_stamps: list) -> str:
+    """
+    Weak validator for one user's dashboard: row counts and newest change
+    times (counts catch deletions) plus when each portfolio price was scraped.
+    """
+    import hashlib
+
+    latest_ipo = max((i.get("updated_at") or i.get("created_at") or "" for i in ipos), default="")
+    latest_sector = max((s.get("created_at") or "" for s in sectors), default="")
+    blob = "|".join([
+        user_id, str(len(ipos)), latest_ipo, str(len(sectors)), latest_sector, *map(str, price_stamps),
+    ])
+    return f'W/"{hashlib.sha1(blob.encode()).hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    wanted = etag.removeprefix("W/")
+    return any(
+        tag.strip() == "*" or tag.strip().removeprefix("W/") == wanted
+        for tag in if_none_match.split(",")
+    )
+
+
+@app.get("/api/dashboard")
+async def dashboard(
+    response: Response,
+    x_user_id: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Portfolio summary, IPO list and sectors in one response.
+
+    Prices come from the company_prices table. When none is stale and
+    neither the rows nor any price changed since the client's copy, answers
+    304 straight after the database reads, skipping scraping and
+    serialization.
+    """
+    import company_prices
+    from cmp_service import fetch_cmp_map_async
+
+    user_id = require_user(x_user_id)
+    ipos, sectors = await run_in_threadpool(_load_dashboard, user_id)
+    portfolio_ipos = [ipo for ipo in ipos if ipo.get("portfolio")]
+    names = list(dict.fromkeys(ipo["company_name"] for ipo in portfolio_ipos))
+    headers = {"Cache-Control": "private, no-cache", "Vary": "x-user-id"}
+
+    cmp_by_name, stale = await run_in_threadpool(company_prices.read, get_db(), names) if names else ({}, [])
+    if not stale:
+        etag = _dashboard_etag(user_id, ipos, sectors, [cmp_by_name[n]["cached_at"] for n in names])
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+    else:
+        live = await fetch_cmp_map_async(stale)
+        cmp_by_name = await run_in_threadpool(company_prices.merge_live, get_db(), cmp_by_name, live)
+
+    stamps = [cmp_by_name[n].get("cached_at") for n in names]
+    response.headers.update({**headers, "ETag": _dashboard_etag(user_id, ipos, sectors, stamps)})
+    return {
+        "portfolio": _summarize_portfolio(portfolio_ipos, cmp_by_name),
+        "ipos": ipos,
+        "sectors": sectors,
+    }
+
+
+# ═══════════════════════════════════════════════════════════
+# Price History  (company series global, portfolio series per user)
+# ═══════════════════════════════════════════════════════════
+
+@app.get("/api/history")
+def get_history(
+    kind: Literal["company", "portfolio"] = "company",
+    company: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    points: int = Query(300, ge=10, le=2000),
+    mode: Literal["lttb", "ohlc"] = "lttb",
+    x_user_id: Optional[str] = Header(None),
+):
+    """
+    Daily closes for `company`, or the caller's portfolio valuation, over
+    [start, end], downsampled to at most `points` entries: LTTB keeps the
+    line's shape, OHLC summarises equal day buckets. Reads the history
+    tables only; never scrapes.
+    """
+    import numpy as np
+    import downsample
+    import price_history
+
+    user_id = require_user(x_user_id)
+    db = get_db()
+    if kind == "company":
+        if not company:
+            raise HTTPException(status_code=400, detail="company is required for kind=company")
+        rows = price_history.company_series(db, company, start, end)
+        extra = {}
+    else:
+        series = price_history.portfolio_series(db, user_id, start, end)
+        rows = [(day, value) for day, value, _ in series]
+        extra = {"invested": [invested for _, _, invested in series]}
+
+    days = np.array([date.fromisoformat(d).toordinal() for d, _ in rows], dtype=np.int64)
+    values = np.array([v for _, v in rows], dtype=float)
+    result = {"kind": kind, "company": company, "mode": mode, "raw_points": len(rows)}
+
+    if mode == "ohlc":
+        result["points"] = [
+            {"day": date.fromordinal(d).isoformat(), "open": o, "high": h, "low": lo, "close": c}
+            for d, o, h, lo, c in downsample.ohlc(days, values, points)
+        ]
+        return result
+
+    keep = downsample.lttb(days, values, points)
+    result["points"] = [
+        {"day": rows[i][0], "value": rows[i][1], **({"invested": extra["invested"][i]} if extra else {})}
+        for i in keep
+    ]
+    return result
+
+
+# ═══════════════════════════════════════════════════════════
+# Alert Rule Backtest  (replays company_price_history)
+# ═══════════════════════════════════════════════════════════
+
+@app.get("/api/backtest")
+def get_backtest(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    gain: List[float] = Query([]),
+    loss: List[float] = Query([]),
+    x_user_id: Optional[str] = Header(None),
+):
+    """
+    How often the caller's alert rules (and any candidate `gain` / `loss`
+    thresholds, repeated query params) would have fired on stored daily
+    closes over [start, end]. Reads the database only; never scrapes.
+    """
+    import backtest
+
+    user_id = require_user(x_user_id)
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    try:
+        return backtest.run_backtest(get_db(), user_id, start, end, gain, loss)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
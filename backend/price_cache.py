@@ -0,0 +1,166 @@
+"""
+In-process CMP cache shared by the scraping, portfolio and cron endpoints.
+
+- TTL: a price scraped less than PRICE_CACHE_TTL seconds ago is served as-is.
+- LRU: at most PRICE_CACHE_MAX_ENTRIES companies are kept.
+- Single-flight: concurrent requests for the same company wait on one
+  upstream fetch instead of each scraping screener.in.
+
+`get_many_async()` shares the same entries and in-flight table, so async
+handlers and threaded callers coalesce onto each other's fetches.
+
+Every returned result carries `cached_at` (ISO timestamp of the scrape) and
+`age` (seconds since then) so clients can show how stale a price is.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+
+class PriceCache:
+    def __init__(
+        self,
+        fetch_many: Callable[[List[str]], List[dict]],
+        ttl_seconds: float = None,
+        max_entries: int = None,
+        fetch_many_async: Optional[Callable[[List[str]], Awaitable[List[dict]]]] = None,
+    ):
+        """
+        Args:
+            fetch_many: bulk fetcher, e.g. StockScraper.scrape_multiple_stocks;
+                        must return one result dict per name, in order.
+            fetch_many_async: coroutine twin of `fetch_many`, used by get_many_async().
+        """
+        self._fetch_many = fetch_many
+        self._fetch_many_async = fetch_many_async
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.environ.get("PRICE_CACHE_TTL", "300"))
+        self.max_entries = max_entries or int(os.environ.get("PRICE_CACHE_MAX_ENTRIES", "2000"))
+        self._entries: OrderedDict = OrderedDict()  # key -> (result, fetched_at_epoch)
+        self._inflight: dict = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _decorate(result: dict, fetched_at: float) -> dict:
+        out = dict(result)
+        out["cached_at"] = datetime.fromtimestamp(fetched_at, timezone.utc).isoformat()
+        out["age"] = round(time.time() - fetched_at, 1)
+        return out
+
+    def _fresh(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remember(self, key: str, result: dict, fetched_at: float) -> None:
+        self._entries[key] = (result, fetched_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _reserve(self, company_names: List[str], keys: List[str]):
+        """Split keys into cached, owned by another caller, and ours to fetch."""
+        ready: dict = {}    # key -> (result, fetched_at)
+        waiting: dict = {}  # key -> Future owned by another caller
+        to_fetch: dict = {}  # key -> original name, fetched by this caller
+
+        with self._lock:
+            for name, key in zip(company_names, keys):
+                if key in ready or key in waiting or key in to_fetch:
+                    continue
+                entry = self._fresh(key)
+                if entry is not None:
+                    ready[key] = entry
+                elif key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    to_fetch[key] = name
+                    self._inflight[key] = Future()
+        return ready, waiting, to_fetch
+
+    def get_many(self, company_names: List[str]) -> List[dict]:
+        """Return one CMP result per name, in input order."""
+        keys = [normalize_company_name(n) for n in company_names]
+        ready, waiting, to_fetch = self._reserve(company_names, keys)
+
+        if to_fetch:
+            names = list(to_fetch.values())
+            try:
+                results = self._fetch_many(names)
+            except Exception as e:
+                results = self._failed(names, e)
+            self._publish(to_fetch, results, ready)
+
+        for key, fut in waiting.items():
+            ready[key] = fut.result()
+
+        return [self._decorate(*ready[key]) for key in keys]
+
+    async def get_many_async(self, company_names: List[str]) -> List[dict]:
+        """get_many() for async callers; waits without blocking the event loop."""
+        if self._fetch_many_async is None:
+            return await asyncio.to_thread(self.get_many, company_names)
+        keys = [normalize_company_name(n) for n in company_names]
+        ready, waiting, to_fetch = self._reserve(company_names, keys)
+
+        if to_fetch:
+            names = list(to_fetch.values())
+            try:
+                results = await self._fetch_many_async(names)
+            except BaseException as e:
+                # Cancellation must still release the in-flight slots
+                self._publish(to_fetch, self._failed(names, e), ready)
+                if not isinstance(e, Exception):
+                    raise
+            else:
+                self._publish(to_fetch, results, ready)
+
+        for key, fut in waiting.items():
+            ready[key] = await asyncio.wrap_future(fut)
+
+        return [self._decorate(*ready[key]) for key in keys]
+
+    def get(self, company_name: str) -> dict:
+        return self.get_many([company_name])[0]
+
+    async def get_async(self, company_name: str) -> dict:
+        return (await self.get_many_async([company_name]))[0]
+
+    @staticmethod
+    def _failed(names: List[str], error: BaseException) -> List[dict]:
+        log.error(f"Bulk CMP fetch failed: {error}")
+        return [
+            {"company_name": n, "price": None, "high": None, "low": None, "success": False, "error": str(error)}
+            for n in names
+        ]
+
+    def _publish(self, to_fetch: dict, results: List[dict], ready: dict) -> None:
+        fetched_at = time.time()
+        with self._lock:
+            for i, (key, name) in enumerate(to_fetch.items()):
+                result = results[i] if i < len(results) else {
+                    "company_name": name, "price": None, "high": None, "low": None,
+                    "success": False, "error": "No result returned",
+                }
+                # Failures are coalesced but not cached, so the next call retries
+                if result.get("success"):
+                    self._remember(key, result, fetched_at)
+                ready[key] = (result, fetched_at)
+                self._inflight.pop(key).set_result(ready[key])
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "inflight": len(self._inflight), "ttl": self.ttl}
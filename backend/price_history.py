@@ -0,0 +1,116 @@
+"""
+Daily price history and portfolio valuations.
+
+`snapshot_day()` runs after every cron pass and price refresh. It copies
+today's company_prices rows into `company_price_history` (one row per
+company per market day; later runs the same day overwrite it, so the last
+run leaves the closing price). It also writes each user's portfolio value
+into `portfolio_valuations`. Both are bulk upserts, and nothing is scraped.
+
+Days are Indian market days (Asia/Kolkata), stored as `date`.
+"""
+import logging
+from datetime import date, datetime, time, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import company_prices
+from pagination import fetch_all
+from scrapers.resolution_cache import normalize_company_name
+
+log = logging.getLogger(__name__)
+
+HISTORY_TABLE = "company_price_history"
+VALUATION_TABLE = "portfolio_valuations"
+MARKET_TZ = ZoneInfo("Asia/Kolkata")
+UPSERT_CHUNK = 500
+
+
+def market_day(now: Optional[datetime] = None) -> date:
+    return (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ).date()
+
+
+def _upsert(db, table: str, rows: list, on_conflict: str) -> None:
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        db.table(table).upsert(rows[start:start + UPSERT_CHUNK], on_conflict=on_conflict).execute()
+
+
+def snapshot_day(db, day: Optional[date] = None) -> dict:
+    """Record today's closes and portfolio valuations; returns row counts."""
+    day = day or market_day()
+    since = datetime.combine(day, time.min, MARKET_TZ).isoformat()
+    prices = fetch_all(lambda: (
+        db.table(company_prices.TABLE).select("name_key, price").gte("fetched_at", since).order("name_key")
+    ))
+    _upsert(db, HISTORY_TABLE, [
+        {"name_key": p["name_key"], "day": day.isoformat(), "close": p["price"]} for p in prices
+    ], on_conflict="name_key,day")
+
+    price_by_key = {p["name_key"]: float(p["price"]) for p in prices}
+    holdings = fetch_all(lambda: (
+        db.table("ipos").select("id, user_id, company_name, no_of_shares, buy_price").eq("portfolio", True).order("id")
+    ))
+    valuations: dict = {}
+    for h in holdings:
+        shares = float(h.get("no_of_shares") or 0)
+        v = valuations.setdefault(h["user_id"], {"invested": 0.0, "value": 0.0, "holdings": 0, "priced": 0})
+        v["invested"] += shares * float(h.get("buy_price") or 0)
+        v["holdings"] += 1
+        price = price_by_key.get(normalize_company_name(h["company_name"]))
+        if price is not None:
+            v["value"] += shares * price
+            v["priced"] += 1
+    _upsert(db, VALUATION_TABLE, [
+        {
+            "user_id": user_id, "day": day.isoformat(),
+            "invested": round(v["invested"], 2), "value": round(v["value"], 2),
+            "holdings": v["holdings"], "priced": v["priced"],
+        }
+        for user_id, v in valuations.items()
+    ], on_conflict="user_id,day")
+
+    log.info(f"History snapshot {day}: {len(prices)} closes, {len(valuations)} portfolios")
+    return {"day": day.isoformat(), "closes": len(prices), "portfolios": len(valuations)}
+
+
+def company_series(db, company_name: str, start: Optional[date], end: Optional[date]) -> list:
+    """[(day, close)] for one company, oldest first."""
+    def query():
+        q = db.table(HISTORY_TABLE).select("day, close").eq("name_key", normalize_company_name(company_name))
+        if start:
+            q = q.gte("day", start.isoformat())
+        if end:
+            q = q.lte("day", end.isoformat())
+        return q.order("day")
+    return [(r["day"], float(r["close"])) for r in fetch_all(query)]
+
+
+def portfolio_series(db, user_id: str, start: Optional[date], end: Optional[date]) -> list:
+    """[(day, value, invested)] for one user's portfolio, oldest first."""
+    def query():
+        q = db.table(VALUATION_TABLE).select("day, value, invested").eq("user_id", user_id)
+        if start:
+            q = q.gte("day", start.isoformat())
+        if end:
+            q = q.lte("day", end.isoformat())
+        return q.order("day")
+    return [(r["day"], float(r["value"]), float(r["invested"])) for r in fetch_all(query)]
+
+
+def company_closes(db, company_names: list, start: Optional[date], end: Optional[date],
+                   keys_per_query: int = 200) -> list:
+    """[(name_key, day, close)] for many companies at once (chunked `in_` queries)."""
+    keys = sorted({normalize_company_name(n) for n in company_names})
+    rows = []
+    for i in range(0, len(keys), keys_per_query):
+        chunk = keys[i:i + keys_per_query]
+
+        def query(chunk=chunk):
+            q = db.table(HISTORY_TABLE).select("name_key, day, close").in_("name_key", chunk)
+            if start:
+                q = q.gte("day", start.isoformat())
+            if end:
+                q = q.lte("day", end.isoformat())
+            return q.order("name_key").order("day")
+        rows.extend((r["name_key"], r["day"], float(r["close"])) for r in fetch_all(query))
+    return rows
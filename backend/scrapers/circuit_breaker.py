@@ -0,0 +1,148 @@
+"""
+Per-host circuit breaker for the scrapers.
+
+Every request to a host reports its outcome. When, over the last
+CIRCUIT_WINDOW calls (and at least CIRCUIT_MIN_CALLS), the share of
+failures (transport errors, timeouts, 429s and 5xx) reaches
+CIRCUIT_FAILURE_RATIO, or the share of calls slower than
+CIRCUIT_SLOW_SECONDS reaches CIRCUIT_SLOW_RATIO, the circuit *opens*:
+further calls fail immediately with CircuitOpenError instead of waiting
+out 15–20 s timeouts. After CIRCUIT_OPEN_SECONDS one probe request is let
+through (*half-open*); success closes the circuit, failure re-opens it
+for twice as long (capped at CIRCUIT_MAX_OPEN_SECONDS).
+
+The request rate itself adapts separately, in the host's token bucket
+(see rate_limiter.TokenBucket.penalize).
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a request while a host's circuit is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is failing — circuit open, retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, host: str):
+        self.host = host
+        self.window = int(os.environ.get("CIRCUIT_WINDOW", "20"))
+        self.min_calls = int(os.environ.get("CIRCUIT_MIN_CALLS", "5"))
+        self.failure_ratio = float(os.environ.get("CIRCUIT_FAILURE_RATIO", "0.5"))
+        self.slow_seconds = float(os.environ.get("CIRCUIT_SLOW_SECONDS", "8"))
+        self.slow_ratio = float(os.environ.get("CIRCUIT_SLOW_RATIO", "0.8"))
+        self.base_open_seconds = float(os.environ.get("CIRCUIT_OPEN_SECONDS", "30"))
+        self.max_open_seconds = float(os.environ.get("CIRCUIT_MAX_OPEN_SECONDS", "600"))
+
+        self.state = CLOSED
+        self.trips = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self._outcomes: deque = deque(maxlen=self.window)  # (failed, slow)
+        self._open_seconds = self.base_open_seconds
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _retry_in(self) -> float:
+        return max(0.0, self._opened_at + self._open_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go out."""
+        with self._lock:
+            if self.state == OPEN:
+                if self._retry_in() > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.host, self._retry_in())
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.host, 0)
+                self._probing = True
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None) -> None:
+        """Report the outcome of a call that before_call() let through."""
+        slow = latency >= self.slow_seconds
+        with self._lock:
+            if not ok:
+                self.last_error = error
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if ok and not slow:
+                    log.info(f"Circuit for {self.host} closed again")
+                    self.state = CLOSED
+                    self._open_seconds = self.base_open_seconds
+                    self._outcomes.clear()
+                else:
+                    self._trip(min(self._open_seconds * 2, self.max_open_seconds))
+                return
+
+            self._outcomes.append((not ok, slow))
+            calls = len(self._outcomes)
+            if self.state == CLOSED and calls >= self.min_calls:
+                failures = sum(1 for failed, _ in self._outcomes if failed) / calls
+                slow_calls = sum(1 for _, s in self._outcomes if s) / calls
+                if failures >= self.failure_ratio or slow_calls >= self.slow_ratio:
+                    self._trip(self._open_seconds)
+
+    def release(self) -> None:
+        """Forget a call that was let through but abandoned (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def _trip(self, open_seconds: float) -> None:
+        self.state = OPEN
+        self.trips += 1
+        self._open_seconds = open_seconds
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        log.warning(f"Circuit for {self.host} opened for {open_seconds:.0f}s (last error: {self.last_error})")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "calls_in_window": calls,
+                "failure_ratio": round(sum(1 for f, _ in self._outcomes if f) / calls, 2) if calls else 0.0,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "retry_in": round(self._retry_in(), 1) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def states() -> dict:
+    """host -> snapshot, merged with the host's current adaptive request rate."""
+    from scrapers.rate_limiter import current_rates
+
+    rates = current_rates()
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {host: dict(b.snapshot(), **rates.get(host, {})) for host, b in breakers.items()}
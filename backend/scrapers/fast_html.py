@@ -0,0 +1,223 @@
+"""
+lxml fast path for the screener.in and Groww page extractors.
+
+The original extractors build a pure-Python BeautifulSoup tree with
+html.parser and walk it with find_all over class regexes. These functions
+parse the raw response bytes with lxml (tree built in C, no decode to str
+first) and pull the same fields with precompiled XPath. Results are
+identical to the soup extractors, including how undeclared encodings are
+detected; test_fast_html.py checks that on the pages in backend/fixtures
+and bench_parsers.py times both paths.
+
+Set SCRAPER_HTML_PARSER=html.parser to go back to the soup extractors.
+"""
+import os
+import re
+import logging
+import threading
+from typing import Optional
+
+import lxml.html
+from bs4.dammit import UnicodeDammit
+from lxml import etree
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("SCRAPER_HTML_PARSER", "lxml") == "lxml"
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w-]+)", re.I)
+_local = threading.local()  # lxml parser objects must not be shared across threads
+
+
+def charset(content_type: Optional[str]) -> Optional[str]:
+    """Charset declared in a Content-Type header, if any."""
+    m = _CHARSET_RE.search(content_type or "")
+    return m.group(1) if m else None
+
+
+def _document(content: bytes, encoding: Optional[str]):
+    if encoding is None:
+        # Left to itself lxml falls back to latin-1 when there is no <meta>
+        # charset; take the encoding BeautifulSoup would detect instead
+        encoding = UnicodeDammit(content, is_html=True).original_encoding
+    parsers = getattr(_local, "parsers", None)
+    if parsers is None:
+        parsers = _local.parsers = {}
+    parser = parsers.get(encoding)
+    if parser is None:
+        parser = parsers[encoding] = lxml.html.HTMLParser(encoding=encoding)
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def _text(el) -> str:
+    """BeautifulSoup's get_text(strip=True)."""
+    return "".join(s.strip() for s in el.itertext())
+
+
+def _text_sep(el, separator: str = " ") -> str:
+    """BeautifulSoup's get_text(separator=..., strip=True)."""
+    return separator.join(t for t in (s.strip() for s in el.itertext()) if t)
+
+
+def _string(el) -> Optional[str]:
+    """BeautifulSoup's Tag.string: the text of an element with exactly one child node."""
+    children = list(el)
+    count = (1 if el.text else 0) + sum(1 + (1 if c.tail else 0) for c in children)
+    if count != 1:
+        return None
+    if el.text:
+        return el.text
+    child = children[0]
+    return child.text if not isinstance(child.tag, str) else _string(child)
+
+
+def _first(nodes: list):
+    return nodes[0] if nodes else None
+
+
+def _class(name: str) -> str:
+    """XPath test for a whole class token, like bs4's class_="name"."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# ── screener.in company page ──────────────────────────────────────
+
+_TOP_RATIOS = etree.XPath("//ul[@id='top-ratios']")
+_LI = etree.XPath(".//li")
+_NAME = etree.XPath(f".//span[{_class('name')}]")
+_NUMBER = etree.XPath(f".//span[{_class('number')}]")
+_ALL_NUMBERS = etree.XPath(f"//span[{_class('number')}]")
+_DESCRIPTION = [
+    etree.XPath(xp) for xp in (
+        f"//div[{_class('company-background')}]//p",
+        f"//div[{_class('about')}]//p",
+        "//*[@id='company-background']//p",
+        f"//section[{_class('company-background')}]//p",
+        "//div[contains(@id, 'background')]//p",
+        "//div[contains(@class, 'background')]//p",
+        "//div[contains(@class, 'about')]//p",
+    )
+]
+_HEADINGS = etree.XPath("//*[self::h2 or self::h3 or self::h4]")
+_NEXT_P = etree.XPath("following-sibling::p[1]")
+_ABOUT_RE = re.compile(r"about", re.I)
+
+
+def _clean_number(raw: str) -> str:
+    return re.sub(r"[₹,\s]", "", raw).split("/")[0].strip()
+
+
+def _top_ratios(top) -> dict:
+    ratios = {}
+    if top is None:
+        return ratios
+    for li in _LI(top):
+        name_span = _first(_NAME(li))
+        if name_span is None:
+            continue
+        values = [_text(s) for s in _NUMBER(li)]
+        ratios[_text(name_span)] = " / ".join(values) if values else ""
+    return ratios
+
+
+def _price(doc, top) -> Optional[float]:
+    try:
+        if top is not None:
+            for li in _LI(top):
+                name_span = _first(_NAME(li))
+                if name_span is not None and "Current Price" in "".join(name_span.itertext()):
+                    number_span = _first(_NUMBER(li))
+                    if number_span is not None:
+                        return float(_clean_number(_text(number_span)))
+        for span in _ALL_NUMBERS(doc):
+            try:
+                val = float(_clean_number(_text(span)))
+                if 0.5 < val < 1_000_000:
+                    return val
+            except ValueError:
+                continue
+        return None
+    except Exception as e:
+        log.error(f"Error extracting price: {e}")
+        return None
+
+
+def _description(doc) -> str:
+    for xpath in _DESCRIPTION:
+        tag = _first(xpath(doc))
+        if tag is not None:
+            text = _text_sep(tag)
+            if len(text) > 20:
+                return text
+    for heading in _HEADINGS(doc):
+        string = _string(heading)
+        if string is None or not _ABOUT_RE.search(string):
+            continue
+        sibling = _first(_NEXT_P(heading))
+        if sibling is not None:
+            text = _text_sep(sibling)
+            if len(text) > 20:
+                return text
+    return ""
+
+
+def screener_page(content: bytes, encoding: Optional[str] = None) -> dict:
+    """Extract {ratios, price, description} from a screener.in company page."""
+    doc = _document(content, encoding)
+    top = _first(_TOP_RATIOS(doc))
+    return {"ratios": _top_ratios(top), "price": _price(doc, top), "description": _description(doc)}
+
+
+# ── Groww IPO page ────────────────────────────────────────────────
+
+_DETAIL_ITEMS = etree.XPath("//div[contains(@class, 'ipoDetails_detailItem')]")
+_DETAIL_LABEL = etree.XPath(".//div[contains(@class, 'bodySmall') or contains(@class, 'contentSecondary')]")
+_DETAIL_VALUE = etree.XPath(".//div[contains(@class, 'bodyBaseHeavy')]")
+_SUB_ROWS = etree.XPath("//div[contains(@class, 'subscription_row__')]")
+_SUB_TOTAL = etree.XPath("//div[contains(@class, 'subscription_totalRow')]")
+_SPANS = etree.XPath(".//span")
+_STEPS = etree.XPath("//div[contains(@class, 'ipoSchedule_desktopStepContainer')]")
+_STEP_INFO = etree.XPath(".//div[contains(@class, 'ipoSchedule_stepInfoContainer')]")
+_STEP_DATE = etree.XPath(".//span[contains(@class, 'bodyBase')]")
+_STEP_LABEL = etree.XPath(".//span[contains(@class, 'bodyBaseHeavy')]")
+
+
+def groww_sections(content: bytes, encoding: Optional[str] = None) -> tuple:
+    """Extract the (ipo_details, subscription, schedule) dicts from a Groww IPO page."""
+    doc = _document(content, encoding)
+
+    ipo_details = {}
+    for item in _DETAIL_ITEMS(doc):
+        label_el = _first(_DETAIL_LABEL(item))
+        value_el = _first(_DETAIL_VALUE(item))
+        if label_el is not None and value_el is not None:
+            label = _text(label_el).lower()
+            value = _text(value_el)
+            if label and value and label != "ipo document":
+                ipo_details[label] = value
+
+    subscription = {}
+    for row in _SUB_ROWS(doc):
+        spans = _SPANS(row)
+        if len(spans) >= 2:
+            label = _text(spans[0]).lower()
+            value = _text(spans[-1])
+            if label and value:
+                subscription[label] = value
+
+    total_row = _first(_SUB_TOTAL(doc))
+    if total_row is not None:
+        spans = _SPANS(total_row)
+        if len(spans) >= 2:
+            subscription["total"] = _text(spans[-1])
+
+    schedule = {}
+    for step in _STEPS(doc):
+        info = _first(_STEP_INFO(step))
+        if info is not None:
+            date_el = _first(_STEP_DATE(info))
+            label_el = _first(_STEP_LABEL(info))
+            if date_el is not None and label_el is not None:
+                schedule[_text(label_el).lower()] = _text(date_el)
+
+    return ipo_details, subscription, schedule
@@ -4,14 +4,28 @@ Scrapes: Listed On, Issue Price, Listing Price, Issue Size,
          QIB, NII, RII, Total subscription rates.
 
 Groww server-side renders IPO data in the HTML, so a plain HTTP
-GET + BeautifulSoup is sufficient — no headless browser needed.
+GET is sufficient — no headless browser needed. The closed-IPO list is
+read from the page's embedded __NEXT_DATA__ JSON; detail pages from the
+rendered markup.
+
+Every scraper has an `_async` twin that fetches over a shared
+httpx.AsyncClient (see http_client.py) and parses in a worker thread.
 """
+import os
 import re
+import json
+import asyncio
 import logging
+import threading
 from typing import Optional
 
+import httpx
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from scrapers import fast_html
+from scrapers.http_cache import cached_get, cached_get_async
 
 log = logging.getLogger(__name__)
 
@@ -25,6 +39,25 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+# How long pages are served from the HTTP cache before revalidating
+LIST_FRESH_SECONDS = float(os.environ.get("GROWW_LIST_FRESH", "300"))
+PAGE_FRESH_SECONDS = float(os.environ.get("GROWW_PAGE_FRESH", "900"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session for groww.in, sized for the enrichment pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            _session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=16))
+        return _session
+
+
 MONTH_MAP = {
     "jan": "01", "feb": "02", "mar": "03", "apr": "04",
     "may": "05", "jun": "06", "jul": "07", "aug": "08",
@@ -32,68 +65,102 @@ MONTH_MAP = {
 }
 
 
-import json
+CLOSED_IPOS_URL = "https://groww.in/ipo/closed"
+
+
+# ── __NEXT_DATA__ ─────────────────────────────────────────────────
+# Groww is a Next.js app: every page embeds its props as JSON in
+# <script id="__NEXT_DATA__">. Slicing that blob out of the raw bytes and
+# json-decoding it skips HTML parsing entirely.
+
+_NEXT_DATA_ID = b'id="__NEXT_DATA__"'
+_SCRIPT_END = b"</script>"
+
+
+def _next_data(content: bytes) -> Optional[dict]:
+    """Locate and decode the __NEXT_DATA__ JSON without parsing the page."""
+    tag = content.find(_NEXT_DATA_ID)
+    if tag == -1:
+        return None
+    start = content.find(b">", tag) + 1
+    end = content.find(_SCRIPT_END, start)
+    if start == 0 or end == -1:
+        return None
+    try:
+        return json.loads(content[start:end])
+    except ValueError as e:
+        log.warning(f"Could not decode __NEXT_DATA__: {e}")
+        return None
+
+
+def _parse_closed_ipos(content: bytes) -> list:
+    data = _next_data(content)
+    if data is None:
+        log.error("Could not find __NEXT_DATA__ script tag")
+        return []
+
+    # Navigate to the data list: props -> pageProps -> dataList
+    data_list = data.get("props", {}).get("pageProps", {}).get("dataList", [])
+    
+    results = []
+    for item in data_list:
+        # We only care about listed companies as per user request
+        if not item.get("isListed"):
+            continue
+            
+        search_id = item.get("searchId")
+        company_name = item.get("companyName", "")
+        
+        # Add "Ltd" if not present
+        if company_name and not (company_name.endswith("Ltd") or company_name.endswith("Limited")):
+            company_name = company_name.strip() + " Ltd"
+
+        results.append({
+            "company_name": company_name,
+            "search_id": search_id,
+            "groww_link": f"https://groww.in/ipo/{search_id}",
+            "is_sme": item.get("isSme", False),
+            "issue_price": str(item.get("issuePrice") or ""),
+            "listing_price": str(item.get("listingPrice") or ""),
+            "listed_on": str(item.get("listingTimestamp") or ""), # This is a timestamp, might need conversion
+            "overall_subscription": str(item.get("overallSubscription") or ""),
+        })
+        
+    return results
+
 
 def scrape_closed_ipos() -> list:
     """
     Scrape the list of closed IPOs from Groww.
     Returns a list of dicts: [{company_name, search_id, groww_link, is_listed, ...}]
     """
-    url = "https://groww.in/ipo/closed"
     try:
-        log.info(f"Fetching closed IPOs from: {url}")
-        resp = requests.get(url, headers=HEADERS, timeout=30)
+        log.info(f"Fetching closed IPOs from: {CLOSED_IPOS_URL}")
+        resp = cached_get(get_session().get, CLOSED_IPOS_URL, LIST_FRESH_SECONDS, timeout=30)
         resp.raise_for_status()
+        return _parse_closed_ipos(resp.content)
+    except Exception as e:
+        log.error(f"Error scraping closed IPOs: {e}")
+        return []
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        script_tag = soup.find("script", id="__NEXT_DATA__")
-        if not script_tag:
-            log.error("Could not find __NEXT_DATA__ script tag")
-            return []
 
-        data = json.loads(script_tag.string)
-        # Navigate to the data list: props -> pageProps -> dataList
-        data_list = data.get("props", {}).get("pageProps", {}).get("dataList", [])
-        
-        results = []
-        for item in data_list:
-            # We only care about listed companies as per user request
-            if not item.get("isListed"):
-                continue
-                
-            search_id = item.get("searchId")
-            company_name = item.get("companyName", "")
-            
-            # Add "Ltd" if not present
-            if company_name and not (company_name.endswith("Ltd") or company_name.endswith("Limited")):
-                company_name = company_name.strip() + " Ltd"
-
-            results.append({
-                "company_name": company_name,
-                "search_id": search_id,
-                "groww_link": f"https://groww.in/ipo/{search_id}",
-                "is_sme": item.get("isSme", False),
-                "issue_price": str(item.get("issuePrice") or ""),
-                "listing_price": str(item.get("listingPrice") or ""),
-                "listed_on": str(item.get("listingTimestamp") or ""), # This is a timestamp, might need conversion
-                "overall_subscription": str(item.get("overallSubscription") or ""),
-            })
-            
-        return results
+async def scrape_closed_ipos_async(client: Optional[httpx.AsyncClient] = None) -> list:
+    """Async scrape_closed_ipos()."""
+    if client is None:
+        from http_client import get_client
+        client = get_client()
+    try:
+        log.info(f"Fetching closed IPOs from: {CLOSED_IPOS_URL}")
+        resp = await cached_get_async(client.get, CLOSED_IPOS_URL, LIST_FRESH_SECONDS, headers=HEADERS, timeout=30)
+        resp.raise_for_status()
+        return await asyncio.to_thread(_parse_closed_ipos, resp.content)
     except Exception as e:
         log.error(f"Error scraping closed IPOs: {e}")
         return []
 
-def scrape_groww_ipo(url: str) -> dict:
-    """
-    Scrape IPO details from a Groww IPO page.
 
-    Returns dict with keys:
-        listed_on, issue_price, listing_price, issue_size,
-        qib_subscription, nii_subscription, rii_subscription, total_subscription,
-        success, error, warning
-    """
-    result = {
+def _empty_ipo_result() -> dict:
+    return {
         "listed_on": None,
         "issue_price": None,
         "listing_price": None,
@@ -107,104 +174,160 @@ def scrape_groww_ipo(url: str) -> dict:
         "warning": None,
     }
 
+
+def _ipo_sections_soup(content: bytes, encoding: Optional[str] = None) -> tuple:
+    """(ipo_details, subscription, schedule) via BeautifulSoup + html.parser."""
+    soup = BeautifulSoup(content, "html.parser", from_encoding=encoding)
+
+    # ── 1. IPO Details grid ───────────────────────────────────────
+    ipo_details = {}
+    # The user provided a snippet with ipoDetails_detailItem__uFyIn
+    # We'll use a broader regex to match similar classes
+    for item in soup.find_all("div", class_=re.compile(r"ipoDetails_detailItem")):
+        # Label is usually in bodySmall or contentSecondary
+        label_el = item.find("div", class_=re.compile(r"bodySmall|contentSecondary"))
+        # Value is usually in bodyBaseHeavy
+        value_el = item.find("div", class_=re.compile(r"bodyBaseHeavy"))
+
+        if label_el and value_el:
+            label = label_el.get_text(strip=True).lower()
+            value = value_el.get_text(strip=True)
+            if label and value and label != "ipo document":
+                ipo_details[label] = value
+
+    # ── 2. Subscription rates ─────────────────────────────────────
+    subscription = {}
+    for row in soup.find_all("div", class_=re.compile(r"subscription_row__")):
+        spans = row.find_all("span")
+        if len(spans) >= 2:
+            label = spans[0].get_text(strip=True).lower()
+            value = spans[-1].get_text(strip=True)
+            if label and value:
+                subscription[label] = value
+
+    total_row = soup.find("div", class_=re.compile(r"subscription_totalRow"))
+    if total_row:
+        spans = total_row.find_all("span")
+        if len(spans) >= 2:
+            subscription["total"] = spans[-1].get_text(strip=True)
+
+    # ── 3. Schedule (listing date) ────────────────────────────────
+    schedule = {}
+    for step in soup.find_all("div", class_=re.compile(r"ipoSchedule_desktopStepContainer")):
+        info = step.find("div", class_=re.compile(r"ipoSchedule_stepInfoContainer"))
+        if info:
+            date_el = info.find("span", class_=re.compile(r"bodyBase"))
+            label_el = info.find("span", class_=re.compile(r"bodyBaseHeavy"))
+            if date_el and label_el:
+                schedule[label_el.get_text(strip=True).lower()] = date_el.get_text(strip=True)
+
+    return ipo_details, subscription, schedule
+
+
+def _parse_ipo_page(content: bytes, result: dict, encoding: Optional[str] = None) -> dict:
+    """Fill `result` by walking the server-rendered markup of an IPO page."""
+    if fast_html.ENABLED:
+        ipo_details, subscription, schedule = fast_html.groww_sections(content, encoding)
+    else:
+        ipo_details, subscription, schedule = _ipo_sections_soup(content, encoding)
+    log.info(f"IPO details keys found: {list(ipo_details.keys())}")
+    return _finish_ipo_result(_map_ipo_sections(result, ipo_details, subscription, schedule))
+
+
+def _map_ipo_sections(result: dict, ipo_details: dict, subscription: dict, schedule: dict) -> dict:
+    """Map the scraped label → text sections onto the result fields."""
+
+    # Listed On / Listing Date
+    for key in ["tentative listing date", "listing date", "listed on"]:
+        if key in schedule:
+            result["listed_on"] = _format_date(schedule[key])
+            break
+    if not result["listed_on"]:
+        if "listed on" in ipo_details:
+            result["listed_on"] = _format_date(ipo_details["listed on"])
+
+    # Issue Price
+    price_raw = ipo_details.get("price range") or ipo_details.get("issue price")
+    if price_raw:
+        nums = re.findall(r"[\d]+\.?\d*", price_raw.replace(",", ""))
+        if nums:
+            result["issue_price"] = nums[-1]
+
+    # Listing Price (be case-insensitive and check both places)
+    listing_raw = ipo_details.get("listing price") or ipo_details.get("list price")
+    if listing_raw:
+        nums = re.findall(r"[\d]+\.?\d*", listing_raw.replace(",", ""))
+        if nums:
+            result["listing_price"] = nums[0]
+
+    # Issue Size
+    size_raw = ipo_details.get("issue size")
+    if size_raw:
+        result["issue_size"] = size_raw.strip()
+
+    # Subscription rates
+    for key, val in subscription.items():
+        if "qualified" in key or "qib" in key:
+            result["qib_subscription"] = val
+        elif "non-institutional" in key or "nii" in key:
+            result["nii_subscription"] = val
+        elif "retail" in key or "rii" in key:
+            result["rii_subscription"] = val
+        elif key == "total":
+            result["total_subscription"] = val
+
+    return result
+
+
+def _finish_ipo_result(result: dict) -> dict:
+    # Handle missing fields
+    missing = [k for k, v in result.items() if v is None and k not in ["success", "error", "warning"]]
+    if len(missing) > 5: # Arbitrary threshold
+         result["warning"] = "The page structure may have changed — please check the data."
+
+    result["success"] = True
+    return result
+
+
+def scrape_groww_ipo(url: str, timeout: float = 30) -> dict:
+    """
+    Scrape IPO details from a Groww IPO page.
+
+    Returns dict with keys:
+        listed_on, issue_price, listing_price, issue_size,
+        qib_subscription, nii_subscription, rii_subscription, total_subscription,
+        success, error, warning
+    """
+    result = _empty_ipo_result()
+
     try:
         log.info(f"Fetching: {url}")
-        resp = requests.get(url, headers=HEADERS, timeout=30)
+        resp = cached_get(get_session().get, url, PAGE_FRESH_SECONDS, timeout=timeout)
         resp.raise_for_status()
+        _parse_ipo_page(resp.content, result, fast_html.charset(resp.headers.get("Content-Type")))
+    except Exception as e:
+        log.error(f"Error scraping Groww: {e}", exc_info=True)
+        result["error"] = str(e)
+        result["success"] = True # Still success so UI proceeds to manual correction
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # ── 1. IPO Details grid ───────────────────────────────────────
-        ipo_details = {}
-        # The user provided a snippet with ipoDetails_detailItem__uFyIn
-        # We'll use a broader regex to match similar classes
-        for item in soup.find_all("div", class_=re.compile(r"ipoDetails_detailItem")):
-            # Label is usually in bodySmall or contentSecondary
-            label_el = item.find("div", class_=re.compile(r"bodySmall|contentSecondary"))
-            # Value is usually in bodyBaseHeavy
-            value_el = item.find("div", class_=re.compile(r"bodyBaseHeavy"))
-            
-            if label_el and value_el:
-                label = label_el.get_text(strip=True).lower()
-                value = value_el.get_text(strip=True)
-                if label and value and label != "ipo document":
-                    ipo_details[label] = value
-
-        log.info(f"IPO details keys found: {list(ipo_details.keys())}")
-
-        # ── 2. Subscription rates ─────────────────────────────────────
-        subscription = {}
-        for row in soup.find_all("div", class_=re.compile(r"subscription_row__")):
-            spans = row.find_all("span")
-            if len(spans) >= 2:
-                label = spans[0].get_text(strip=True).lower()
-                value = spans[-1].get_text(strip=True)
-                if label and value:
-                    subscription[label] = value
-
-        total_row = soup.find("div", class_=re.compile(r"subscription_totalRow"))
-        if total_row:
-            spans = total_row.find_all("span")
-            if len(spans) >= 2:
-                subscription["total"] = spans[-1].get_text(strip=True)
-
-        # ── 3. Schedule (listing date) ────────────────────────────────
-        schedule = {}
-        for step in soup.find_all("div", class_=re.compile(r"ipoSchedule_desktopStepContainer")):
-            info = step.find("div", class_=re.compile(r"ipoSchedule_stepInfoContainer"))
-            if info:
-                date_el = info.find("span", class_=re.compile(r"bodyBase"))
-                label_el = info.find("span", class_=re.compile(r"bodyBaseHeavy"))
-                if date_el and label_el:
-                    schedule[label_el.get_text(strip=True).lower()] = date_el.get_text(strip=True)
-
-        # ── Map to result ─────────────────────────────────────────────
-
-        # Listed On / Listing Date
-        for key in ["tentative listing date", "listing date", "listed on"]:
-            if key in schedule:
-                result["listed_on"] = _format_date(schedule[key])
-                break
-        if not result["listed_on"]:
-            if "listed on" in ipo_details:
-                result["listed_on"] = _format_date(ipo_details["listed on"])
-
-        # Issue Price
-        price_raw = ipo_details.get("price range") or ipo_details.get("issue price")
-        if price_raw:
-            nums = re.findall(r"[\d]+\.?\d*", price_raw.replace(",", ""))
-            if nums:
-                result["issue_price"] = nums[-1]
-
-        # Listing Price (be case-insensitive and check both places)
-        listing_raw = ipo_details.get("listing price") or ipo_details.get("list price")
-        if listing_raw:
-            nums = re.findall(r"[\d]+\.?\d*", listing_raw.replace(",", ""))
-            if nums:
-                result["listing_price"] = nums[0]
-
-        # Issue Size
-        size_raw = ipo_details.get("issue size")
-        if size_raw:
-            result["issue_size"] = size_raw.strip()
-
-        # Subscription rates
-        for key, val in subscription.items():
-            if "qualified" in key or "qib" in key:
-                result["qib_subscription"] = val
-            elif "non-institutional" in key or "nii" in key:
-                result["nii_subscription"] = val
-            elif "retail" in key or "rii" in key:
-                result["rii_subscription"] = val
-            elif key == "total":
-                result["total_subscription"] = val
-
-        # Handle missing fields
-        missing = [k for k, v in result.items() if v is None and k not in ["success", "error", "warning"]]
-        if len(missing) > 5: # Arbitrary threshold
-             result["warning"] = "The page structure may have changed — please check the data."
-
-        result["success"] = True
+    return result
+
+
+async def scrape_groww_ipo_async(url: str, timeout: float = 30,
+                                 client: Optional[httpx.AsyncClient] = None) -> dict:
+    """Async scrape_groww_ipo(); same result shape and error handling."""
+    if client is None:
+        from http_client import get_client
+        client = get_client()
+    result = _empty_ipo_result()
+
+    try:
+        log.info(f"Fetching: {url}")
+        resp = await cached_get_async(client.get, url, PAGE_FRESH_SECONDS, headers=HEADERS, timeout=timeout)
+        resp.raise_for_status()
+        await asyncio.to_thread(
+            _parse_ipo_page, resp.content, result, fast_html.charset(resp.headers.get("Content-Type"))
+        )
     except Exception as e:
         log.error(f"Error scraping Groww: {e}", exc_info=True)
         result["error"] = str(e)
@@ -227,6 +350,10 @@ def _format_date(raw: str) -> Optional[str]:
         except:
             return raw
             
+    iso = re.match(r"(\d{4})-(\d{2})-(\d{2})", raw)
+    if iso:
+        return f"{iso.group(3)}-{iso.group(2)}-{iso.group(1)}"
+
     m = re.match(r"(\d{1,2})\s+([A-Za-z]{3})\s+[']?(\d{2,4})", raw)
     if m:
         day = m.group(1).zfill(2)
@@ -0,0 +1,261 @@
+"""
+On-disk HTTP cache for the HTML pages the scrapers download.
+
+Bodies and their validators (ETag / Last-Modified) are stored under
+HTTP_CACHE_DIR. A cached page younger than the caller's freshness window
+is served without touching the network; an older one is revalidated
+with If-None-Match / If-Modified-Since, so an unchanged page costs a 304
+instead of a full download. Pages without validators are simply
+re-fetched once stale. The directory is kept under HTTP_CACHE_MAX_BYTES
+by evicting the least recently used pages.
+
+Only successful (200) GETs are stored; anything else is passed through
+untouched so callers' error handling sees the real response.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional
+
+from requests.structures import CaseInsensitiveDict
+
+log = logging.getLogger(__name__)
+
+_KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class CachedResponse:
+    """The parts of a requests/httpx response the scrapers read."""
+
+    status_code = 200
+
+    def __init__(self, url: str, content: bytes, headers: dict, from_cache: bool):
+        self.url = url
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers)
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        return None
+
+
+class HttpCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.environ.get(
+            "HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ipo_http_cache")
+        )
+        self.max_bytes = max_bytes or int(os.environ.get("HTTP_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+        self.hits = 0         # served fresh, no request
+        self.revalidated = 0  # 304 Not Modified
+        self.misses = 0       # full download
+        self.evictions = 0
+        self._index: Optional[dict] = None  # key -> [size_bytes, last_used]
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    # ── storage ───────────────────────────────────────────────────
+
+    @staticmethod
+    def key(url: str, params: Optional[dict] = None) -> str:
+        blob = url + "?" + json.dumps(params or {}, sort_keys=True, default=str)
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _ensure_index(self) -> dict:
+        if self._index is None:
+            self._index = {}
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for name in os.listdir(self.directory):
+                    if name.endswith(".body"):
+                        stat = os.stat(os.path.join(self.directory, name))
+                        self._index[name[:-5]] = [stat.st_size, stat.st_mtime]
+            except OSError as e:
+                log.warning(f"HTTP cache directory unavailable: {e}")
+        return self._index
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Stored entry ({url, headers, stored_at, content}) or None."""
+        with self._lock:
+            if key not in self._ensure_index():
+                return None
+        try:
+            with open(self._path(key, "json")) as f:
+                entry = json.load(f)
+            with open(self._path(key, "body"), "rb") as f:
+                entry["content"] = f.read()
+        except (OSError, ValueError):
+            self._drop(key)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index[key][1] = time.time()
+        return entry
+
+    def store(self, key: str, url: str, headers, content: bytes) -> None:
+        meta = {
+            "url": url,
+            "headers": {h: headers[h] for h in _KEPT_HEADERS if headers.get(h)},
+            "stored_at": time.time(),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for ext, data, mode in (("body", content, "wb"), ("json", json.dumps(meta), "w")):
+                tmp = f"{self._path(key, ext)}.{os.getpid()}.{threading.get_ident()}"
+                with open(tmp, mode) as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key, ext))
+        except OSError as e:
+            log.warning(f"Could not cache {url}: {e}")
+            return
+        with self._lock:
+            self._ensure_index()[key] = [len(content), time.time()]
+            self._evict_locked()
+
+    def refresh(self, key: str, entry: dict, headers) -> None:
+        """Record a successful revalidation (304), picking up new validators."""
+        entry = dict(entry)
+        content = entry.pop("content")
+        merged = dict(entry["headers"])
+        merged.update({h: headers[h] for h in _KEPT_HEADERS if headers.get(h)})
+        self.store(key, entry["url"], merged, content)
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            self._ensure_index().pop(key, None)
+        for ext in ("body", "json"):
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
+
+    def _evict_locked(self) -> None:
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            for ext in ("body", "json"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            del self._index[key]
+            total -= size
+            self.evictions += 1
+
+    # ── request policy ────────────────────────────────────────────
+
+    @staticmethod
+    def is_fresh(entry: dict, fresh_for: float) -> bool:
+        return time.time() - entry["stored_at"] < fresh_for
+
+    @staticmethod
+    def validators(entry: dict) -> dict:
+        headers = {}
+        if entry["headers"].get("etag"):
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def stats(self) -> dict:
+        requests_seen = self.hits + self.revalidated + self.misses
+        with self._lock:
+            index = self._ensure_index()
+            stored_bytes = sum(size for size, _ in index.values())
+            entries = len(index)
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.revalidated) / requests_seen, 3) if requests_seen else None,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": stored_bytes,
+        }
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def stats() -> Optional[dict]:
+    """Stats of the process cache, or None if nothing has used it yet."""
+    return _cache.stats() if _cache is not None else None
+
+
+def cached_get(get, url: str, fresh_for: float, params: Optional[dict] = None,
+               headers: Optional[dict] = None, **kwargs):
+    """
+    GET `url` through the cache.
+
+    Args:
+        get: the underlying fetch, e.g. session.get (called as
+             get(url, params=..., headers=..., **kwargs))
+        fresh_for: seconds a stored page is served without revalidation
+    """
+    cache = get_cache()
+    key = cache.key(url, params)
+    entry = cache.lookup(key)
+    if entry is not None and cache.is_fresh(entry, fresh_for):
+        cache.count("hits")
+        return CachedResponse(url, entry["content"], entry["headers"], from_cache=True)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(cache.validators(entry))
+    resp = get(url, params=params, headers=request_headers, **kwargs)
+    return _settle(cache, key, url, entry, resp)
+
+
+async def cached_get_async(get, url: str, fresh_for: float, params: Optional[dict] = None,
+                           headers: Optional[dict] = None, **kwargs):
+    """cached_get() for an async fetch such as httpx.AsyncClient.get."""
+    cache = get_cache()
+    key = cache.key(url, params)
+    entry = await asyncio.to_thread(cache.lookup, key)
+    if entry is not None and cache.is_fresh(entry, fresh_for):
+        cache.count("hits")
+        return CachedResponse(url, entry["content"], entry["headers"], from_cache=True)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(cache.validators(entry))
+    resp = await get(url, params=params, headers=request_headers, **kwargs)
+    return await asyncio.to_thread(_settle, cache, key, url, entry, resp)
+
+
+def _settle(cache: HttpCache, key: str, url: str, entry: Optional[dict], resp):
+    """Turn the network response into what the caller sees, updating the cache."""
+    if resp.status_code == 304 and entry is not None:
+        cache.count("revalidated")
+        cache.refresh(key, entry, resp.headers)
+        return CachedResponse(url, entry["content"], entry["headers"], from_cache=True)
+    cache.count("misses")
+    if resp.status_code == 200:
+        cache.store(key, url, resp.headers, resp.content)
+    return resp
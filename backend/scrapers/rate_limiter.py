@@ -0,0 +1,140 @@
+"""
+Per-host token-bucket rate limiter shared by the scrapers.
+
+Each host gets its own bucket that refills at `rate` tokens per second up to
+`capacity`. Callers block in `acquire()` until a token is available, which
+replaces the old blanket `time.sleep(1)` between requests while still letting
+bursts through when a host has been idle. `throttle_async()` waits on the
+same buckets without blocking the event loop.
+
+Buckets adapt to the host: `penalize()` (on a 429) halves the rate and
+honours Retry-After by pausing the bucket, and `reward()` (on a success)
+climbs back towards the configured rate in small additive steps.
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.base_rate = rate
+        self.min_rate = rate / 16
+        self.capacity = capacity
+        self.penalties = 0
+        self._tokens = capacity
+        self._paused_until = 0.0
+        self._penalized_at = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> float:
+        """Consume a token if one is available; otherwise return the wait in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def penalize(self, retry_after: float = None) -> None:
+        """
+        The host pushed back (429): halve the rate and pause for `retry_after`
+        seconds. A burst of 429s from requests already in flight halves it once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+            self.penalties += 1
+            if now - self._penalized_at >= 1.0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._penalized_at = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def reconfigure(self, rate: float, capacity: float) -> None:
+        """Replace the configured rate and burst (clears any adaptive slowdown)."""
+        with self._lock:
+            self._refill()
+            self.rate = self.base_rate = rate
+            self.min_rate = rate / 16
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def reward(self) -> None:
+        """A request succeeded: recover 5% of the configured rate."""
+        if self.rate >= self.base_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+    def acquire(self) -> None:
+        """Block until one token is available, then consume it."""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Like acquire(), but sleeps on the event loop instead of the thread."""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_buckets: dict = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host: str, rate: float, capacity: float) -> TokenBucket:
+    """Return the bucket for `host`, creating it on first use."""
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            _buckets[host] = bucket
+        return bucket
+
+
+def configure(host: str, rate: float, capacity: float) -> TokenBucket:
+    """Set `host`'s rate and burst, whether or not its bucket exists yet."""
+    bucket = get_bucket(host, rate, capacity)
+    bucket.reconfigure(rate, capacity)
+    return bucket
+
+
+def current_rates() -> dict:
+    """host -> {rate, base_rate, penalties} for every bucket in use."""
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {
+        host: {"rate": round(b.rate, 3), "base_rate": b.base_rate, "penalties": b.penalties}
+        for host, b in buckets.items()
+    }
+
+
+def throttle(url: str, rate: float, capacity: float) -> None:
+    """Wait for a token from the bucket of the host that `url` points at."""
+    get_bucket(urlparse(url).netloc, rate, capacity).acquire()
+
+
+async def throttle_async(url: str, rate: float, capacity: float) -> None:
+    """Async counterpart of throttle()."""
+    await get_bucket(urlparse(url).netloc, rate, capacity).acquire_async()
@@ -0,0 +1,142 @@
+"""
+Persistent company-name → screener.in URL resolution cache.
+
+Resolving a stored company name to its screener.in page costs one call to
+/api/company/search/ per lookup. Those answers almost never change, so they
+are kept in the `company_resolutions` Supabase table (see sql/schema.sql)
+and mirrored in memory. Rows expire after a TTL; "no company found" answers
+are cached too, with a shorter TTL of their own.
+
+If the database is not configured the cache silently degrades to
+in-process memory only.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+TABLE = "company_resolutions"
+
+_SUFFIX_RE = re.compile(r"\s+(ltd|limited)$")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_company_name(name: str) -> str:
+    """Canonical cache key: lowercase, punctuation-free, no trailing Ltd/Limited."""
+    key = _NON_ALNUM_RE.sub(" ", (name or "").lower()).strip()
+    return _SUFFIX_RE.sub("", key)
+
+
+class ResolutionCache:
+    """Two-level (memory + Supabase) cache of company search results."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, negative_ttl_seconds: Optional[float] = None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get("RESOLUTION_CACHE_TTL", 30 * 24 * 3600)
+        )
+        self.negative_ttl = negative_ttl_seconds if negative_ttl_seconds is not None else float(
+            os.environ.get("RESOLUTION_CACHE_NEGATIVE_TTL", 24 * 3600)
+        )
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict = {}  # key -> (found_name, company_url, resolved_at_epoch)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._db = None
+
+    # ── persistence ───────────────────────────────────────────────
+
+    def _table(self):
+        if self._db is None:
+            try:
+                from database import get_db
+                self._db = get_db()
+            except Exception as e:
+                log.warning(f"Resolution cache running memory-only: {e}")
+                self._db = False
+        return self._db.table(TABLE) if self._db else None
+
+    def _load(self) -> None:
+        """Pull every persisted resolution into memory in one round trip."""
+        self._loaded = True
+        table = self._table()
+        if table is None:
+            return
+        try:
+            rows = table.select("name_key, found_name, company_url, resolved_at").execute().data
+        except Exception as e:
+            log.warning(f"Could not load resolution cache: {e}")
+            return
+        for row in rows:
+            resolved_at = datetime.fromisoformat(row["resolved_at"]).timestamp()
+            self._entries[row["name_key"]] = (row.get("found_name"), row.get("company_url"), resolved_at)
+        log.info(f"Loaded {len(rows)} cached company resolutions")
+
+    def _persist(self, key: str, found_name: Optional[str], company_url: Optional[str]) -> None:
+        table = self._table()
+        if table is None:
+            return
+        try:
+            table.upsert({
+                "name_key": key,
+                "found_name": found_name,
+                "company_url": company_url,
+                "resolved_at": datetime.now(timezone.utc).isoformat(),
+            }, on_conflict="name_key").execute()
+        except Exception as e:
+            log.warning(f"Could not persist resolution for {key}: {e}")
+
+    # ── public API ────────────────────────────────────────────────
+
+    def lookup(self, company_name: str) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Returns (hit, found_name, company_url).
+        A hit with found_name=None is a cached "no company found".
+        """
+        key = normalize_company_name(company_name)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is not None:
+                found_name, company_url, resolved_at = entry
+                ttl = self.ttl if company_url else self.negative_ttl
+                if time.time() - resolved_at < ttl:
+                    self.hits += 1
+                    return True, found_name, company_url
+                del self._entries[key]
+            self.misses += 1
+        return False, None, None
+
+    def store(self, company_name: str, found_name: Optional[str], company_url: Optional[str]) -> None:
+        """Record a search result; pass None/None to cache a negative answer."""
+        key = normalize_company_name(company_name)
+        with self._lock:
+            self._entries[key] = (found_name, company_url, time.time())
+        self._persist(key, found_name, company_url)
+
+    def invalidate(self, company_name: str) -> None:
+        """Forget a resolution, e.g. when its URL started returning errors."""
+        key = normalize_company_name(company_name)
+        with self._lock:
+            self._entries.pop(key, None)
+        table = self._table()
+        if table is not None:
+            try:
+                table.delete().eq("name_key", key).execute()
+            except Exception as e:
+                log.warning(f"Could not invalidate resolution for {key}: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._entries),
+        }
@@ -1,8 +1,24 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import functools
+import threading
+import httpx
 import requests
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
 import re
 import logging
-import time
+
+from scrapers import fast_html
+from scrapers.circuit_breaker import CircuitOpenError, get_breaker
+from scrapers.http_cache import cached_get, cached_get_async
+from scrapers.rate_limiter import configure, get_bucket, throttle, throttle_async
+from scrapers.resolution_cache import ResolutionCache
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
@@ -14,55 +30,217 @@ class StockScraper:
     BASE_URL = "https://www.screener.in"
     SEARCH_URL = "https://www.screener.in/api/company/search/"
 
-    def __init__(self, headless=False):
+    # Concurrency / politeness knobs for bulk CMP fetching
+    MAX_WORKERS = int(os.environ.get("SCREENER_MAX_WORKERS", "6"))
+    RATE_PER_SEC = float(os.environ.get("SCREENER_RATE_PER_SEC", "3"))
+    RATE_BURST = float(os.environ.get("SCREENER_RATE_BURST", "6"))
+
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/122.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+    }
+    # httpx negotiates its own encodings, and HTTP/2 forbids connection headers
+    ASYNC_HEADERS = {k: v for k, v in HEADERS.items() if k not in ("Accept-Encoding", "Connection")}
+    SEARCH_HEADERS = {
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": BASE_URL + "/",
+    }
+    PAGE_HEADERS = {"Referer": BASE_URL + "/"}
+
+    # Session cookies from the homepage visit are saved here and reused by
+    # later processes (warm serverless instances share /tmp) until they age out
+    COOKIE_FILE = os.environ.get(
+        "SCREENER_COOKIE_FILE", os.path.join(tempfile.gettempdir(), "screener_cookies.json")
+    )
+    COOKIE_TTL = float(os.environ.get("SCREENER_COOKIE_TTL", 6 * 3600))
+
+    # Company pages are served from the HTTP cache this long before refetching
+    PAGE_FRESH_SECONDS = float(os.environ.get("SCREENER_PAGE_FRESH", "60"))
+
+    def __init__(self, headless=False, resolution_cache: ResolutionCache = None,
+                 rate_per_sec: float = None, rate_burst: float = None):
+        self.resolutions = resolution_cache or ResolutionCache()
+        if rate_per_sec is not None or rate_burst is not None:
+            # Per-instance budget (e.g. one shard's share); the host bucket is
+            # process-wide, so it is reset to match
+            self.RATE_PER_SEC = rate_per_sec if rate_per_sec is not None else self.RATE_PER_SEC
+            self.RATE_BURST = rate_burst if rate_burst is not None else self.RATE_BURST
+            configure(urlparse(self.BASE_URL).netloc, self.RATE_PER_SEC, self.RATE_BURST)
         self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/122.0.0.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.MAX_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.HEADERS)
+        # Cookie priming is deferred to the first request
+        self._primed = False
+        self._prime_lock = threading.Lock()
+        self._prime_task = None
+
+    # ── session cookies ───────────────────────────────────────────
+
+    def _load_cookies(self) -> dict:
+        try:
+            with open(self.COOKIE_FILE) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if time.time() - saved.get("saved_at", 0) >= self.COOKIE_TTL:
+            return {}
+        return saved.get("cookies") or {}
+
+    def _save_cookies(self, cookies: dict) -> None:
+        if not cookies:
+            return
         try:
-            self.session.get(self.BASE_URL, timeout=10)
+            tmp = f"{self.COOKIE_FILE}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+            os.replace(tmp, self.COOKIE_FILE)
+        except OSError as e:
+            log.warning(f"Could not persist screener.in cookies: {e}")
+
+    def _ensure_primed(self) -> None:
+        """Load saved cookies, or visit the homepage once to get fresh ones."""
+        if self._primed:
+            return
+        with self._prime_lock:
+            if self._primed:
+                return
+            self._primed = True
+            cookies = self._load_cookies()
+            if cookies:
+                self.session.cookies.update(cookies)
+                return
+            try:
+                throttle(self.BASE_URL, self.RATE_PER_SEC, self.RATE_BURST)
+                self.session.get(self.BASE_URL, timeout=10)
+                self._save_cookies(self.session.cookies.get_dict())
+                log.info("Session initialized with screener.in cookies")
+            except Exception as e:
+                log.warning(f"Could not prime session: {e}")
+
+    async def _ensure_primed_async(self, client: httpx.AsyncClient) -> None:
+        if self._primed:
+            return
+        # Concurrent first requests wait on a single priming visit
+        if self._prime_task is None:
+            self._prime_task = asyncio.ensure_future(self._prime_async(client))
+        await asyncio.shield(self._prime_task)
+
+    async def _prime_async(self, client: httpx.AsyncClient) -> None:
+        try:
+            cookies = await asyncio.to_thread(self._load_cookies)
+            if cookies:
+                self.session.cookies.update(cookies)
+                return
+            await throttle_async(self.BASE_URL, self.RATE_PER_SEC, self.RATE_BURST)
+            resp = await client.get(self.BASE_URL, headers=self.ASYNC_HEADERS, timeout=10)
+            self.session.cookies.update(dict(resp.cookies))
+            await asyncio.to_thread(self._save_cookies, self.session.cookies.get_dict())
             log.info("Session initialized with screener.in cookies")
         except Exception as e:
             log.warning(f"Could not prime session: {e}")
+        finally:
+            self._primed = True
+
+    # ── circuit breaker / adaptive rate ───────────────────────────
+
+    @staticmethod
+    def _retry_after(headers) -> float:
+        """Seconds from a Retry-After header (delta-seconds form only), capped at 5 min."""
+        try:
+            return min(300.0, max(0.0, float(headers.get("Retry-After", ""))))
+        except ValueError:
+            return 0.0
+
+    def _observe(self, url: str, breaker, status: int, headers, latency: float) -> None:
+        """Feed one response into the host's circuit breaker and token bucket."""
+        if status == 429:
+            get_bucket(urlparse(url).netloc, self.RATE_PER_SEC, self.RATE_BURST).penalize(
+                self._retry_after(headers)
+            )
+            breaker.record(False, latency, "HTTP 429")
+        elif status >= 500:
+            breaker.record(False, latency, f"HTTP {status}")
+        else:
+            breaker.record(True, latency)
+            if status < 400:
+                get_bucket(urlparse(url).netloc, self.RATE_PER_SEC, self.RATE_BURST).reward()
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET through the shared session, waiting on the per-host rate limiter.
+        Raises CircuitOpenError without touching the network while the
+        host's circuit is open.
+        """
+        self._ensure_primed()
+        breaker = get_breaker(urlparse(url).netloc)
+        breaker.before_call()
+        throttle(url, self.RATE_PER_SEC, self.RATE_BURST)
+        started = time.monotonic()
+        try:
+            resp = self.session.get(url, **kwargs)
+        except Exception as e:
+            breaker.record(False, time.monotonic() - started, type(e).__name__)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        self._observe(url, breaker, resp.status_code, resp.headers, time.monotonic() - started)
+        return resp
 
     def _search_company(self, company_name: str):
-        search_resp = self.session.get(
+        hit, found_name, company_url = self.resolutions.lookup(company_name)
+        if hit:
+            return found_name, company_url
+
+        search_resp = self._get(
             self.SEARCH_URL,
             params={"q": company_name, "v": "3", "fts": "1"},
-            headers={
-                "Accept": "application/json, text/javascript, */*; q=0.01",
-                "X-Requested-With": "XMLHttpRequest",
-                "Referer": self.BASE_URL + "/",
-            },
+            headers=self.SEARCH_HEADERS,
             timeout=15,
         )
         search_resp.raise_for_status()
-        results = search_resp.json()
+        return self._resolve(company_name, search_resp.json())
+
+    def _resolve(self, company_name: str, results: list):
+        """Pick the first search hit and remember the resolution."""
         if not results:
+            self.resolutions.store(company_name, None, None)
             return None, None
         company = results[0]
         company_url = self.BASE_URL + company["url"]
         found_name = company.get("name", company_name)
         log.info(f"Found: {found_name} → {company_url}")
+        self.resolutions.store(company_name, found_name, company_url)
         return found_name, company_url
 
-    def _fetch_page(self, url: str) -> BeautifulSoup:
-        page_resp = self.session.get(
-            url,
-            headers={"Referer": self.BASE_URL + "/"},
-            timeout=20,
-        )
+    def _fetch_page(self, url: str) -> dict:
+        page_resp = cached_get(self._get, url, self.PAGE_FRESH_SECONDS, headers=self.PAGE_HEADERS, timeout=20)
         page_resp.raise_for_status()
-        return BeautifulSoup(page_resp.text, "html.parser")
+        return self._parse_page(page_resp.content, fast_html.charset(page_resp.headers.get("Content-Type")))
+
+    def _parse_page(self, content: bytes, encoding: str = None) -> dict:
+        """Extract {ratios, price, description} from a company page's raw bytes."""
+        if fast_html.ENABLED:
+            return fast_html.screener_page(content, encoding)
+        return self._parse_page_soup(content, encoding)
+
+    def _parse_page_soup(self, content: bytes, encoding: str = None) -> dict:
+        soup = BeautifulSoup(content, "html.parser", from_encoding=encoding)
+        return {
+            "ratios": self._extract_top_ratios(soup),
+            "price": self._extract_price(soup),
+            "description": self._extract_description(soup),
+        }
 
     def _parse_number(self, raw: str):
         if not raw:
@@ -155,12 +333,23 @@ class StockScraper:
         return {
             "company_name": result["company_name"],
             "price": result["price"],
+            "high": result["high"],
+            "low": result["low"],
             "success": result["success"],
             "error": result["error"],
         }
 
-    def scrape_stock_details(self, company_name: str) -> dict:
-        base_result = {
+    @staticmethod
+    def _failed_price(company_name: str, error: BaseException) -> dict:
+        """scrape_stock_price()'s result shape for a company whose scrape raised."""
+        return {
+            "company_name": company_name, "price": None, "high": None, "low": None,
+            "success": False, "error": str(error),
+        }
+
+    @staticmethod
+    def _empty_details(company_name: str) -> dict:
+        return {
             "company_name": company_name,
             "price": None,
             "high": None,
@@ -173,6 +362,50 @@ class StockScraper:
             "error": None,
         }
 
+    def _fill_details(self, base_result: dict, found_name: str, page: dict) -> dict:
+        """Populate `base_result` from a parsed company page (see _parse_page)."""
+        base_result["company_name"] = found_name
+        ratios = page["ratios"]
+        log.info(f"Top-ratio labels found: {list(ratios.keys())}")
+
+        price = page["price"]
+        base_result["price"] = price
+
+        high, low = self._extract_high_low(ratios)
+        base_result["high"] = high
+        base_result["low"] = low
+
+        for key, val in ratios.items():
+            if "market cap" in key.lower() or "mkt cap" in key.lower():
+                base_result["market_cap"] = val
+                break
+
+        for key, val in ratios.items():
+            if key.strip().upper() == "ROE":
+                base_result["roe"] = val
+                break
+
+        for key, val in ratios.items():
+            if key.strip().upper() == "ROCE":
+                base_result["roce"] = val
+                break
+
+        base_result["description"] = page["description"]
+
+        if price is None:
+            base_result["error"] = "Could not extract current price from screener.in page"
+        else:
+            base_result["success"] = True
+
+        log.info(
+            f"{found_name}: price={price}, high={high}, low={low}, "
+            f"mkt_cap={base_result['market_cap']}, roe={base_result['roe']}, roce={base_result['roce']}"
+        )
+        return base_result
+
+    def scrape_stock_details(self, company_name: str) -> dict:
+        base_result = self._empty_details(company_name)
+
         try:
             found_name, company_url = self._search_company(company_name)
             if not found_name:
@@ -180,62 +413,153 @@ class StockScraper:
                 return base_result
 
             base_result["company_name"] = found_name
-            soup = self._fetch_page(company_url)
-            ratios = self._extract_top_ratios(soup)
-            log.info(f"Top-ratio labels found: {list(ratios.keys())}")
-
-            price = self._extract_price(soup)
-            base_result["price"] = price
-
-            high, low = self._extract_high_low(ratios)
-            base_result["high"] = high
-            base_result["low"] = low
-
-            for key, val in ratios.items():
-                if "market cap" in key.lower() or "mkt cap" in key.lower():
-                    base_result["market_cap"] = val
-                    break
-
-            for key, val in ratios.items():
-                if key.strip().upper() == "ROE":
-                    base_result["roe"] = val
-                    break
-
-            for key, val in ratios.items():
-                if key.strip().upper() == "ROCE":
-                    base_result["roce"] = val
-                    break
-
-            base_result["description"] = self._extract_description(soup)
-
-            if price is None:
-                base_result["error"] = "Could not extract current price from screener.in page"
-            else:
-                base_result["success"] = True
-
-            log.info(
-                f"{found_name}: price={price}, high={high}, low={low}, "
-                f"mkt_cap={base_result['market_cap']}, roe={base_result['roe']}, roce={base_result['roce']}"
-            )
-            return base_result
+            page = self._fetch_page(company_url)
+            return self._fill_details(base_result, found_name, page)
 
         except requests.exceptions.ConnectionError as e:
             base_result["error"] = f"Connection error reaching screener.in: {e}"
         except requests.exceptions.Timeout:
             base_result["error"] = "Request to screener.in timed out — try again shortly"
         except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                # The cached URL may be stale (renamed / delisted company)
+                self.resolutions.invalidate(company_name)
             base_result["error"] = f"HTTP error from screener.in: {e}"
+        except CircuitOpenError as e:
+            base_result["error"] = str(e)
         except Exception as e:
             log.error(f"Unexpected error scraping {company_name}: {e}")
             base_result["error"] = str(e)
 
         return base_result
 
+    def _safe_scrape_price(self, company_name: str) -> dict:
+        # scrape_stock_details already traps request errors; this guards the
+        # pool against anything else so one company cannot sink the batch.
+        try:
+            return self.scrape_stock_price(company_name)
+        except Exception as e:
+            log.error(f"Unexpected error scraping {company_name}: {e}")
+            return self._failed_price(company_name, e)
+
     def scrape_multiple_stocks(self, company_names: list) -> list:
-        results = []
-        for i, name in enumerate(company_names):
-            result = self.scrape_stock_price(name)
-            results.append(result)
-            if i < len(company_names) - 1:
-                time.sleep(1)
-        return results
+        """
+        Fetch CMPs for many companies concurrently.
+        Requests are paced by the per-host token bucket; results come back
+        in the same order as `company_names`.
+        """
+        if not company_names:
+            return []
+        workers = max(1, min(self.MAX_WORKERS, len(company_names)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._safe_scrape_price, company_names))
+
+    # ── Async variants (shared httpx.AsyncClient, see http_client.py) ──
+    # Same rate limiter, resolution cache and parsing as the sync path.
+    # Cache lookups and HTML parsing run in worker threads so a slow
+    # Supabase call or a large page never stalls the event loop.
+
+    async def _aget(self, client: httpx.AsyncClient, url: str, headers: dict = None, **kwargs) -> httpx.Response:
+        await self._ensure_primed_async(client)
+        breaker = get_breaker(urlparse(url).netloc)
+        breaker.before_call()
+        await throttle_async(url, self.RATE_PER_SEC, self.RATE_BURST)
+        cookies = self.session.cookies.get_dict()
+        merged = {**self.ASYNC_HEADERS, **(headers or {})}
+        if cookies:
+            merged["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        started = time.monotonic()
+        try:
+            resp = await client.get(url, headers=merged, **kwargs)
+        except Exception as e:
+            breaker.record(False, time.monotonic() - started, type(e).__name__)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        self._observe(url, breaker, resp.status_code, resp.headers, time.monotonic() - started)
+        return resp
+
+    async def _search_company_async(self, client: httpx.AsyncClient, company_name: str):
+        hit, found_name, company_url = await asyncio.to_thread(self.resolutions.lookup, company_name)
+        if hit:
+            return found_name, company_url
+
+        search_resp = await self._aget(
+            client,
+            self.SEARCH_URL,
+            params={"q": company_name, "v": "3", "fts": "1"},
+            headers=self.SEARCH_HEADERS,
+            timeout=15,
+        )
+        search_resp.raise_for_status()
+        return await asyncio.to_thread(self._resolve, company_name, search_resp.json())
+
+    async def scrape_stock_details_async(self, company_name: str, client: httpx.AsyncClient = None) -> dict:
+        if client is None:
+            from http_client import get_client
+            client = get_client()
+        base_result = self._empty_details(company_name)
+
+        try:
+            found_name, company_url = await self._search_company_async(client, company_name)
+            if not found_name:
+                base_result["error"] = f'No company found matching "{company_name}" on screener.in'
+                return base_result
+
+            base_result["company_name"] = found_name
+            page_resp = await cached_get_async(
+                functools.partial(self._aget, client), company_url, self.PAGE_FRESH_SECONDS,
+                headers=self.PAGE_HEADERS, timeout=20,
+            )
+            page_resp.raise_for_status()
+            page = await asyncio.to_thread(
+                self._parse_page, page_resp.content, fast_html.charset(page_resp.headers.get("Content-Type"))
+            )
+            return self._fill_details(base_result, found_name, page)
+
+        except httpx.TimeoutException:
+            base_result["error"] = "Request to screener.in timed out — try again shortly"
+        except httpx.TransportError as e:
+            base_result["error"] = f"Connection error reaching screener.in: {e}"
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                await asyncio.to_thread(self.resolutions.invalidate, company_name)
+            base_result["error"] = f"HTTP error from screener.in: {e}"
+        except CircuitOpenError as e:
+            base_result["error"] = str(e)
+        except Exception as e:
+            log.error(f"Unexpected error scraping {company_name}: {e}")
+            base_result["error"] = str(e)
+
+        return base_result
+
+    async def scrape_stock_price_async(self, company_name: str, client: httpx.AsyncClient = None) -> dict:
+        result = await self.scrape_stock_details_async(company_name, client)
+        return {
+            "company_name": result["company_name"],
+            "price": result["price"],
+            "high": result["high"],
+            "low": result["low"],
+            "success": result["success"],
+            "error": result["error"],
+        }
+
+    async def scrape_multiple_stocks_async(self, company_names: list, client: httpx.AsyncClient = None) -> list:
+        """
+        Async scrape_multiple_stocks(): at most MAX_WORKERS companies in
+        flight, paced by the same token bucket, results in input order.
+        """
+        if not company_names:
+            return []
+        semaphore = asyncio.Semaphore(self.MAX_WORKERS)
+
+        async def one(name: str) -> dict:
+            async with semaphore:
+                try:
+                    return await self.scrape_stock_price_async(name, client)
+                except Exception as e:
+                    log.error(f"Unexpected error scraping {name}: {e}")
+                    return self._failed_price(name, e)
+
+        return list(await asyncio.gather(*(one(n) for n in company_names)))
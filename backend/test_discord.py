@@ -1,8 +1,11 @@
 
 import os
+import json
 import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from dotenv import load_dotenv
-from discord_notifier import send_discord_alert, send_cron_summary
+from discord_notifier import send_discord_alert, send_cron_summary, dispatch_alerts
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -33,5 +36,58 @@ def test_discord():
     send_cron_summary(total_checked=10, alerts_sent=2)
     print("✅ Summary sent (check your Discord channel).")
 
+class _StubWebhook(BaseHTTPRequestHandler):
+    """Local stand-in for a Discord webhook: rate-limits the first POST, then accepts."""
+    messages = []
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            type(self).calls += 1
+            first = type(self).calls == 1
+            if not first:
+                type(self).messages.append(body)
+        if first:
+            self._reply(429, {"message": "You are being rate limited.", "retry_after": 0.2, "global": False})
+        else:
+            self._reply(204, None, {"X-RateLimit-Remaining": "4", "X-RateLimit-Reset-After": "0.1"})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_dispatch_with_stub_webhook():
+    print("\n--- Testing batched dispatch against a local stub webhook ---")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubWebhook)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        alerts = [
+            {"company_name": f"Stub Co {i}", "sector": "Testing", "cmp": 100 + i,
+             "issue_price": 90, "pct_vs_issue": 11.1, "reasons": ["🟢 stub"]}
+            for i in range(23)
+        ]
+        statuses = dispatch_alerts(alerts, webhook_url=f"http://127.0.0.1:{server.server_port}/webhook")
+    finally:
+        server.shutdown()
+
+    assert [s["company_name"] for s in statuses] == [a["company_name"] for a in alerts]
+    assert all(s["sent"] for s in statuses), statuses
+    assert sorted(len(m["embeds"]) for m in _StubWebhook.messages) == [3, 10, 10]
+    print(f"✅ {len(statuses)} alerts delivered in {len(_StubWebhook.messages)} messages (after one 429).")
+
+
 if __name__ == "__main__":
     test_discord()
+    test_dispatch_with_stub_webhook()
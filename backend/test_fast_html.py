@@ -0,0 +1,42 @@
+import os
+
+from scrapers import fast_html
+from scrapers.groww_scraper import _ipo_sections_soup
+from scrapers.screener_scraper import StockScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _page(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _screener_soup(page: bytes, encoding: str = None) -> dict:
+    return StockScraper.__new__(StockScraper)._parse_page_soup(page, encoding)
+
+
+def test_screener_page_matches_soup():
+    page = _page("screener_company.html")
+    expected = _screener_soup(page)
+    assert fast_html.screener_page(page) == expected
+    assert expected["price"] and expected["ratios"] and expected["description"]
+
+
+def test_groww_sections_match_soup():
+    page = _page("groww_ipo.html")
+    expected = _ipo_sections_soup(page)
+    assert fast_html.groww_sections(page) == expected
+    assert all(expected)
+
+
+def test_undeclared_encoding_decodes_like_soup():
+    # No Content-Type charset and no <meta charset>: both paths must detect UTF-8
+    page = _page("screener_company.html").replace(b'<meta charset="UTF-8">', b"")
+    assert b"charset" not in page.split(b"</head>")[0].lower()
+    expected = _screener_soup(page)
+    assert fast_html.screener_page(page) == expected
+    assert fast_html.groww_sections(page) == _ipo_sections_soup(page)
+
+    rupee = "<html><body><div class='about'><p>Priced at ₹1,287 per share on listing day.</p></div></body></html>"
+    assert fast_html.screener_page(rupee.encode())["description"] == "Priced at ₹1,287 per share on listing day."
@@ -0,0 +1,84 @@
+import ipo_catalog
+from scrapers import groww_scraper
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Table:
+    """Just enough of a PostgREST table for refresh_catalog()."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.upserted = []
+
+    def select(self, *_):
+        return self
+
+    def order(self, *_):
+        return self
+
+    def range(self, start, end):
+        self._page = self.rows[start:end + 1]
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self.upserted.extend(rows)
+        self._page = rows
+        return self
+
+    def execute(self):
+        return _Result(self._page)
+
+
+class _Db:
+    def __init__(self, rows=()):
+        self.catalog = _Table(list(rows))
+
+    def table(self, name):
+        assert name == ipo_catalog.TABLE
+        return self.catalog
+
+
+LISTING = [{
+    "company_name": "Foo Industries", "search_id": "foo-industries-ipo",
+    "groww_link": "https://groww.in/ipo/foo-industries-ipo", "issue_size": "100 Cr",
+}]
+
+
+def test_failed_detail_scrape_is_retried(monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("groww.in unreachable")
+
+    monkeypatch.setattr(ipo_catalog, "scrape_closed_ipos", lambda: [dict(i) for i in LISTING])
+    monkeypatch.setattr(groww_scraper, "cached_get", unreachable)
+
+    db = _Db()
+    summary = ipo_catalog.refresh_catalog(db)
+    assert summary == {"listed": 1, "changed": 1, "enriched": 0, "failed": 1}
+    [row] = db.catalog.upserted
+    assert row["detail_hash"] is None and row["enriched_at"] is None
+    assert row["list_hash"] == ipo_catalog.list_hash(LISTING[0])
+    assert row["issue_size"] == "100 Cr"
+
+    # The unchanged list entry is picked up again because its details never landed
+    retry = _Db([{"search_id": row["search_id"], "detail_hash": row["detail_hash"]}])
+    assert ipo_catalog.refresh_catalog(retry)["changed"] == 1
+
+
+def test_enriched_entry_is_skipped_until_it_changes(monkeypatch):
+    def scraped(url, timeout):
+        return {**groww_scraper._empty_ipo_result(), "success": True, "issue_price": 120.0}
+
+    monkeypatch.setattr(ipo_catalog, "scrape_closed_ipos", lambda: [dict(i) for i in LISTING])
+    monkeypatch.setattr(ipo_catalog, "scrape_groww_ipo", scraped)
+
+    db = _Db()
+    assert ipo_catalog.refresh_catalog(db)["failed"] == 0
+    [row] = db.catalog.upserted
+    assert row["detail_hash"] == row["list_hash"] and row["issue_price"] == 120.0
+
+    fresh = _Db([{"search_id": row["search_id"], "detail_hash": row["detail_hash"]}])
+    assert ipo_catalog.refresh_catalog(fresh)["changed"] == 0
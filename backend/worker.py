@@ -0,0 +1,54 @@
+"""
+Job worker: runs queued scrape jobs outside the API process.
+
+    JOB_WORKER_MODE=external  (on the API, so it only enqueues)
+    python worker.py [--threads N] [--once]
+
+Jobs are claimed with the claim_scrape_job() SQL function, which uses
+FOR UPDATE SKIP LOCKED, so several workers can share one queue. Jobs left
+'running' by a crashed worker are marked failed, not re-run (see jobs.py).
+"""
+import time
+import logging
+import argparse
+import threading
+
+from database import get_db
+from jobs import claim_next, run_job
+import job_handlers  # noqa: F401 — registers job kinds
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+
+def work(poll_interval: float, once: bool) -> None:
+    db = get_db()
+    while True:
+        job = claim_next(db)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        log.info(f"Running job {job['id']} ({job['kind']})")
+        run_job(db, job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued scrape jobs.")
+    parser.add_argument("--threads", type=int, default=1, help="jobs to run concurrently")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds to wait when idle")
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    args = parser.parse_args()
+
+    threads = [
+        threading.Thread(target=work, args=(args.poll_interval, args.once), daemon=not args.once)
+        for _ in range(args.threads)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        log.info("Worker stopped")
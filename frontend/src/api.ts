@@ -18,6 +18,25 @@ export function setApiUserId(userId: string | null) {
 
 // ── Types ────────────────────────────────────────────────────────
 
+/** One keyset page; pass `nextCursor` back as `cursor` to continue */
+export interface Page<T> {
+    items: T[]
+    nextCursor: string | null
+}
+
+export interface PageParams {
+    limit?: number
+    cursor?: string | null
+    fields?: string
+}
+
+function getPage<T>(url: string, params: PageParams & Record<string, unknown> = {}): Promise<Page<T>> {
+    return api.get<T[]>(url, { params }).then(r => ({
+        items: r.data,
+        nextCursor: (r.headers['x-next-cursor'] as string | undefined) ?? null,
+    }))
+}
+
 export interface Sector {
     id: string
     name: string
@@ -43,6 +62,7 @@ export interface Ipo {
     rii_subscription?: string
     total_subscription?: string
     created_at: string
+    updated_at?: string | null
 }
 
 export interface PendingIpo extends Ipo {
@@ -88,6 +108,8 @@ export interface CmpResult {
     price: number | null
     success: boolean
     error?: string | null
+    cached_at?: string
+    age?: number
 }
 
 export interface PortfolioCompany {
@@ -99,6 +121,8 @@ export interface PortfolioCompany {
     shares: number
     buy_price: number
     cmp: number | null
+    cmp_cached_at?: string | null
+    cmp_age?: number | null
     invested: number
     current_value: number | null
     pct_change: number | null
@@ -113,6 +137,17 @@ export interface PortfolioCompany {
     total_subscription?: string
 }
 
+export interface ScrapeJob {
+    id: string
+    kind: string
+    status: 'queued' | 'running' | 'done' | 'failed'
+    total: number
+    completed: number
+    added: number
+    result?: { message: string, added: number } | null
+    error?: string | null
+}
+
 export interface PortfolioSummary {
     companies: PortfolioCompany[]
     total_invested: number
@@ -120,6 +155,69 @@ export interface PortfolioSummary {
     total_pct_change: number
 }
 
+export interface DashboardData {
+    portfolio: PortfolioSummary
+    ipos: Ipo[]
+    sectors: Sector[]
+}
+
+export interface HistoryPoint {
+    day: string
+    value: number
+}
+
+export interface HistoryResponse {
+    kind: 'company'
+    company: string | null
+    mode: 'lttb'
+    raw_points: number
+    points: HistoryPoint[]
+}
+
+export interface HistoryParams {
+    start?: string
+    end?: string
+    points?: number
+}
+
+/** Summary row per threshold combination; null thresholds mean "each IPO's current rule" */
+export interface BacktestCandidate {
+    gain_pct: number | null
+    loss_pct: number | null
+    current: boolean
+    ipos_triggered: number
+    trigger_days: number
+    entries: number
+    first_trigger: string | null
+}
+
+/** Per-IPO results; the arrays line up with BacktestResponse.candidates */
+export interface BacktestIpo {
+    ipo_id: string
+    company_name: string
+    gain_pct: number
+    loss_pct: number
+    history_days: number
+    trigger_days: number[]
+    entries: number[]
+    first_trigger: (string | null)[]
+}
+
+export interface BacktestResponse {
+    start: string | null
+    end: string | null
+    days: number
+    candidates: BacktestCandidate[]
+    ipos: BacktestIpo[]
+}
+
+export interface BacktestParams {
+    start?: string
+    end?: string
+    gain?: number[]
+    loss?: number[]
+}
+
 // ── API Calls ────────────────────────────────────────────────────
 
 export const sectorsApi = {
@@ -155,12 +253,30 @@ export const portfolioApi = {
     summary: () => api.get<PortfolioSummary>('/api/portfolio/summary').then(r => r.data),
 }
 
+/** Summary + IPO list + sectors in one call; the browser cache revalidates it by ETag */
+export const dashboardApi = {
+    get: () => api.get<DashboardData>('/api/dashboard').then(r => r.data),
+}
+
 export const automationApi = {
-    autoFetch: () => api.post<{ message: string, added: number }>('/api/scrape/auto-fetch').then(r => r.data),
-    listPending: () => api.get<PendingIpo[]>('/api/pending-ipos').then(r => r.data),
+    autoFetch: () => api.post<{ message: string, job_id: string, status: string }>('/api/scrape/auto-fetch').then(r => r.data),
+    job: (id: string) => api.get<ScrapeJob>(`/api/jobs/${id}`).then(r => r.data),
+    pagePending: (params: PageParams = {}) => getPage<PendingIpo>('/api/pending-ipos', params),
     submitPending: (id: string, data: Partial<Ipo>) => api.post<Ipo>(`/api/pending-ipos/${id}/submit`, data).then(r => r.data),
     deletePending: (id: string) => api.delete(`/api/pending-ipos/${id}`).then(r => r.data),
-    listThrowout: () => api.get<ThrowoutIpo[]>('/api/throwout-ipos').then(r => r.data),
+    pageThrowout: (params: PageParams = {}) => getPage<ThrowoutIpo>('/api/throwout-ipos', params),
     createThrowout: (data: { company_name: string, search_id: string }) => api.post<ThrowoutIpo>('/api/throwout-ipos', data).then(r => r.data),
     restoreThrowout: (id: string) => api.post(`/api/throwout-ipos/${id}/restore`).then(r => r.data),
 }
+
+/** Stored daily series, downsampled server-side; never triggers a scrape */
+export const historyApi = {
+    company: (company: string, params: HistoryParams = {}) =>
+        api.get<HistoryResponse>('/api/history', { params: { kind: 'company', company, ...params } }).then(r => r.data),
+}
+
+/** Replays stored daily closes through the alert rules; gain/loss go out as repeated params */
+export const backtestApi = {
+    run: (params: BacktestParams = {}) =>
+        api.get<BacktestResponse>('/api/backtest', { params, paramsSerializer: { indexes: null } }).then(r => r.data),
+}
@@ -0,0 +1,90 @@
+import { useState } from 'react'
+import { Activity, Play } from 'lucide-react'
+import { backtestApi, BacktestResponse } from '../api'
+import { useGlobal } from '../contexts/GlobalContext'
+
+const parseList = (text: string) =>
+    text.split(',').map(s => parseFloat(s.trim())).filter(n => !Number.isNaN(n))
+
+const pct = (value: number | null) => value === null ? 'current' : `${value > 0 ? '+' : ''}${value}%`
+
+/** Replays stored daily closes through the current rules and candidate thresholds */
+export default function BacktestCard() {
+    const { showToast } = useGlobal()
+    const [gains, setGains] = useState('10, 20, 30')
+    const [losses, setLosses] = useState('-10, -20')
+    const [running, setRunning] = useState(false)
+    const [report, setReport] = useState<BacktestResponse | null>(null)
+
+    const run = async () => {
+        setRunning(true)
+        try {
+            setReport(await backtestApi.run({ gain: parseList(gains), loss: parseList(losses) }))
+        } catch (err: any) {
+            showToast(err.response?.data?.detail || 'Backtest failed', 'error')
+        } finally {
+            setRunning(false)
+        }
+    }
+
+    return (
+        <div className="card" style={{ padding: '16px 20px' }}>
+            <div style={{ display: 'flex', alignItems: 'center', gap: 10, marginBottom: 12 }}>
+                <div style={{ width: 32, height: 32, borderRadius: 8, background: 'rgba(59,130,246,0.15)', display: 'flex', alignItems: 'center', justifyContent: 'center', color: 'var(--accent-blue)' }}>
+                    <Activity size={16} />
+                </div>
+                <div>
+                    <h3 style={{ fontSize: 14, fontWeight: 700 }}>Backtest</h3>
+                    <p style={{ fontSize: 11, color: 'var(--text-muted)' }}>How often rules would have fired on past daily closes</p>
+                </div>
+            </div>
+
+            <div style={{ display: 'flex', gap: 12, alignItems: 'flex-end', flexWrap: 'wrap', marginBottom: 12 }}>
+                <div className="form-group" style={{ margin: 0 }}>
+                    <label className="form-label">Gain % to try</label>
+                    <input className="form-input" value={gains} onChange={e => setGains(e.target.value)} style={{ width: 160 }} />
+                </div>
+                <div className="form-group" style={{ margin: 0 }}>
+                    <label className="form-label">Loss % to try</label>
+                    <input className="form-input" value={losses} onChange={e => setLosses(e.target.value)} style={{ width: 160 }} />
+                </div>
+                <button className="btn btn-primary btn-sm" onClick={run} disabled={running}>
+                    <Play size={14} /> {running ? 'Running…' : 'Run Backtest'}
+                </button>
+            </div>
+
+            {report && (report.days === 0 ? (
+                <div style={{ padding: '12px', textAlign: 'center', color: 'var(--text-muted)', fontSize: 13 }}>
+                    No price history recorded yet.
+                </div>
+            ) : (
+                <>
+                    <div style={{ fontSize: 12, color: 'var(--text-muted)', marginBottom: 8 }}>
+                        {report.ipos.length} IPOs over {report.days} market days ({report.start} – {report.end})
+                    </div>
+                    <div className="table-container">
+                        <table className="data-table">
+                            <thead>
+                                <tr>
+                                    <th>Gain</th><th>Loss</th><th>IPOs triggered</th><th>Alerts</th><th>Days out of range</th><th>First trigger</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                                {report.candidates.map((c, i) => (
+                                    <tr key={i} style={c.current ? { fontWeight: 700 } : undefined}>
+                                        <td className="gain">{pct(c.gain_pct)}</td>
+                                        <td className="loss">{pct(c.loss_pct)}</td>
+                                        <td>{c.ipos_triggered}</td>
+                                        <td>{c.entries}</td>
+                                        <td>{c.trigger_days}</td>
+                                        <td>{c.first_trigger || '—'}</td>
+                                    </tr>
+                                ))}
+                            </tbody>
+                        </table>
+                    </div>
+                </>
+            ))}
+        </div>
+    )
+}
@@ -0,0 +1,40 @@
+import { HistoryPoint } from '../api'
+
+interface Props {
+    points: HistoryPoint[]
+    height?: number
+    color?: string
+}
+
+/** Minimal SVG line chart for the server-downsampled /api/history series */
+export default function HistoryChart({ points, height = 160, color = 'var(--accent-blue)' }: Props) {
+    if (points.length < 2) {
+        return (
+            <div style={{ color: 'var(--text-muted)', fontSize: 13, padding: '24px 0' }}>
+                Not enough price history yet — a point is recorded every market day.
+            </div>
+        )
+    }
+
+    const width = 600
+    const values = points.map(p => p.value)
+    const min = Math.min(...values)
+    const max = Math.max(...values)
+    const range = max - min || 1
+    const x = (i: number) => (i / (points.length - 1)) * width
+    const y = (v: number) => height - ((v - min) / range) * (height - 8) - 4
+    const path = points.map((p, i) => `${i ? 'L' : 'M'}${x(i).toFixed(1)},${y(p.value).toFixed(1)}`).join(' ')
+
+    return (
+        <div>
+            <svg viewBox={`0 0 ${width} ${height}`} preserveAspectRatio="none" style={{ width: '100%', height }}>
+                <path d={path} fill="none" stroke={color} strokeWidth={2} vectorEffect="non-scaling-stroke" />
+            </svg>
+            <div style={{ display: 'flex', justifyContent: 'space-between', fontSize: 12, color: 'var(--text-muted)' }}>
+                <span>{points[0].day}</span>
+                <span>₹{min.toLocaleString()} – ₹{max.toLocaleString()}</span>
+                <span>{points[points.length - 1].day}</span>
+            </div>
+        </div>
+    )
+}
@@ -1,10 +1,12 @@
-import React, { createContext, useContext, useState, useCallback, useEffect } from 'react'
+import React, { createContext, useContext, useState, useCallback, useEffect, useRef } from 'react'
+import { useLocation } from 'react-router-dom'
 import { Sector, Ipo, sectorsApi } from '../api'
 import { useAuth } from '../contexts/AuthContext'
 
 interface GlobalContextType {
     sectors: Sector[]
     refreshSectors: () => Promise<void>
+    primeSectors: (sectors: Sector[]) => void
     showIpoModal: boolean
     setShowIpoModal: (show: boolean) => void
     editingIpo: Ipo | null
@@ -20,6 +22,7 @@ const GlobalContext = createContext<GlobalContextType | undefined>(undefined)
 
 export const GlobalProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
     const { userId } = useAuth()
+    const landingPath = useRef(useLocation().pathname)
     const [sectors, setSectors] = useState<Sector[]>([])
     const [showIpoModal, setShowIpoModal] = useState(false)
     const [editingIpo, setEditingIpo] = useState<Ipo | null>(null)
@@ -36,10 +39,16 @@ export const GlobalProvider: React.FC<{ children: React.ReactNode }> = ({ childr
         }
     }, [userId])
 
+    // The dashboard gets sectors in its own payload and hands them over via
+    // primeSectors, so only other landing pages need the separate request
     useEffect(() => {
-        refreshSectors()
+        if (landingPath.current !== '/') refreshSectors()
     }, [refreshSectors])
 
+    const primeSectors = useCallback((data: Sector[]) => {
+        setSectors(data)
+    }, [])
+
     const showToast = useCallback((message: string, type: 'success' | 'error' | 'info' = 'info') => {
         setToast({ message, type, id: Date.now() })
     }, [])
@@ -52,6 +61,7 @@ export const GlobalProvider: React.FC<{ children: React.ReactNode }> = ({ childr
         <GlobalContext.Provider value={{
             sectors,
             refreshSectors,
+            primeSectors,
             showIpoModal,
             setShowIpoModal,
             editingIpo,
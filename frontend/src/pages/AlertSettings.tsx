@@ -5,6 +5,7 @@ import {
 import { alertRulesApi, iposApi, AlertRule, Ipo } from '../api'
 import { useGlobal } from '../contexts/GlobalContext'
 import SearchHeader from '../components/SearchHeader'
+import BacktestCard from '../components/BacktestCard'
 
 function EditableRule({
     rule, onUpdate, onDelete
@@ -389,6 +390,8 @@ export default function AlertSettings() {
                                 )}
                             </div>
 
+                            <BacktestCard />
+
                             {/* Rule priority explanation */}
                             <div style={{
                                 padding: '14px 16px',
@@ -4,10 +4,11 @@ import {
     ArrowLeft, TrendingUp, TrendingDown, Calendar, DollarSign, Building2,
     BarChart3, Globe, Trash2, Pencil, ShieldCheck, Info, Plus
 } from 'lucide-react'
-import { iposApi, portfolioApi, scrapeApi, PortfolioCompany, Ipo } from '../api'
+import { iposApi, portfolioApi, scrapeApi, historyApi, PortfolioCompany, Ipo, HistoryPoint } from '../api'
 import { useGlobal } from '../contexts/GlobalContext'
 import SearchHeader from '../components/SearchHeader'
 import DeleteConfirmationModal from '../components/DeleteConfirmationModal'
+import HistoryChart from '../components/HistoryChart'
 
 export default function CompanyDetailPage() {
     const { id, searchQuery } = useParams<{ id?: string, searchQuery?: string }>()
@@ -23,6 +24,7 @@ export default function CompanyDetailPage() {
     const [loading, setLoading] = useState(true)
     const [showDeleteConfirm, setShowDeleteConfirm] = useState(false)
     const [deleting, setDeleting] = useState(false)
+    const [history, setHistory] = useState<HistoryPoint[] | null>(null)
 
     const fetchData = useCallback(async () => {
         if (!id && !searchQuery) return
@@ -68,7 +70,8 @@ export default function CompanyDetailPage() {
                 pct_change: portfolioRec?.pct_change || null,
             }
 
-            if (mergedComp.cmp === null) {
+            // Portfolio rows already had their CMP resolved server-side by the summary
+            if (mergedComp.cmp === null && !portfolioRec) {
                 try {
                     const cmpRes = await scrapeApi.cmp(mergedComp.company_name)
                     if (cmpRes.success && cmpRes.price) {
@@ -99,6 +102,15 @@ export default function CompanyDetailPage() {
         fetchData()
     }, [fetchData])
 
+    // Stored daily closes, downsampled server-side
+    const companyName = company?.company_name
+    useEffect(() => {
+        if (!companyName) return
+        historyApi.company(companyName, { points: 200 })
+            .then(res => setHistory(res.points))
+            .catch(() => setHistory([]))
+    }, [companyName])
+
     // Listen for global updates
     useEffect(() => {
         const handleUpdate = () => fetchData()
@@ -213,6 +225,15 @@ export default function CompanyDetailPage() {
                     </div>
                 </div>
 
+                {history && (
+                    <div className="card" style={{ marginBottom: 24 }}>
+                        <h3 style={{ display: 'flex', alignItems: 'center', gap: 12, margin: '0 0 20px 0', fontSize: 18, color: 'var(--accent-blue)' }}>
+                            <TrendingUp size={20} /> Price History
+                        </h3>
+                        <HistoryChart points={history} />
+                    </div>
+                )}
+
                 <div className="grid-2" style={{ gap: 24 }}>
                     <div className="card">
                         <h3 style={{ display: 'flex', alignItems: 'center', gap: 12, margin: '0 0 20px 0', fontSize: 18, color: 'var(--accent-blue)' }}>
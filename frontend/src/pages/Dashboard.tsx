@@ -1,7 +1,7 @@
 import { useState, useEffect, useCallback } from 'react'
 import { Link, useNavigate } from 'react-router-dom'
 import { Plus, BarChart3, TrendingUp, TrendingDown, Pencil, Trash2 } from 'lucide-react'
-import { portfolioApi, iposApi, setApiUserId, PortfolioSummary, Ipo } from '../api'
+import { dashboardApi, iposApi, setApiUserId, PortfolioSummary, Ipo } from '../api'
 import { useAuth } from '../contexts/AuthContext'
 import { useGlobal } from '../contexts/GlobalContext'
 import CompanyCard from '../components/CompanyCard'
@@ -12,6 +12,7 @@ export default function Dashboard() {
     const { userId } = useAuth()
     const {
         sectors,
+        primeSectors,
         setShowIpoModal,
         setEditingIpo,
         setShowAddSectorModal,
@@ -33,19 +34,17 @@ export default function Dashboard() {
         if (!userId) return
         if (isRefresh) setRefreshing(true)
         try {
-            const [summary, all] = await Promise.all([
-                portfolioApi.summary(),
-                iposApi.list(),
-            ])
-            setPortfolio(summary)
-            setAllIpos(all)
+            const data = await dashboardApi.get()
+            setPortfolio(data.portfolio)
+            setAllIpos(data.ipos)
+            primeSectors(data.sectors)
         } catch {
             showToast('Failed to load data. Check backend connection.', 'error')
         } finally {
             setLoading(false)
             setRefreshing(false)
         }
-    }, [userId, showToast])
+    }, [userId, showToast, primeSectors])
 
     useEffect(() => { fetchData() }, [fetchData])
 
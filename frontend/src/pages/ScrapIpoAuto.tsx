@@ -4,13 +4,22 @@ import { useNavigate } from 'react-router-dom'
 import { automationApi, PendingIpo, ThrowoutIpo, Ipo } from '../api'
 import { useGlobal } from '../contexts/GlobalContext'
 
+const PAGE_SIZE = 50
+const POLL_INTERVAL_MS = 1500
+// Give up on a job that never finishes (no worker, or a dead one)
+const POLL_TIMEOUT_MS = 5 * 60 * 1000
+
 export default function ScrapIpoAuto() {
     const navigate = useNavigate()
     const { sectors, showToast } = useGlobal()
     const [pendingIpos, setPendingIpos] = useState<PendingIpo[]>([])
     const [throwoutIpos, setThrowoutIpos] = useState<ThrowoutIpo[]>([])
+    const [pendingCursor, setPendingCursor] = useState<string | null>(null)
+    const [throwoutCursor, setThrowoutCursor] = useState<string | null>(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [loading, setLoading] = useState(true)
     const [fetching, setFetching] = useState(false)
+    const [fetchProgress, setFetchProgress] = useState<string | null>(null)
     const [showThrowout, setShowThrowout] = useState(false)
 
     // Form state for each pending IPO
@@ -25,21 +34,13 @@ export default function ScrapIpoAuto() {
     const [previewIpo, setPreviewIpo] = useState<{ id: string, data: Partial<Ipo> } | null>(null)
     const [editingPreview, setEditingPreview] = useState<Partial<Ipo> | null>(null)
 
-    const fetchData = useCallback(async () => {
-        setLoading(true)
-        try {
-            const [pending, throwout] = await Promise.all([
-                automationApi.listPending(),
-                automationApi.listThrowout()
-            ])
-            setPendingIpos(pending)
-            setThrowoutIpos(throwout)
-
-            // Initialize form states for new pending items
-            const newStates = { ...formStates }
-            pending.forEach(ipo => {
-                if (!newStates[ipo.id]) {
-                    newStates[ipo.id] = {
+    // Initialize form states for newly loaded pending items
+    const initFormStates = useCallback((items: PendingIpo[]) => {
+        setFormStates(prev => {
+            const next = { ...prev }
+            items.forEach(ipo => {
+                if (!next[ipo.id]) {
+                    next[ipo.id] = {
                         sector_id: '',
                         portfolio: 'no',
                         no_of_shares: '',
@@ -47,26 +48,99 @@ export default function ScrapIpoAuto() {
                     }
                 }
             })
-            setFormStates(newStates)
+            return next
+        })
+    }, [])
+
+    // Reloads the first page of each list; "Load more" appends further pages
+    const fetchData = useCallback(async () => {
+        setLoading(true)
+        try {
+            const [pending, throwout] = await Promise.all([
+                automationApi.pagePending({ limit: PAGE_SIZE }),
+                automationApi.pageThrowout({ limit: PAGE_SIZE, fields: 'company_name,search_id' })
+            ])
+            setPendingIpos(pending.items)
+            setPendingCursor(pending.nextCursor)
+            setThrowoutIpos(throwout.items)
+            setThrowoutCursor(throwout.nextCursor)
+            initFormStates(pending.items)
         } catch {
             showToast('Failed to load data', 'error')
         } finally {
             setLoading(false)
         }
-    }, [formStates, showToast])
+    }, [initFormStates, showToast])
+
+    const loadMorePending = async () => {
+        if (!pendingCursor) return
+        setLoadingMore(true)
+        try {
+            const page = await automationApi.pagePending({ limit: PAGE_SIZE, cursor: pendingCursor })
+            setPendingIpos(prev => [...prev, ...page.items])
+            setPendingCursor(page.nextCursor)
+            initFormStates(page.items)
+        } catch {
+            showToast('Failed to load more IPOs', 'error')
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
+    const loadMoreThrowout = async () => {
+        if (!throwoutCursor) return
+        setLoadingMore(true)
+        try {
+            const page = await automationApi.pageThrowout({ limit: PAGE_SIZE, cursor: throwoutCursor, fields: 'company_name,search_id' })
+            setThrowoutIpos(prev => [...prev, ...page.items])
+            setThrowoutCursor(page.nextCursor)
+        } catch {
+            showToast('Failed to load more companies', 'error')
+        } finally {
+            setLoadingMore(false)
+        }
+    }
 
     useEffect(() => { fetchData() }, [])
 
     const handleAutoFetch = async () => {
         setFetching(true)
+        setFetchProgress(null)
         try {
-            const res = await automationApi.autoFetch()
-            showToast(res.message, res.added > 0 ? 'success' : 'info')
+            const { job_id } = await automationApi.autoFetch()
+            // Poll the background job; rows land in pending as chunks finish
+            let lastAdded = 0
+            let finished = false
+            const deadline = Date.now() + POLL_TIMEOUT_MS
+            while (Date.now() < deadline) {
+                await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS))
+                const job = await automationApi.job(job_id)
+                setFetchProgress(job.total ? `${job.completed}/${job.total}` : null)
+                if (job.added > lastAdded) {
+                    lastAdded = job.added
+                    fetchData()
+                }
+                if (job.status === 'done') {
+                    const added = job.result?.added ?? job.added
+                    showToast(job.result?.message || `Fetched ${added} new IPOs`, added > 0 ? 'success' : 'info')
+                    finished = true
+                    break
+                }
+                if (job.status === 'failed') {
+                    showToast(job.error || 'Failed to fetch IPOs', 'error')
+                    finished = true
+                    break
+                }
+            }
+            if (!finished) {
+                showToast('Auto-fetch is taking too long; check back later', 'error')
+            }
             fetchData()
         } catch {
             showToast('Failed to fetch IPOs', 'error')
         } finally {
             setFetching(false)
+            setFetchProgress(null)
         }
     }
 
@@ -182,7 +256,7 @@ export default function ScrapIpoAuto() {
                         disabled={fetching}
                     >
                         {fetching ? <span className="spinner" /> : <Play size={16} />}
-                        {fetching ? 'Fetching...' : 'Start IPO Automate'}
+                        {fetching ? `Fetching${fetchProgress ? ` ${fetchProgress}` : '...'}` : 'Start IPO Automate'}
                     </button>
                 </div>
             </header>
@@ -223,11 +297,18 @@ export default function ScrapIpoAuto() {
                                 </tbody>
                             </table>
                         )}
+                        {throwoutCursor && (
+                            <div style={{ padding: 16, textAlign: 'center' }}>
+                                <button className="btn btn-secondary btn-sm" onClick={loadMoreThrowout} disabled={loadingMore}>
+                                    {loadingMore ? <span className="spinner" /> : 'Load more'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 ) : (
                     <div style={{ display: 'flex', flexDirection: 'column', gap: 20 }}>
                         <div className="section-header">
-                            <h2 style={{ fontSize: 18, fontWeight: 600 }}>Pending Additions ({pendingIpos.length})</h2>
+                            <h2 style={{ fontSize: 18, fontWeight: 600 }}>Pending Additions ({pendingIpos.length}{pendingCursor ? '+' : ''})</h2>
                         </div>
 
                         {loading ? (
@@ -320,6 +401,13 @@ export default function ScrapIpoAuto() {
                                         </div>
                                     )
                                 })}
+                                {pendingCursor && (
+                                    <div style={{ textAlign: 'center' }}>
+                                        <button className="btn btn-secondary btn-sm" onClick={loadMorePending} disabled={loadingMore}>
+                                            {loadingMore ? <span className="spinner" /> : 'Load more'}
+                                        </button>
+                                    </div>
+                                )}
                             </div>
                         )}
                     </div>
@@ -6,7 +6,22 @@
 -- ─── 0. CLEAN SLATE (safe to re-run) ─────────────────────────────
 drop trigger if exists on_auth_user_created on auth.users;
 drop function if exists public.handle_new_user();
+drop function if exists public.claim_scrape_job(text, integer);
+drop function if exists public.stage_catalog_ipos(uuid, integer);
+drop function if exists public.count_new_catalog_ipos(uuid);
+drop function if exists public.new_catalog_ipos(uuid);
+drop table if exists public.scrape_jobs cascade;
+drop table if exists public.ipo_catalog cascade;
+drop table if exists public.cron_checkpoints cascade;
+drop table if exists public.cron_company_state cascade;
+drop table if exists public.alert_states cascade;
+drop table if exists public.portfolio_valuations cascade;
+drop table if exists public.company_price_history cascade;
+drop table if exists public.company_prices cascade;
+drop table if exists public.company_resolutions cascade;
 drop table if exists public.alert_rules cascade;
+drop table if exists public.throwout_ipo_companies cascade;
+drop table if exists public.pending_ipo_additions cascade;
 drop table if exists public.ipos cascade;
 drop table if exists public.sectors cascade;
 drop table if exists public.user_profiles cascade;
@@ -51,10 +66,44 @@ create table public.ipos (
   nii_subscription    text,
   rii_subscription    text,
   total_subscription  text,
+  name_key            text generated always as (lower(btrim(company_name))) stored,
   created_at          timestamptz default now(),
   updated_at          timestamptz
 );
 
+-- ─── 3b. PENDING IPO ADDITIONS ────────────────────────────────────
+-- Per-user — closed Groww IPOs staged by auto-fetch, awaiting review
+create table public.pending_ipo_additions (
+  id                  uuid default gen_random_uuid() primary key,
+  user_id             uuid references public.user_profiles(id) on delete cascade not null,
+  company_name        text not null,
+  search_id           text not null,
+  groww_link          text,
+  listed_on           text,
+  issue_price         text,
+  listing_price       text,
+  issue_size          text,
+  qib_subscription    text,
+  nii_subscription    text,
+  rii_subscription    text,
+  total_subscription  text,
+  name_key            text generated always as (lower(btrim(company_name))) stored,
+  created_at          timestamptz not null default now(),
+  unique (user_id, search_id),
+  unique (user_id, name_key)
+);
+
+-- ─── 3c. THROWOUT IPO COMPANIES ───────────────────────────────────
+-- Per-user — IPOs the user dismissed; auto-fetch never stages them again
+create table public.throwout_ipo_companies (
+  id            uuid default gen_random_uuid() primary key,
+  user_id       uuid references public.user_profiles(id) on delete cascade not null,
+  company_name  text not null,
+  search_id     text not null,
+  created_at    timestamptz not null default now(),
+  unique (user_id, search_id)
+);
+
 -- ─── 4. ALERT RULES ───────────────────────────────────────────────
 -- Per-user — each alert rule belongs to the user who set it
 create table public.alert_rules (
@@ -75,12 +124,219 @@ create unique index alert_rules_base_per_user
   on public.alert_rules (user_id, type)
   where type = 'base';
 
+-- ─── 4b. COMPANY RESOLUTIONS ──────────────────────────────────────
+-- Global cache: normalized company name → screener.in page.
+-- company_url is null for cached "no company found" answers.
+create table public.company_resolutions (
+  name_key     text primary key,
+  found_name   text,
+  company_url  text,
+  resolved_at  timestamptz not null default now()
+);
+
+-- ─── 4c. ALERT STATES ─────────────────────────────────────────────
+-- Last alerted band per (user, IPO, reference price) so the cron only
+-- notifies on transitions. last_band: 0 = armed, ±n = nth step past the
+-- gain/loss threshold.
+create table public.alert_states (
+  user_id          uuid references public.user_profiles(id) on delete cascade not null,
+  ipo_id           uuid references public.ipos(id) on delete cascade not null,
+  reference        text not null check (reference in ('issue', 'listing')),
+  reference_price  numeric not null,
+  last_band        integer not null default 0,
+  last_pct         numeric,
+  last_alerted_at  timestamptz,
+  updated_at       timestamptz default now(),
+  primary key (user_id, ipo_id, reference)
+);
+
+-- ─── 4d. CRON COMPANY STATE ───────────────────────────────────────
+-- Incremental cron bookkeeping: the CMP each company was last evaluated at
+-- and a hash of the alert rules that applied to it then.
+create table public.cron_company_state (
+  company_key        text primary key,
+  last_cmp           numeric,
+  last_evaluated_at  timestamptz not null default now(),
+  rules_hash         text
+);
+
+-- ─── 4e. CRON CHECKPOINTS ─────────────────────────────────────────
+-- Progress of sharded / resumable alert checks: one row per (run, shard).
+-- cursor is the last company key processed; stats accumulates run counters.
+create table public.cron_checkpoints (
+  run_id       text not null,
+  shard        integer not null,
+  shard_count  integer not null,
+  cursor       text,
+  done         boolean not null default false,
+  stats        jsonb not null default '{}'::jsonb,
+  updated_at   timestamptz default now(),
+  primary key (run_id, shard)
+);
+
+-- ─── 4f. SCRAPE JOBS ──────────────────────────────────────────────
+-- Background job queue for long scrapes (see backend/jobs.py).
+-- user_id is null for system jobs such as alert checks.
+create table public.scrape_jobs (
+  id          uuid default gen_random_uuid() primary key,
+  user_id     uuid references public.user_profiles(id) on delete cascade,
+  kind        text not null,
+  params      jsonb not null default '{}'::jsonb,
+  dedup_key   text not null,
+  status      text not null default 'queued' check (status in ('queued', 'running', 'done', 'failed')),
+  total       integer not null default 0,
+  completed   integer not null default 0,
+  added       integer not null default 0,
+  result      jsonb,
+  error       text,
+  attempts    integer not null default 0,
+  locked_by   text,
+  locked_at   timestamptz,
+  created_at  timestamptz default now(),
+  updated_at  timestamptz default now()  -- last claim or progress update; staleness is judged on it
+);
+
+-- At most one identical job queued or running at a time
+create unique index scrape_jobs_inflight_dedup
+  on public.scrape_jobs (dedup_key)
+  where status in ('queued', 'running');
+
+-- Fail running jobs with no progress for p_stale_seconds (a dead worker's),
+-- then atomically claim the oldest queued job. Stale jobs are never re-run.
+create or replace function public.claim_scrape_job(p_worker text, p_stale_seconds integer default 900)
+returns setof public.scrape_jobs as $$
+  update public.scrape_jobs
+     set status = 'failed', error = 'Job abandoned (no progress)', updated_at = now()
+   where status = 'running'
+     and updated_at < now() - make_interval(secs => p_stale_seconds);
+
+  update public.scrape_jobs
+     set status = 'running', locked_by = p_worker, locked_at = now(),
+         attempts = attempts + 1, updated_at = now()
+   where id = (
+     select id from public.scrape_jobs
+      where status = 'queued'
+      order by created_at
+      limit 1
+      for update skip locked
+   )
+  returning *;
+$$ language sql;
+
+-- ─── 4g. COMPANY PRICES ───────────────────────────────────────────
+-- Global CMP store keyed like company_resolutions (see backend/company_prices.py).
+-- Written in bulk by the cron job and refresher; read endpoints only scrape
+-- live when fetched_at is older than PRICE_STALE_SECONDS.
+create table public.company_prices (
+  name_key      text primary key,
+  company_name  text not null,
+  price         numeric not null,
+  high          numeric,
+  low           numeric,
+  fetched_at    timestamptz not null default now(),
+  source        text not null check (source in ('cron', 'refresher', 'live'))
+);
+
+-- ─── 4h. PRICE HISTORY ────────────────────────────────────────────
+-- One close per company per market day (Asia/Kolkata), and one valuation
+-- per user per day, written by price_history.snapshot_day(). The primary
+-- keys double as the range-scan indexes for /api/history.
+create table public.company_price_history (
+  name_key  text not null,
+  day       date not null,
+  close     numeric not null,
+  primary key (name_key, day)
+);
+
+create table public.portfolio_valuations (
+  user_id   uuid references public.user_profiles(id) on delete cascade not null,
+  day       date not null,
+  invested  numeric not null,
+  value     numeric not null,
+  holdings  smallint not null,
+  priced    smallint not null,
+  primary key (user_id, day)
+);
+
+-- ─── 4i. IPO CATALOG ──────────────────────────────────────────────
+-- Global closed-IPO list from Groww, one row per search_id, kept current by
+-- the scheduled refresh (see backend/ipo_catalog.py). Detail pages are only
+-- re-scraped when list_hash differs from detail_hash. Auto-fetch copies rows
+-- from here into pending_ipo_additions without scraping.
+create table public.ipo_catalog (
+  search_id             text primary key,
+  company_name          text not null,
+  groww_link            text,
+  is_sme                boolean not null default false,
+  listed_on             text,
+  issue_price           text,
+  listing_price         text,
+  issue_size            text,
+  qib_subscription      text,
+  nii_subscription      text,
+  rii_subscription      text,
+  total_subscription    text,
+  overall_subscription  text,
+  name_key              text generated always as (lower(btrim(company_name))) stored,
+  list_hash             text not null,
+  detail_hash           text,
+  enriched_at           timestamptz,
+  updated_at            timestamptz default now()
+);
+
+-- Catalog IPOs the user has not seen: the anti-joins skip IPOs the user
+-- tracks (by name), threw out or already has pending.
+create or replace function public.new_catalog_ipos(p_user_id uuid)
+returns setof public.ipo_catalog as $$
+  select c.*
+    from public.ipo_catalog c
+   where not exists (select 1 from public.ipos i
+                      where i.user_id = p_user_id and i.name_key = c.name_key)
+     and not exists (select 1 from public.throwout_ipo_companies t
+                      where t.user_id = p_user_id and t.search_id = c.search_id)
+     and not exists (select 1 from public.pending_ipo_additions p
+                      where p.user_id = p_user_id and (p.search_id = c.search_id or p.name_key = c.name_key));
+$$ language sql stable;
+
+-- How many there are, for the job's progress total before staging starts
+create or replace function public.count_new_catalog_ipos(p_user_id uuid)
+returns integer as $$
+  select count(*)::integer from public.new_catalog_ipos(p_user_id);
+$$ language sql stable;
+
+-- Stage up to p_limit of them into pending_ipo_additions and return only the
+-- rows actually inserted; on conflict do nothing makes concurrent calls
+-- idempotent. Call it until it returns no rows.
+create or replace function public.stage_catalog_ipos(p_user_id uuid, p_limit integer default 500)
+returns setof public.pending_ipo_additions as $$
+  insert into public.pending_ipo_additions
+    (user_id, company_name, search_id, groww_link, listed_on, issue_price, listing_price,
+     issue_size, qib_subscription, nii_subscription, rii_subscription, total_subscription)
+  select p_user_id, c.company_name, c.search_id, c.groww_link, c.listed_on, c.issue_price, c.listing_price,
+         c.issue_size, c.qib_subscription, c.nii_subscription, c.rii_subscription, c.total_subscription
+    from public.new_catalog_ipos(p_user_id) c
+   order by c.search_id
+   limit p_limit
+  on conflict do nothing
+  returning *;
+$$ language sql;
+
 -- ─── 5. INDEXES ───────────────────────────────────────────────────
 create index idx_ipos_user_id      on public.ipos(user_id);
 create index idx_ipos_portfolio    on public.ipos(user_id, portfolio);
 create index idx_ipos_created_at   on public.ipos(created_at desc);
 create index idx_alert_rules_user  on public.alert_rules(user_id, type);
 create index idx_sectors_name      on public.sectors(name);
+create index idx_alert_states_ipo  on public.alert_states(ipo_id);
+create index idx_scrape_jobs_user  on public.scrape_jobs(user_id, created_at desc);
+create index idx_scrape_jobs_queue on public.scrape_jobs(created_at) where status = 'queued';
+-- Anti-join of stage_catalog_ipos() against the user's tracked companies
+create index idx_ipos_user_name    on public.ipos(user_id, name_key);
+-- Keyset pagination: list endpoints seek on (created_at, id) within one user
+create index idx_ipos_user_page      on public.ipos(user_id, created_at desc, id desc);
+create index idx_pending_user_page   on public.pending_ipo_additions(user_id, created_at desc, id desc);
+create index idx_throwout_user_page  on public.throwout_ipo_companies(user_id, created_at desc, id desc);
+create index idx_alert_rules_page    on public.alert_rules(user_id, created_at, id);
 
 -- ─── 6. AUTO-CREATE PROFILE TRIGGER ──────────────────────────────
 create or replace function public.handle_new_user()
@@ -108,6 +364,18 @@ alter table public.user_profiles enable row level security;
 alter table public.sectors       enable row level security;
 alter table public.ipos          enable row level security;
 alter table public.alert_rules   enable row level security;
+alter table public.pending_ipo_additions  enable row level security;
+alter table public.throwout_ipo_companies enable row level security;
+-- Backend-only cache: RLS on with no policies, so only service_role can touch it
+alter table public.company_resolutions enable row level security;
+alter table public.alert_states        enable row level security;
+alter table public.cron_company_state  enable row level security;
+alter table public.cron_checkpoints    enable row level security;
+alter table public.scrape_jobs         enable row level security;
+alter table public.company_prices      enable row level security;
+alter table public.company_price_history enable row level security;
+alter table public.portfolio_valuations  enable row level security;
+alter table public.ipo_catalog           enable row level security;
 
 -- USER PROFILES
 -- Allow anyone (anon+authenticated) to SELECT profiles so that
@@ -157,9 +425,36 @@ create policy "Users update own alert_rules"
 create policy "Users delete own alert_rules"
   on public.alert_rules for delete using (auth.uid() = user_id);
 
+-- PENDING IPO ADDITIONS — read, insert, delete scoped to owner
+create policy "Users view own pending_ipo_additions"
+  on public.pending_ipo_additions for select using (auth.uid() = user_id);
+
+create policy "Users insert own pending_ipo_additions"
+  on public.pending_ipo_additions for insert with check (auth.uid() = user_id);
+
+create policy "Users delete own pending_ipo_additions"
+  on public.pending_ipo_additions for delete using (auth.uid() = user_id);
+
+-- THROWOUT IPO COMPANIES — read, insert, delete scoped to owner
+create policy "Users view own throwout_ipo_companies"
+  on public.throwout_ipo_companies for select using (auth.uid() = user_id);
+
+create policy "Users insert own throwout_ipo_companies"
+  on public.throwout_ipo_companies for insert with check (auth.uid() = user_id);
+
+create policy "Users delete own throwout_ipo_companies"
+  on public.throwout_ipo_companies for delete using (auth.uid() = user_id);
+
+-- PORTFOLIO VALUATIONS — read-only for the owner (written by the backend)
+create policy "Users view own portfolio_valuations"
+  on public.portfolio_valuations for select using (auth.uid() = user_id);
+
 -- ─── DONE ─────────────────────────────────────────────────────────
--- Tables created: user_profiles, sectors, ipos, alert_rules
+-- Tables created: user_profiles, sectors, ipos, pending_ipo_additions, throwout_ipo_companies,
+--                 alert_rules, company_resolutions, alert_states, cron_company_state,
+--                 cron_checkpoints, scrape_jobs, company_prices, company_price_history,
+--                 portfolio_valuations, ipo_catalog
 -- Auth trigger: auto-creates user_profiles row on signup
--- RLS: users can only access their own ipos and alert_rules
+-- RLS: users can only access their own ipos, pending/throwout IPOs and alert_rules
 -- Sectors: shared across all authenticated users
 -- Backend (service_role key) bypasses all RLS automatically